@@ -1,14 +1,27 @@
-from flask import Flask, render_template, request, jsonify, session, redirect
-from backend.service import ContestService
+from flask import Flask, render_template, request, jsonify, session, redirect, Response, stream_with_context
+from backend import jobs
+from backend import metrics
 from backend.queue_manager import JobQueue
+from backend.durable_queue import DurableJobQueue
+from backend.toolchain import check_java_toolchain
+import config
 import os
+import json
+import hashlib
 import secrets
+import time
 
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'dsa-challenge-secure-key-2024')
-service = ContestService()
-# Initialize Job Queue with 2 concurrent workers
-job_queue = JobQueue(max_concurrent=2)
+service = jobs.get_service()
+# Resolve the JDK once at startup (fails fast if JAVA_REQUIRED=1 and it is missing)
+check_java_toolchain(required=config.JAVA_REQUIRED)
+# Initialize Job Queue; admission control (backend/admission.py) bounds concurrent executions
+if config.QUEUE_STORE == 'sqlite':
+    job_queue = DurableJobQueue(max_concurrent=config.QUEUE_WORKERS if config.QUEUE_RUN_WORKERS else 0)
+else:
+    job_queue = JobQueue(max_concurrent=config.QUEUE_WORKERS)
+metrics.REGISTRY.gauge('judge_queue_jobs', 'Queued jobs by state', ('task_type', 'state'), job_queue.depth)
 
 @app.route('/')
 def index():
@@ -43,7 +56,8 @@ def contest():
     """Contest interface"""
     # Client-side Auth (Firebase/LocalStorage) handles security now.
     # We just serve the page.
-    return render_template('contest.html', name='Participant', email='', participant_id='')
+    return render_template('contest.html', name='Participant', email='', participant_id='',
+                           queue_events=config.QUEUE_EVENTS_ENABLED)
 
 @app.route('/completion')
 def completion():
@@ -63,60 +77,30 @@ def get_problem(problem_id):
     problem = service.get_problem(problem_id, language)
     return jsonify(problem)
 
-# Helper function to perform the actual run
-def _perform_run_code(data):
+def _job_profile(data):
+    """
+    (problem_id, language) of a run/submit request, for queue scheduling and metrics.
+    Unknown problems and languages map to 'other', so clients cannot add estimator
+    entries or metric series at will.
+    """
+    data = data or {}
+    problem_id = data.get('problem_id')
+    language = data.get('language')
     try:
-        problem_id = data['problem_id']
-        code = data['code']
-        language = data['language']
-        
-        from backend.problem_loader import get_test_cases
-        from backend.executor import get_executor
-        from backend.judge import Judge
-        
-        test_cases = get_test_cases(problem_id)
-        if not test_cases:
-            return {'success': False, 'message': 'No test cases available'}
-        
-        executor = get_executor(language)
-        test_input = test_cases[0]['input']
-        expected = test_cases[0]['expected_output']
-        
-        success, output, error, exec_time = executor.execute(code, test_input)
-        
-        if success:
-            import json
-            try:
-                actual = json.loads(output) if output else None
-            except:
-                actual = output.strip()
-            
-            judge = Judge()
-            passed = judge._compare_output(actual, expected)
-            
-            return {
-                'success': True,
-                'passed': passed,
-                'input': test_input,
-                'expected': expected,
-                'actual': actual,
-                'time': exec_time,
-                'error': None
-            }
-        else:
-            return {
-                'success': False,
-                'passed': False,
-                'error': error,
-                'error_type': 'execution'
-            }
-    except Exception as e:
-        return {
-            'success': False,
-            'passed': False,
-            'error': str(e),
-            'error_type': 'system'
-        }
+        problem_id = int(problem_id) if not isinstance(problem_id, bool) else None
+    except (TypeError, ValueError):
+        problem_id = None
+    if problem_id is None or not 1 <= problem_id <= config.TOTAL_PROBLEMS:
+        problem_id = 'other'
+    if not isinstance(language, str) or language.lower() not in config.SUPPORTED_LANGUAGES:
+        language = 'other'
+    return problem_id, language.lower()
+
+def _payload_hash(data):
+    """Identifies repeated run/submit requests with the same problem, language and code"""
+    data = data or {}
+    payload = json.dumps([data.get('problem_id'), data.get('language'), data.get('code')])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
 
 @app.route('/api/run', methods=['POST'])
 def run_code():
@@ -124,7 +108,16 @@ def run_code():
     data = request.json
     
     # Add to queue
-    task_id = job_queue.add_job('run', _perform_run_code, data)
+    # Runs do not need a login. Callers without a session take turns by address, but
+    # several participants may share one, so their runs are never coalesced or superseded.
+    participant_id = session.get('participant_id')
+    if participant_id is None:
+        owner, dedupe_key, supersede_key = f'ip:{request.remote_addr}', None, None
+    else:
+        owner, dedupe_key = participant_id, _payload_hash(data)
+        supersede_key = (data or {}).get('problem_id') if config.QUEUE_SUPERSEDE_RUNS else None
+    task_id = job_queue.add_job('run', jobs.run_code, data, owner=owner, profile=_job_profile(data),
+                                dedupe_key=dedupe_key, supersede_key=supersede_key)
     
     return jsonify({
         'success': True,
@@ -133,15 +126,6 @@ def run_code():
         'message': 'Queued for execution'
     })
 
-# Helper function for submission
-def _perform_submit(participant_id, data):
-    return service.submit_code(
-        participant_id,
-        data['problem_id'],
-        data['code'],
-        data['language']
-    )
-
 @app.route('/api/submit', methods=['POST'])
 def submit_code():
     """Queue submission for judging"""
@@ -152,7 +136,8 @@ def submit_code():
     participant_id = session['participant_id']
     
     # Add to queue
-    task_id = job_queue.add_job('submit', _perform_submit, participant_id, data)
+    task_id = job_queue.add_job('submit', jobs.submit_code, participant_id, data, owner=participant_id,
+                                profile=_job_profile(data), dedupe_key=_payload_hash(data))
     
     return jsonify({
         'success': True,
@@ -170,6 +155,47 @@ def get_queue_status(task_id):
         
     return jsonify(status)
 
+def _status_events(task_id):
+    """Yields: SSE messages with the job's status each time it changes, until it finishes"""
+    sent = None
+    version = None
+    last_write = started = time.time()
+    while time.time() - started < config.QUEUE_EVENTS_TIMEOUT:
+        status = job_queue.get_status(task_id)
+        if status is None:
+            yield 'event: not_found\ndata: {}\n\n'
+            return
+        data = json.dumps(dict(status), default=str)
+        if data != sent:
+            yield f'data: {data}\n\n'
+            sent = data
+            last_write = time.time()
+        elif time.time() - last_write >= config.QUEUE_EVENTS_KEEPALIVE:
+            yield ': keep-alive\n\n'
+            last_write = time.time()
+        if status['status'] in ('completed', 'failed'):
+            return
+        version = job_queue.wait_for_change(version, config.QUEUE_EVENTS_POLL)
+
+@app.route('/api/queue/events/<task_id>', methods=['GET'])
+def queue_events(task_id):
+    """Stream status changes of a queued job (Server-Sent Events)"""
+    if not config.QUEUE_EVENTS_ENABLED:
+        return jsonify({'error': 'Event streams are disabled'}), 404
+    if job_queue.get_status(task_id) is None:
+        return jsonify({'status': 'not_found'}), 404
+    
+    return Response(stream_with_context(_status_events(task_id)), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Queue and judge metrics in the Prometheus text format"""
+    if not config.METRICS_ENABLED:
+        return jsonify({'error': 'Metrics are disabled'}), 404
+    
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/contest/status', methods=['GET'])
 def contest_status():
     """Get contest status"""
@@ -220,6 +246,11 @@ def get_organizer_data():
     data = service.get_leaderboard_data()
     return jsonify(data)
 
+@app.route('/api/organizer/problem-stats', methods=['GET'])
+def get_problem_stats():
+    """CPU usage per problem across all judged submissions"""
+    return jsonify(service.get_problem_stats())
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', debug=False, port=5000)
     
@@ -0,0 +1,180 @@
+"""
+Admission control for executions.
+
+Every phase that starts a process (javac, a JVM, a Python harness) first
+reserves its cost in CPU cores and memory from a shared budget
+(config.ADMISSION_CPU_CORES, config.ADMISSION_MEMORY_MB). Costs come from
+config.ADMISSION_COSTS per (language, phase); run phases add the job's
+memory limit on top. A Python run costs a fraction of a core and of a Java
+compile, so many more of them fit at once.
+
+Requests are granted strictly in arrival order: a large Java compile at the
+head of the line makes smaller jobs behind it wait instead of starving.
+A cost larger than the whole budget is clamped, so it runs alone.
+
+Waiters may be coroutines on any event loop or plain threads; releases
+wake them from whichever thread frees the budget.
+"""
+import asyncio
+import threading
+from collections import deque
+import config
+
+
+class _Waiter:
+    """A pending request, woken by set() from any thread"""
+
+    def __init__(self, cpu, memory):
+        self.cpu = cpu
+        self.memory = memory
+        self.granted = False
+        self.event = None
+        self.loop = None
+        self.future = None
+
+    def set(self):
+        self.granted = True
+        if self.future is not None:
+            self.loop.call_soon_threadsafe(self._resolve)
+        else:
+            self.event.set()
+
+    def _resolve(self):
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class Admission:
+    """Reserved budget; release it (or leave the with block) when the phase ends"""
+
+    def __init__(self, controller, cpu, memory):
+        self.controller = controller
+        self.cpu = cpu
+        self.memory = memory
+
+    def release(self):
+        if self.controller is not None:
+            self.controller._release(self.cpu, self.memory)
+            self.controller = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class AdmissionController:
+    """FIFO admission against CPU-core and memory budgets"""
+
+    def __init__(self, cpu_cores, memory_mb, costs=None):
+        self.cpu_cores = cpu_cores
+        self.memory_mb = memory_mb
+        self.costs = costs if costs is not None else config.ADMISSION_COSTS
+        self.cpu_used = 0.0
+        self.memory_used = 0
+        self.waiters = deque()
+        self.lock = threading.Lock()
+
+    def cost(self, language, phase, memory_limit_mb=0):
+        """
+        Returns: (cpu cores, memory MB) for one phase, clamped to the budget.
+        Unknown phases cost one core plus their memory limit.
+        """
+        cpu, memory = self.costs.get((language.lower(), phase), (1, 0))
+        memory += memory_limit_mb or 0
+        return min(cpu, self.cpu_cores), min(memory, self.memory_mb)
+
+    async def admit(self, language, phase, memory_limit_mb=0):
+        """Wait for budget. Returns: Admission, usable with `async with`"""
+        waiter = self._request(*self.cost(language, phase, memory_limit_mb))
+        if not waiter.granted:
+            try:
+                await waiter.future
+            except asyncio.CancelledError:
+                self._cancel(waiter)
+                raise
+        return Admission(self, waiter.cpu, waiter.memory)
+
+    def admit_blocking(self, language, phase, memory_limit_mb=0):
+        """Blocking variant of admit() for thread-based callers"""
+        waiter = self._request(*self.cost(language, phase, memory_limit_mb), blocking=True)
+        if not waiter.granted:
+            waiter.event.wait()
+        return Admission(self, waiter.cpu, waiter.memory)
+
+    def snapshot(self):
+        """Returns: dict of budget, usage and queue length"""
+        with self.lock:
+            return {
+                'cpu_cores': self.cpu_cores,
+                'cpu_used': self.cpu_used,
+                'memory_mb': self.memory_mb,
+                'memory_used': self.memory_used,
+                'waiting': len(self.waiters)
+            }
+
+    def _request(self, cpu, memory, blocking=False):
+        waiter = _Waiter(cpu, memory)
+        with self.lock:
+            if not self.waiters and self._fits(cpu, memory):
+                self._reserve(cpu, memory)
+                waiter.granted = True
+                return waiter
+            if blocking:
+                waiter.event = threading.Event()
+            else:
+                waiter.loop = asyncio.get_running_loop()
+                waiter.future = waiter.loop.create_future()
+            self.waiters.append(waiter)
+        return waiter
+
+    def _cancel(self, waiter):
+        """A waiter gave up; hand back its budget if it was granted meanwhile"""
+        with self.lock:
+            if not waiter.granted:
+                self.waiters.remove(waiter)
+                self._grant()
+                return
+        self._release(waiter.cpu, waiter.memory)
+
+    def _release(self, cpu, memory):
+        with self.lock:
+            self.cpu_used -= cpu
+            self.memory_used -= memory
+            self._grant()
+
+    def _grant(self):
+        """Admit waiters from the head of the line while they fit (lock held)"""
+        while self.waiters and self._fits(self.waiters[0].cpu, self.waiters[0].memory):
+            waiter = self.waiters.popleft()
+            self._reserve(waiter.cpu, waiter.memory)
+            waiter.set()
+
+    def _fits(self, cpu, memory):
+        return self.cpu_used + cpu <= self.cpu_cores + 1e-9 and self.memory_used + memory <= self.memory_mb
+
+    def _reserve(self, cpu, memory):
+        self.cpu_used += cpu
+        self.memory_used += memory
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller():
+    """Get the shared controller, or None if admission control is disabled"""
+    global _controller
+    if not config.ADMISSION_ENABLED:
+        return None
+    with _controller_lock:
+        if _controller is None:
+            _controller = AdmissionController(config.ADMISSION_CPU_CORES, config.ADMISSION_MEMORY_MB)
+        return _controller
@@ -0,0 +1,144 @@
+"""
+Content-addressed cache of compile results for submissions.
+
+Entries are keyed by sha256(language, harness version, source) and live in
+config.COMPILE_CACHE_DIR (under the RAM-backed scratch directory when there
+is one), one directory per key holding `meta.json` plus the
+compiled artifacts (marshalled Python bytecode or Java .class files). Syntax
+and compile errors are cached too, so a repeat submission skips straight to
+execution or straight to its error.
+
+The cache is bounded by config.COMPILE_CACHE_MAX_MB, counting every file of
+an entry (meta.json included, so error-only entries count too), and evicts the least
+recently used entries (directory mtime is refreshed on every hit). Entries
+are written to a scratch directory and renamed into place, so concurrent
+workers never see half-written entries.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import config
+
+META_FILE = 'meta.json'
+
+
+class CacheEntry:
+    """A cached compile result"""
+
+    def __init__(self, path, error):
+        self.path = path
+        self.error = error
+
+    def read(self, name):
+        with open(os.path.join(self.path, name), 'rb') as f:
+            return f.read()
+
+    def copy_to(self, dest_dir):
+        """Copy the cached artifacts into dest_dir"""
+        for name in os.listdir(self.path):
+            if name != META_FILE:
+                shutil.copy2(os.path.join(self.path, name), os.path.join(dest_dir, name))
+
+
+class CompileCache:
+    """On-disk LRU of compile results"""
+
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self.total_bytes = sum(size for _, _, size in self._scan())
+
+    @staticmethod
+    def key(language, source, harness_version):
+        digest = hashlib.sha256()
+        for part in (language, harness_version, source):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Returns: CacheEntry, or None on a miss"""
+        path = os.path.join(self.root, key)
+        try:
+            with open(os.path.join(path, META_FILE), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            os.utime(path)  # Mark as recently used
+        except (OSError, ValueError):
+            return None
+        return CacheEntry(path, meta.get('error'))
+
+    def put(self, key, error=None, files=None):
+        """Store a compile error or a dict of artifact name -> bytes"""
+        files = files or {}
+        scratch = tempfile.mkdtemp(dir=self.root, prefix='.tmp-')
+        try:
+            for name, data in files.items():
+                with open(os.path.join(scratch, name), 'wb') as f:
+                    f.write(data)
+            with open(os.path.join(scratch, META_FILE), 'w', encoding='utf-8') as f:
+                json.dump({'error': error, 'created_at': time.time()}, f)
+            size = _entry_size(scratch)
+
+            try:
+                os.rename(scratch, os.path.join(self.root, key))
+            except OSError:
+                return  # Another worker stored the same entry first
+        finally:
+            if os.path.exists(scratch):
+                shutil.rmtree(scratch, ignore_errors=True)
+
+        with self.lock:
+            self.total_bytes += size
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def _scan(self):
+        """Returns: list of (mtime, path, size) for every entry on disk"""
+        entries = []
+        for entry in os.scandir(self.root):
+            if not entry.is_dir() or entry.name.startswith('.tmp-'):
+                continue
+            try:
+                size = _entry_size(entry.path)
+                entries.append((entry.stat().st_mtime, entry.path, size))
+            except OSError:
+                continue  # Evicted by another worker meanwhile
+        return entries
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is at 90% of its cap"""
+        entries = sorted(self._scan())
+        total = sum(size for _, _, size in entries)
+        target = self.max_bytes * 0.9
+        for _, path, size in entries:
+            if total <= target:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+        self.total_bytes = total
+
+
+def _entry_size(path):
+    """Returns: total size in bytes of the files in an entry directory"""
+    return sum(f.stat().st_size for f in os.scandir(path))
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_compile_cache():
+    """Get the shared cache, or None if caching is disabled"""
+    global _cache
+    if not config.COMPILE_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = CompileCache(config.COMPILE_CACHE_DIR, config.COMPILE_CACHE_MAX_MB * 1024 * 1024)
+        return _cache
@@ -0,0 +1,429 @@
+"""
+Job queue persisted in a local SQLite database (WAL mode).
+
+Same interface as queue_manager.JobQueue (add_job / get_status), but jobs,
+statuses and results live in config.QUEUE_DB_PATH, so restarting a web
+worker loses nothing and every gunicorn worker can answer for every task.
+Any number of processes may consume the same database: the web workers
+themselves (config.QUEUE_RUN_WORKERS) and/or standalone judges started
+with `python -m backend.durable_queue`.
+
+Each consuming process has a dispatcher thread that leases one job per
+idle worker thread in a single transaction, picking them the way JobQueue
+would (lanes, per-participant turns, FIFO/SJF priority). The dispatcher
+keeps its process's leases alive; leases that stop being renewed (the
+holder crashed or was killed) expire after config.QUEUE_LEASE_SECONDS and
+the job goes back to pending, at most config.QUEUE_MAX_ATTEMPTS times.
+Leases held by dead processes on this host (including an earlier process
+that had the same pid, as in a restarted container) are reclaimed at startup.
+
+Job functions must be module-level, and their arguments and results
+JSON-serializable, since they are stored.
+"""
+import json
+import os
+import queue
+import socket
+import threading
+import time
+import uuid
+import config
+from backend.sqlite_db import Connection, init_db
+from backend import metrics
+from backend.queue_manager import (
+    DurationEstimator, Lane, ThreadRunner, ProcessRunner, job_descriptor, resolve_descriptor, _next_entry
+)
+
+POLL_INTERVAL = 0.2  # seconds between dequeue attempts while the queue is empty
+EXPIRE_INTERVAL = 30  # seconds between sweeps of old results
+POSITION_CACHE_SECONDS = 0.5
+
+# Consumer ids of the queues in this process; a lease under our pid with any other
+# id was left by an earlier process that had the same pid (e.g. a restarted container)
+_local_consumers = set()
+
+# Stored state -> status reported by get_status ('alias' rows point at another job)
+STATUS_NAMES = {'pending': 'pending', 'leased': 'processing', 'completed': 'completed', 'failed': 'failed'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    owner TEXT,
+    state TEXT NOT NULL,
+    alias_of TEXT,
+    priority REAL NOT NULL DEFAULT 0,
+    target TEXT,
+    args TEXT,
+    kwargs TEXT,
+    profile TEXT,
+    dedupe_key TEXT,
+    supersede_key TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    submitted_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, lease_expires);
+CREATE INDEX IF NOT EXISTS jobs_owner ON jobs (owner, type, state);
+CREATE INDEX IF NOT EXISTS jobs_alias ON jobs (alias_of);
+CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished_at);
+"""
+
+
+def _key(value):
+    """Stored form of an owner, dedupe or supersede key (None stays None)"""
+    return None if value is None else json.dumps(value)
+
+
+class DurableJobQueue:
+    def __init__(self, max_concurrent=2, path=None, scheduling=None, aging=None, lane_weights=None,
+                 result_ttl=None, max_results=None, backend=None, lease_seconds=None):
+        self.path = path or config.QUEUE_DB_PATH
+        self.scheduling = scheduling or config.QUEUE_SCHEDULING
+        self.aging = config.QUEUE_AGING if aging is None else aging
+        self.lane_weights = config.QUEUE_LANE_WEIGHTS if lane_weights is None else lane_weights
+        self.result_ttl = config.QUEUE_RESULT_TTL if result_ttl is None else result_ttl
+        self.max_results = config.QUEUE_RESULT_MAX if max_results is None else max_results
+        self.lease_seconds = config.QUEUE_LEASE_SECONDS if lease_seconds is None else lease_seconds
+        self.max_attempts = config.QUEUE_MAX_ATTEMPTS
+        self.estimator = DurationEstimator()
+        self.max_concurrent = max_concurrent
+        # host:pid for the liveness check, plus a token unique to this instance
+        self.consumer = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:12]}'
+        self.credits = {}  # task type -> lane credit, carried between dequeues
+        self.positions = (0.0, {})  # (computed at, task_id -> position)
+        self.wakeup = threading.Event()
+        init_db(self.path, SCHEMA)
+
+        if not max_concurrent:
+            return  # Enqueue only; another process drains the queue
+
+        backend = backend or config.QUEUE_BACKEND
+        self.runner = ProcessRunner(max_concurrent, config.QUEUE_PROCESS_MAX_JOBS) if backend == 'process' \
+            else ThreadRunner()
+        self.ready = queue.Queue()
+        self.free = max_concurrent
+        self.slots = threading.Condition()
+        _local_consumers.add(self.consumer)
+        self._reclaim_dead_leases()
+
+        self.workers = []
+        for _ in range(max_concurrent):
+            t = threading.Thread(target=self._worker_loop, daemon=True)
+            t.start()
+            self.workers.append(t)
+        self.dispatcher = threading.Thread(target=self._dispatch_loop, daemon=True)
+        self.dispatcher.start()
+
+    def add_job(self, task_type, func, *args, owner=None, profile=None, dedupe_key=None, supersede_key=None,
+                **kwargs):
+        """Add a job to the queue (see JobQueue.add_job)"""
+        target = json.dumps(job_descriptor(func))
+        task_id = str(uuid.uuid4())
+        now = time.time()
+        owner_key = _key(owner)
+        priority = 0
+        if self.scheduling == 'sjf':
+            priority = self.estimator.estimate(task_type, profile) + self.aging * now
+
+        with self._transaction() as db:
+            if owner is not None and dedupe_key is not None:
+                row = db.execute(
+                    "SELECT id FROM jobs WHERE owner = ? AND type = ? AND state IN ('pending', 'leased') "
+                    "AND dedupe_key = ? LIMIT 1",
+                    (owner_key, task_type, _key(dedupe_key))
+                ).fetchone()
+                if row is not None:
+                    db.execute(
+                        "INSERT INTO jobs (id, type, owner, state, alias_of, submitted_at) "
+                        "VALUES (?, ?, ?, 'alias', ?, ?)",
+                        (task_id, task_type, owner_key, row[0], now)
+                    )
+                    metrics.JOBS.inc(task_type, 'coalesced')
+                    return task_id
+
+            db.execute(
+                "INSERT INTO jobs (id, type, owner, state, priority, target, args, kwargs, profile, dedupe_key, "
+                "supersede_key, submitted_at) VALUES (?, ?, ?, 'pending', ?, ?, ?, ?, ?, ?, ?, ?)",
+                (task_id, task_type, owner_key, priority, target, json.dumps(args), json.dumps(kwargs),
+                 json.dumps(profile), _key(dedupe_key), _key(supersede_key), now)
+            )
+            if owner is not None and supersede_key is not None:
+                # Older runs that have not started report this job's result instead
+                older = [row[0] for row in db.execute(
+                    "SELECT id FROM jobs WHERE owner = ? AND type = ? AND state = 'pending' "
+                    "AND supersede_key = ? AND id != ?",
+                    (owner_key, task_type, _key(supersede_key), task_id)
+                )]
+                for older_id in older:
+                    db.execute("UPDATE jobs SET state = 'alias', alias_of = ? WHERE id = ?", (task_id, older_id))
+                    db.execute("UPDATE jobs SET alias_of = ? WHERE alias_of = ?", (task_id, older_id))
+                    metrics.JOBS.inc(task_type, 'superseded')
+
+        self.wakeup.set()
+        return task_id
+
+    def get_status(self, task_id):
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT id, state, alias_of, submitted_at, finished_at, result, error FROM jobs WHERE id = ?",
+                (task_id,)
+            ).fetchone()
+            if row is not None and row[1] == 'alias':
+                row = db.execute(
+                    "SELECT id, state, alias_of, submitted_at, finished_at, result, error FROM jobs WHERE id = ?",
+                    (row[2],)
+                ).fetchone()
+        if row is None:
+            return None
+
+        job_id, state, _, submitted_at, finished_at, result, error = row
+        status = {'task_id': job_id, 'status': STATUS_NAMES[state], 'submitted_at': submitted_at}
+        if state == 'completed':
+            status['result'] = json.loads(result)
+        elif state == 'failed':
+            status['error'] = error
+        if finished_at is not None:
+            status['finished_at'] = finished_at
+        if state == 'pending':
+            status['position'] = self._position(job_id)
+        return status
+
+    def depth(self):
+        """Returns: {(task type, 'pending' or 'processing'): number of jobs} across all consumers"""
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT type, state, COUNT(*) FROM jobs WHERE state IN ('pending', 'leased') GROUP BY type, state"
+            ).fetchall()
+        return {(task_type, STATUS_NAMES[state]): count for task_type, state, count in rows}
+
+    def wait_for_change(self, version=None, timeout=None):
+        """
+        Same interface as JobQueue.wait_for_change, but jobs may finish in
+        other processes, so this just waits out the timeout; callers re-read
+        the status afterwards. Returns: 0
+        """
+        if version is not None:
+            time.sleep(POLL_INTERVAL if timeout is None else timeout)
+        return 0
+
+    def _position(self, task_id):
+        """1-based position among pending jobs, replaying the scheduler (cached briefly)"""
+        computed_at, order = self.positions
+        if time.time() - computed_at > POSITION_CACHE_SECONDS or task_id not in order:
+            with self._connect() as db:
+                rows = db.execute("SELECT id, type, owner, priority, rowid FROM jobs WHERE state = 'pending'").fetchall()
+            chosen = self._schedule(rows, len(rows), dict(self.credits))
+            order = {job_id: position for position, job_id in enumerate(chosen, 1)}
+            self.positions = (time.time(), order)
+        return order.get(task_id)
+
+    def _schedule(self, rows, limit, credits):
+        """
+        Pick up to `limit` of the pending rows in the order JobQueue would
+        run them. Lane credits are read from and written back to `credits`.
+        Returns: list of job ids
+        """
+        lanes = {}
+        for job_id, task_type, owner, priority, sequence in rows:
+            lane = lanes.get(task_type)
+            if lane is None:
+                lane = lanes[task_type] = Lane(max(1, self.lane_weights.get(task_type, 1)))
+                lane.current = credits.get(task_type, 0)
+            lane.push(owner, (priority, sequence, {'id': job_id}))
+
+        chosen = []
+        while len(chosen) < min(limit, len(rows)):
+            _, _, job = _next_entry(lanes)
+            chosen.append(job['id'])
+        for task_type, lane in lanes.items():
+            credits[task_type] = lane.current
+        return chosen
+
+    def _lease(self, limit):
+        """Lease up to `limit` jobs in one transaction. Returns: list of job dicts"""
+        now = time.time()
+        with self._transaction() as db:
+            # Leases nobody renewed: retry the job, or give up on it
+            db.execute(
+                "UPDATE jobs SET state = 'failed', error = ?, finished_at = ?, lease_owner = NULL "
+                "WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                ('Judge worker stopped while running the job', now, now, self.max_attempts)
+            )
+            db.execute(
+                "UPDATE jobs SET state = 'pending', lease_owner = NULL WHERE state = 'leased' AND lease_expires < ?",
+                (now,)
+            )
+            rows = db.execute("SELECT id, type, owner, priority, rowid FROM jobs WHERE state = 'pending'").fetchall()
+            if not rows:
+                return []
+
+            chosen = self._schedule(rows, limit, self.credits)
+            jobs = []
+            for job_id in chosen:
+                db.execute(
+                    "UPDATE jobs SET state = 'leased', lease_owner = ?, lease_expires = ?, attempts = attempts + 1 "
+                    "WHERE id = ?",
+                    (self.consumer, now + self.lease_seconds, job_id)
+                )
+                job_type, target, args, kwargs, profile, submitted_at = db.execute(
+                    "SELECT type, target, args, kwargs, profile, submitted_at FROM jobs WHERE id = ?", (job_id,)
+                ).fetchone()
+                jobs.append({
+                    'id': job_id,
+                    'type': job_type,
+                    'target': json.loads(target),
+                    'args': json.loads(args),
+                    'kwargs': json.loads(kwargs),
+                    'profile': json.loads(profile),
+                    'submitted_at': submitted_at
+                })
+            return jobs
+
+    def _renew_leases(self):
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE state = 'leased' AND lease_owner = ?",
+                (time.time() + self.lease_seconds, self.consumer)
+            )
+
+    def _reclaim_dead_leases(self):
+        """Jobs leased by consumers on this host that no longer exist go straight back to pending"""
+        host = socket.gethostname()
+        with self._transaction() as db:
+            owners = [row[0] for row in db.execute(
+                "SELECT DISTINCT lease_owner FROM jobs WHERE state = 'leased' AND lease_owner LIKE ?", (f'{host}:%',)
+            )]
+            for lease_owner in owners:
+                pid = int(lease_owner[len(host) + 1:].split(':')[0])
+                if pid == os.getpid():
+                    dead = lease_owner not in _local_consumers
+                else:
+                    dead = not _pid_alive(pid)
+                if dead:
+                    db.execute(
+                        "UPDATE jobs SET state = 'pending', lease_owner = NULL WHERE state = 'leased' AND lease_owner = ?",
+                        (lease_owner,)
+                    )
+
+    def _expire_results(self):
+        """Drop results older than the TTL, then the oldest ones past the cap"""
+        with self._transaction() as db:
+            db.execute(
+                "DELETE FROM jobs WHERE state IN ('completed', 'failed') AND finished_at < ?",
+                (time.time() - self.result_ttl,)
+            )
+            (finished,) = db.execute("SELECT COUNT(*) FROM jobs WHERE state IN ('completed', 'failed')").fetchone()
+            if finished > self.max_results:
+                db.execute(
+                    "DELETE FROM jobs WHERE id IN (SELECT id FROM jobs WHERE state IN ('completed', 'failed') "
+                    "ORDER BY finished_at LIMIT ?)",
+                    (finished - self.max_results,)
+                )
+            db.execute("DELETE FROM jobs WHERE state = 'alias' AND alias_of NOT IN (SELECT id FROM jobs)")
+
+    def _dispatch_loop(self):
+        last_renewal = last_expiry = 0
+        while True:
+            try:
+                with self.slots:
+                    if not self.free:
+                        self.slots.wait(self.lease_seconds / 3)
+                    wanted = self.free
+
+                now = time.time()
+                if now - last_renewal > self.lease_seconds / 3:
+                    self._renew_leases()
+                    last_renewal = now
+                if now - last_expiry > EXPIRE_INTERVAL:
+                    self._expire_results()
+                    last_expiry = now
+
+                jobs = self._lease(wanted) if wanted else []
+                if not jobs:
+                    self.wakeup.wait(POLL_INTERVAL)
+                    self.wakeup.clear()
+                    continue
+                with self.slots:
+                    self.free -= len(jobs)
+                for job in jobs:
+                    self.ready.put(job)
+            except Exception as e:
+                print(f"Queue dispatcher error: {e}", flush=True)
+                time.sleep(1)
+
+    def _worker_loop(self):
+        while True:
+            job = self.ready.get()
+            try:
+                self._run(job)
+            except Exception as e:
+                print(f"Worker Error: {e}", flush=True)
+            finally:
+                with self.slots:
+                    self.free += 1
+                    self.slots.notify()
+                self.wakeup.set()
+
+    def _run(self, job):
+        started = time.time()
+        with self._transaction() as db:
+            claimed = db.execute(
+                "UPDATE jobs SET started_at = ?, lease_expires = ? WHERE id = ? AND state = 'leased' AND lease_owner = ?",
+                (started, started + self.lease_seconds, job['id'], self.consumer)
+            ).rowcount
+        if not claimed:
+            return  # The lease expired meanwhile and the job went to someone else
+
+        state, result, error = 'completed', None, None
+        try:
+            func = resolve_descriptor(job['target'])
+            result = json.dumps(self.runner.run(self.runner.prepare(func), job['args'], job['kwargs']))
+        except Exception as e:
+            state, error = 'failed', str(e)
+        finished = time.time()
+        self.estimator.record(job['type'], job['profile'], finished - started)
+        metrics.observe_job(job['type'], job['profile'], job['submitted_at'], started, finished, state)
+
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE jobs SET state = ?, result = ?, error = ?, finished_at = ?, lease_owner = NULL "
+                "WHERE id = ? AND state = 'leased' AND lease_owner = ?",
+                (state, result, error, finished, job['id'], self.consumer)
+            )
+
+    def _connect(self):
+        return Connection(self.path)
+
+    def _transaction(self):
+        """Connection with a write transaction, committed on success"""
+        return Connection(self.path, write=True)
+
+
+def _pid_alive(pid):
+    if os.name == 'nt':
+        return True  # os.kill would terminate it; wait for the lease to expire instead
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+def main():
+    """Standalone judge: drain the shared queue with QUEUE_WORKERS workers"""
+    job_queue = DurableJobQueue(max_concurrent=config.QUEUE_WORKERS)
+    print(f"Judge {job_queue.consumer} draining {job_queue.path} with {config.QUEUE_WORKERS} workers", flush=True)
+    while True:
+        time.sleep(3600)
+
+
+if __name__ == '__main__':
+    main()
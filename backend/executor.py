@@ -1,342 +1,914 @@
-import subprocess
+import asyncio
 import os
-import tempfile
 import json
 import config
 import time
+import sys
+import marshal
+import hashlib
+import struct
+from backend import harness
+from backend import zygote
+from backend import java_pool
+from backend.toolchain import get_java_toolchain, ToolchainError
+from backend.compile_cache import get_compile_cache
+from backend.workspace import get_workspace_pool
+from backend.admission import Admission, get_admission_controller
+from backend import metrics
+
+HARNESS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'harness.py')
+
+# Stream read limit for harness stdout when output is unlimited
+UNBOUNDED_READ_LIMIT = 2 ** 31
+
+# Bytecode is only valid for the interpreter that produced it
+PYTHON_CACHE_VERSION = f'{sys.version}-{marshal.version}'
+
+# Java harness: runs every test case in one JVM and prints one JSON record per test.
+# Test inputs are read from stdin in the binary format written by JavaExecutor._encode_inputs,
+# so the harness source (and compile time) does not depend on the tests.
+# Arguments: CPU seconds, heap bytes and output bytes allowed per test (0 = unlimited).
+JAVA_HARNESS = r'''class Main {
+    // Longest serialized return value (harness.MAX_RESULT_CHARS); it is not counted as output
+    static final int MAX_RESULT_CHARS = 8 * 1024 * 1024;
+    static PrintStream out;
+
+    public static void main(String[] args) throws IOException {
+        out = System.out;
+        PrintStream err = System.err;
+        double cpuLimit = args.length > 0 ? Double.parseDouble(args[0]) : 0;
+        long memoryLimit = args.length > 1 ? Long.parseLong(args[1]) : 0;
+        long outputLimit = args.length > 2 ? Long.parseLong(args[2]) : 0;
+        java.lang.management.ThreadMXBean threads = java.lang.management.ManagementFactory.getThreadMXBean();
+        boolean threadCpu = threads.isCurrentThreadCpuTimeSupported();
+        List<java.lang.management.MemoryPoolMXBean> heapPools = new ArrayList<java.lang.management.MemoryPoolMXBean>();
+        for (java.lang.management.MemoryPoolMXBean pool : java.lang.management.ManagementFactory.getMemoryPoolMXBeans()) {
+            if (pool.getType() == java.lang.management.MemoryType.HEAP) {
+                heapPools.add(pool);
+            }
+        }
+        Object[][] tests = readTests(new DataInputStream(new BufferedInputStream(System.in, 1 << 16)));
+
+        // Find method using reflection
+        Method method = null;
+        for (Method m : Solution.class.getDeclaredMethods()) {
+            if (m.getName().equals("solution")) {
+                method = m;
+                break;
+            }
+        }
+
+        if (method == null) {
+            report(false, "", "Method 'solution' not found", 0, 0, 0);
+            return;
+        }
+        method.setAccessible(true);
+
+        for (int t = 0; t < tests.length; t++) {
+            Object[] methodArgs = tests[t];
+            CappedOutput buffer = new CappedOutput(outputLimit);
+            PrintStream capture = new PrintStream(buffer, true);
+            System.setOut(capture);
+            System.setErr(capture);
+
+            boolean ok = true;
+            String error = "";
+            String resultText = "";
+            long heapBefore = 0;
+            for (java.lang.management.MemoryPoolMXBean pool : heapPools) {
+                pool.resetPeakUsage();
+                heapBefore += pool.getUsage().getUsed();
+            }
+            long cpuStart = threadCpu ? threads.getCurrentThreadCpuTime() : System.nanoTime();
+            long start = System.nanoTime();
+            try {
+                Solution sol = new Solution();
+                Object result = method.invoke(sol, methodArgs);
+
+                // Handle void return type (assume in-place modification of first arg)
+                if (method.getReturnType().equals(Void.TYPE)) {
+                    resultText = formatResult(methodArgs.length > 0 ? methodArgs[0] : null);
+                } else {
+                    resultText = formatResult(result);
+                }
+                if (resultText.length() > MAX_RESULT_CHARS) {
+                    throw new OutputLimitError();
+                }
+            } catch (IllegalArgumentException e) {
+                ok = false;
+                error = "Runtime Error: Argument Mismatch. Check input types.\n" + stackTrace(e);
+            } catch (InvocationTargetException e) {
+                ok = false;
+                if (e.getCause() instanceof OutOfMemoryError) {
+                    error = "Memory Limit Exceeded";
+                } else if (e.getCause() instanceof OutputLimitError) {
+                    error = "Output Limit Exceeded";
+                } else {
+                    error = "Runtime Error: " + e.getCause() + "\n" + stackTrace(e.getCause());
+                }
+            } catch (OutOfMemoryError e) {
+                ok = false;
+                error = "Memory Limit Exceeded";
+            } catch (OutputLimitError e) {
+                ok = false;
+                error = "Output Limit Exceeded";
+            } catch (Throwable e) {
+                ok = false;
+                error = "Runtime Error: " + e.getMessage() + "\n" + stackTrace(e);
+            } finally {
+                System.setOut(out);
+                System.setErr(err);
+            }
+            double elapsed = (System.nanoTime() - start) / 1e9;
+            double cpuTime = ((threadCpu ? threads.getCurrentThreadCpuTime() : System.nanoTime()) - cpuStart) / 1e9;
+            long peakHeap = 0;
+            for (java.lang.management.MemoryPoolMXBean pool : heapPools) {
+                peakHeap += pool.getPeakUsage().getUsed();
+            }
+            long memory = Math.max(0, peakHeap - heapBefore);
+
+            if (ok && cpuLimit > 0 && cpuTime > cpuLimit) {
+                ok = false;
+                error = "Time Limit Exceeded";
+            } else if (ok && memoryLimit > 0 && memory > memoryLimit) {
+                ok = false;
+                error = "Memory Limit Exceeded";
+            }
+            if (buffer.exceeded) {
+                ok = false;
+                error = "Output Limit Exceeded";
+            }
+            error = error.trim();
+            if (error.length() > 4096) {
+                error = error.substring(0, 4096);
+            }
+
+            report(ok, ok ? (buffer.toString() + resultText).trim() : "", error, elapsed, cpuTime, memory);
+            if (!ok) {
+                return;
+            }
+        }
+    }
+
+    static void report(boolean ok, String output, String error, double elapsed, double cpuTime, long memory) {
+        out.println("{\"success\": " + ok + ", \"output\": " + quote(output)
+            + ", \"error\": " + quote(error) + ", \"time\": " + elapsed
+            + ", \"cpu_time\": " + cpuTime + ", \"memory\": " + memory + "}");
+        out.flush();
+    }
+
+    static String quote(String s) {
+        StringBuilder sb = new StringBuilder("\"");
+        for (int i = 0; i < s.length(); i++) {
+            char c = s.charAt(i);
+            if (c == '"') sb.append("\\\"");
+            else if (c == '\\') sb.append("\\\\");
+            else if (c == '\n') sb.append("\\n");
+            else if (c < 0x20 || c > 0x7e) sb.append(String.format("\\u%04x", (int) c));
+            else sb.append(c);
+        }
+        return sb.append('"').toString();
+    }
+
+    static String stackTrace(Throwable e) {
+        StringWriter sw = new StringWriter();
+        e.printStackTrace(new PrintWriter(sw));
+        return sw.toString();
+    }
+
+    // Captured stdout/stderr of one test; the first write past the limit throws
+    static class CappedOutput extends ByteArrayOutputStream {
+        final long limit;
+        boolean exceeded;
+
+        CappedOutput(long limit) {
+            this.limit = limit;
+        }
+
+        @Override
+        public synchronized void write(int b) {
+            reserve(1);
+            super.write(b);
+        }
+
+        @Override
+        public synchronized void write(byte[] b, int off, int len) {
+            reserve(len);
+            super.write(b, off, len);
+        }
+
+        void reserve(int len) {
+            if (limit > 0 && count + len > limit) {
+                // Sticky, in case user code swallows the error
+                exceeded = true;
+                throw new OutputLimitError();
+            }
+        }
+    }
+
+    static class OutputLimitError extends Error {
+    }
+
+    static Object[][] readTests(DataInputStream in) throws IOException {
+        Object[][] tests = new Object[in.readInt()][];
+        for (int t = 0; t < tests.length; t++) {
+            tests[t] = new Object[in.readInt()];
+            for (int a = 0; a < tests[t].length; a++) {
+                tests[t][a] = readValue(in);
+            }
+        }
+        return tests;
+    }
+
+    static Object readValue(DataInputStream in) throws IOException {
+        byte tag = in.readByte();
+        switch (tag) {
+            case 'Z': return in.readBoolean();
+            case 'I': return in.readInt();
+            case 'J': return in.readLong();
+            case 'D': return in.readDouble();
+            case 'S': {
+                byte[] bytes = new byte[in.readInt()];
+                in.readFully(bytes);
+                return new String(bytes, "UTF-8");
+            }
+            case 'C': {
+                char[] arr = new char[in.readInt()];
+                for (int i = 0; i < arr.length; i++) arr[i] = in.readChar();
+                return arr;
+            }
+            case 'A': return readInts(in);
+            case 'M': {
+                int[][] grid = new int[in.readInt()][];
+                for (int i = 0; i < grid.length; i++) grid[i] = readInts(in);
+                return grid;
+            }
+            default: throw new IOException("Unknown input type tag: " + tag);
+        }
+    }
+
+    static int[] readInts(DataInputStream in) throws IOException {
+        int[] arr = new int[in.readInt()];
+        byte[] raw = new byte[arr.length * 4];
+        in.readFully(raw);
+        java.nio.ByteBuffer.wrap(raw).asIntBuffer().get(arr);
+        return arr;
+    }
+
+    static String formatResult(Object result) {
+        StringBuilder sb = new StringBuilder();
+        writeValue(sb, result);
+        return sb.toString();
+    }
+
+    static void writeValue(StringBuilder sb, Object result) {
+        if (result == null) {
+            sb.append("null");
+        } else if (result instanceof int[]) {
+            int[] arr = (int[]) result;
+            sb.append('[');
+            for (int i = 0; i < arr.length; i++) {
+                if (i > 0) sb.append(", ");
+                sb.append(arr[i]);
+            }
+            sb.append(']');
+        } else if (result instanceof int[][]) {
+            int[][] grid = (int[][]) result;
+            sb.append('[');
+            for (int i = 0; i < grid.length; i++) {
+                if (i > 0) sb.append(", ");
+                writeValue(sb, grid[i]);
+            }
+            sb.append(']');
+        } else if (result instanceof char[]) {
+            char[] arr = (char[]) result;
+            sb.append('[');
+            for (int i = 0; i < arr.length; i++) {
+                if (i > 0) sb.append(", ");
+                sb.append('"').append(arr[i]).append('"');
+            }
+            sb.append(']');
+        } else if (result instanceof Boolean) {
+            sb.append(((Boolean) result).booleanValue() ? "true" : "false");
+        } else {
+            sb.append(result);
+        }
+    }
+}
+'''
+JAVA_HARNESS_VERSION = hashlib.sha256(JAVA_HARNESS.encode('utf-8')).hexdigest()[:16]
+
+class ExecutionResult(tuple):
+    """
+    (success, output, error, execution_time) - unpacks like the plain tuples
+    executors have always returned - plus the test's CPU time in seconds and
+    peak memory in bytes, which are None when they could not be measured.
+    """
+    
+    def __new__(cls, success, output, error, execution_time, cpu_time=None, memory=None):
+        result = super().__new__(cls, (success, output, error, execution_time))
+        result.cpu_time = cpu_time
+        result.memory = memory
+        return result
+    
+    @classmethod
+    def from_record(cls, record):
+        """Build from a harness result record (see harness.run_case)"""
+        return cls(record['success'], record['output'], record['error'], record['time'],
+                   record.get('cpu_time'), record.get('memory'))
+
 
 class CodeExecutor:
     """Base class for code execution"""
     
-    def __init__(self, timeout=config.EXECUTION_TIMEOUT):
+    def __init__(self, timeout=config.EXECUTION_TIMEOUT, cpu_time_limit=None, memory_limit_mb=None,
+                 output_limit_kb=None):
         self.timeout = timeout
+        self.cpu_time_limit = config.CPU_TIME_LIMIT if cpu_time_limit is None else cpu_time_limit
+        self.memory_limit_mb = config.MEMORY_LIMIT_MB if memory_limit_mb is None else memory_limit_mb
+        self.output_limit_kb = config.OUTPUT_LIMIT_KB if output_limit_kb is None else output_limit_kb
+    
+    @property
+    def limits(self):
+        """Per-test limits handed to the harness"""
+        return {'cpu_time': self.cpu_time_limit, 'memory_mb': self.memory_limit_mb, 'output_kb': self.output_limit_kb}
     
     def execute(self, code, test_input):
-        """Execute code with given input. To be implemented by subclasses."""
+        """
+        Execute code with one input (blocking wrapper around execute_async)
+        Returns: ExecutionResult
+        """
+        return run_sync(self.execute_async(code, test_input))
+    
+    def execute_batch(self, code, test_inputs):
+        """
+        Execute code against several inputs, stopping at the first failure
+        (blocking wrapper around execute_batch_async).
+        Returns: list of ExecutionResult, one per test run
+        """
+        return run_sync(self.execute_batch_async(code, test_inputs))
+    
+    async def execute_async(self, code, test_input):
+        """Returns: ExecutionResult"""
+        return (await self.execute_batch_async(code, [test_input]))[0]
+    
+    async def prepare_async(self, code):
+        """
+        Compile once for several batches of the same submission; the result
+        is passed to execute_batch_async as `prepared`.
+        Returns: (prepared, None), or (None, [ExecutionResult]) when the code cannot run
+        """
+        return None, None
+    
+    async def execute_batch_async(self, code, test_inputs, prepared=None):
+        """
+        Execute code against several inputs, stopping at the first failure
+        (the judge is fail-fast, so later results would never be read).
+        To be implemented by subclasses.
+        Returns: list of ExecutionResult, one per test run
+        """
         raise NotImplementedError
 
 
+def run_sync(coro):
+    """Run an engine coroutine to completion from blocking code"""
+    return asyncio.run(coro)
+
+
+async def admit(language, phase, memory_limit_mb=0):
+    """
+    Wait for CPU and memory budget for one phase (see backend/admission.py).
+    Returns: Admission to release once the phase's process is gone
+    """
+    controller = get_admission_controller()
+    if controller is None:
+        return Admission(None, 0, 0)
+    return await controller.admit(language, phase, memory_limit_mb)
+
+
+async def start_process(args, cwd, max_record=None, capture_stderr=False):
+    """
+    Launch a harness process with piped stdin and stdout. Record lines
+    longer than `max_record` make readline() fail (see collect_records).
+    stderr is discarded unless `capture_stderr` (then it must be read).
+    """
+    return await asyncio.create_subprocess_exec(
+        *args,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE if capture_stderr else asyncio.subprocess.DEVNULL,
+        cwd=cwd,
+        limit=max_record or UNBOUNDED_READ_LIMIT
+    )
+
+
+def kill_process(process):
+    if process.returncode is None:
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+
+
+async def reap_process(process):
+    """Kill the process if it is still running and wait for it"""
+    kill_process(process)
+    await process.wait()
+
+
+async def collect_records(process, count, timeout):
+    """
+    Read one JSON result record per test case from a harness process.
+    Each test gets its own deadline; the process is killed on timeout, or
+    when a line grows past the process's read limit (Output Limit Exceeded).
+    Returns: list of ExecutionResult, stopping at the first failure
+    """
+    results = []
+    while len(results) < count:
+        started = time.time()
+        deadline = started + timeout
+        record = None
+        while record is None:
+            try:
+                line = await asyncio.wait_for(process.stdout.readline(), max(0, deadline - time.time()))
+            except asyncio.TimeoutError:
+                kill_process(process)
+                record = harness.failure_record(harness.TIME_LIMIT_EXCEEDED, time.time() - started)
+                break
+            except ValueError:
+                kill_process(process)
+                record = harness.failure_record(harness.OUTPUT_LIMIT_EXCEEDED, time.time() - started)
+                break
+            
+            if not line:
+                record = harness.failure_record('Process exited without producing a result', time.time() - started)
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Stray output written straight to the fd
+        
+        results.append(ExecutionResult.from_record(record))
+        if not record['success']:
+            break
+    
+    return results
+
+
+async def feed_stdin(stream, chunks):
+    """
+    Write a harness's input while its records are read, so a test can start
+    before the later inputs are written. The harness stops reading at its
+    first failure, so a broken pipe is expected.
+    """
+    try:
+        for chunk in chunks:
+            stream.write(chunk)
+            await stream.drain()
+    except OSError:
+        pass
+    finally:
+        stream.close()
+
+
+async def read_bounded(stream, limit):
+    """
+    Read a pipe to EOF, keeping only its first `limit` bytes, so the child
+    never blocks on a full pipe and cannot grow our memory.
+    """
+    chunks = []
+    kept = 0
+    while True:
+        chunk = await stream.read(65536)
+        if not chunk:
+            break
+        if kept < limit:
+            chunks.append(chunk[:limit - kept])
+            kept += len(chunks[-1])
+    return b''.join(chunks)
+
+
 class PythonExecutor(CodeExecutor):
     """Execute Python code"""
     
-    def execute(self, code, test_input):
+    def __init__(self, timeout=config.EXECUTION_TIMEOUT, cpu_time_limit=None, memory_limit_mb=None,
+                 output_limit_kb=None, use_zygote=None):
+        super().__init__(timeout, cpu_time_limit, memory_limit_mb, output_limit_kb)
+        self.use_zygote = config.PYTHON_USE_ZYGOTE if use_zygote is None else use_zygote
+    
+    async def prepare_async(self, code):
+        """Returns: (bytecode, None), or (None, [ExecutionResult]) for a syntax error"""
+        syntax_error, bytecode = self._compile(code)
+        if syntax_error:
+            return None, [ExecutionResult(False, '', syntax_error, 0.0)]
+        return bytecode, None
+    
+    async def execute_batch_async(self, code, test_inputs, prepared=None):
         """
-        Execute Python code with test input
-        Returns: (success, output, error, execution_time)
+        Load the solution once and run every input in a single process,
+        each test with its own time limit. Stops at the first failure.
+        `prepared` is the bytecode from prepare_async, if already compiled.
+        Returns: list of ExecutionResult, one per test run
         """
-        start_time = time.time()
-        temp_file = None
+        if not test_inputs:
+            return []
         
-        try:
-            # Check syntax first for clean error messages
-            import ast
-            try:
-                ast.parse(code)
-            except SyntaxError as e:
-                return False, '', f"Syntax Error: {e.msg} (Line {e.lineno})", 0.0
-
-            # Create temporary file
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False, encoding='utf-8') as f:
-                temp_file = f.name
-                
-                # Write user code and test invocation
-                f.write(code + '\n\n')
-                f.write('# Test execution\n')
-                f.write('import json\n')
-                f.write('import sys\n')
-                f.write(f'test_input = {json.dumps(test_input)}\n')
-                f.write('try:\n')
-                f.write('    result = solution(**test_input)\n')
-                f.write('    print(json.dumps(result), file=sys.stdout)\n')  # Only print result
-                f.write('except Exception as e:\n')
-                f.write('    print(str(e), file=sys.stderr)\n')
-                f.write('    sys.exit(1)\n')
-            
-            # Execute Python code
-            result = subprocess.run(
-                ['python', temp_file],
-                capture_output=True,
-                text=True,
-                timeout=self.timeout,
-                cwd=config.TEMP_DIR
-            )
-            
-            execution_time = time.time() - start_time
-            
-            # Clean up
-            if temp_file and os.path.exists(temp_file):
-                os.unlink(temp_file)
+        bytecode = prepared
+        if bytecode is None:
+            bytecode, failure = await self.prepare_async(code)
+            if failure is not None:
+                return failure
+        
+        async with await admit('python', 'run', self.limits['memory_mb']):
+            # Prefer the pre-forked zygote, fall back to a fresh interpreter.
+            # Starting it can wait on a lock and poll for up to seconds, so not on the event loop.
+            if self.use_zygote:
+                server = await asyncio.get_running_loop().run_in_executor(None, zygote.get_zygote)
+                if server is not None:
+                    try:
+                        records = await server.run_batch_async(code, test_inputs, self.timeout, cwd=config.TEMP_DIR,
+                                                               bytecode=bytecode, limits=self.limits)
+                        return [ExecutionResult.from_record(record) for record in records]
+                    except zygote.ZygoteError as e:
+                        print(f"Zygote execution failed, falling back to subprocess: {e}", flush=True)
             
-            if result.returncode == 0:
-                return True, result.stdout.strip(), '', execution_time
+            return await self._execute_batch_subprocess(code, test_inputs)
+    
+    def _compile(self, code):
+        """
+        Check syntax first for clean error messages, and compile to bytecode
+        for the zygote. Repeat submissions are served from the compile cache.
+        Returns: (syntax_error, bytecode) - one of them is None
+        """
+        cache = get_compile_cache()
+        key = None
+        if cache is not None:
+            key = cache.key('python', code, PYTHON_CACHE_VERSION)
+            entry = cache.get(key)
+            if entry is not None:
+                try:
+                    return entry.error, None if entry.error else entry.read('code.pyc')
+                except OSError:
+                    pass  # Evicted meanwhile, compile again
+        
+        compile_start = time.time()
+        try:
+            bytecode = marshal.dumps(compile(code, '<solution>', 'exec'))
+        except (SyntaxError, ValueError) as e:
+            if isinstance(e, SyntaxError):
+                error = f"Syntax Error: {e.msg} (Line {e.lineno})"
             else:
-                return False, '', result.stderr.strip(), execution_time
-                
-        except subprocess.TimeoutExpired:
-            execution_time = time.time() - start_time
-            if temp_file and os.path.exists(temp_file):
-                os.unlink(temp_file)
-            return False, '', 'Time Limit Exceeded', execution_time
+                error = f"Syntax Error: {e}"
+            if cache is not None:
+                cache.put(key, error=error)
+            return error, None
+        finally:
+            metrics.COMPILE.observe(time.time() - compile_start, 'python')
+        
+        if cache is not None:
+            cache.put(key, files={'code.pyc': bytecode})
+        return None, bytecode
+    
+    async def _execute_batch_subprocess(self, code, test_inputs):
+        """
+        Run all test cases through backend/harness.py in one `python` process.
+        Source and inputs are streamed over stdin as length-prefixed frames
+        (see harness.read_frame), so nothing touches the disk.
+        """
+        process = None
+        feeder = None
+        
+        try:
+            process = await start_process(['python', HARNESS_PATH], config.TEMP_DIR,
+                                          harness.record_size_limit(self.limits))
+            frames = [{'code': code, 'count': len(test_inputs), 'limits': self.limits}] + list(test_inputs)
+            feeder = asyncio.ensure_future(feed_stdin(process.stdin, (harness.encode_frame(f) for f in frames)))
             
+            return await collect_records(process, len(test_inputs), self.timeout)
+        
         except Exception as e:
-            execution_time = time.time() - start_time
-            if temp_file and os.path.exists(temp_file):
-                os.unlink(temp_file)
-            return False, '', str(e), execution_time
+            return [ExecutionResult(False, '', str(e), 0.0)]
+        
+        finally:
+            if feeder is not None:
+                feeder.cancel()
+            if process is not None:
+                await reap_process(process)
 
 
 class JavaExecutor(CodeExecutor):
     """Execute Java code"""
     
-    def execute(self, code, test_input):
+    async def prepare_async(self, code):
         """
-        Execute Java code with test input
-        Returns: (success, output, error, execution_time)
+        Compile once in a scratch workspace, for a judge running slices of the tests in parallel.
+        Returns: (.class files as name -> bytes, None), or (None, [ExecutionResult]) when compiling failed
         """
         start_time = time.time()
-        temp_dir = None
+        workspace = None
+        admissions = []
+        try:
+            workspace = get_workspace_pool().acquire()
+            _, failure = await self._compile_into(workspace.path, code, start_time, admissions)
+            if failure is not None:
+                return None, failure
+            return self._read_classes(workspace.path), None
+        
+        except asyncio.TimeoutError:
+            return None, [ExecutionResult(False, '', 'Time Limit Exceeded', time.time() - start_time)]
+        
+        except Exception as e:
+            return None, [ExecutionResult(False, '', str(e), time.time() - start_time)]
+        
+        finally:
+            for admission in admissions:
+                admission.release()
+            if workspace is not None:
+                workspace.release()
+    
+    async def execute_batch_async(self, code, test_inputs, prepared=None):
+        """
+        Compile once (unless `prepared` holds the .class files from prepare_async)
+        and run every input in a single JVM, each test with its own time limit.
+        Stops at the first failure.
+        Returns: list of ExecutionResult, one per test run
+        """
+        if not test_inputs:
+            return []
+        
+        start_time = time.time()
+        workspace = None
+        process = None
+        tasks = []
+        admissions = []
         
         try:
-            # Check if javac is available
-            javac_cmd = 'javac'
-            try:
-                subprocess.run(
-                    [javac_cmd, '-version'],
-                    capture_output=True,
-                    text=True,
-                    timeout=5
-                )
-            except FileNotFoundError as e:
-                # Try specific detected paths (Windows & Linux)
-                potential_paths = [
-                    r"C:\Program Files\Java\jdk-1.8\bin\javac.exe",
-                    "/usr/bin/javac",
-                    "/usr/lib/jvm/java-17-openjdk-amd64/bin/javac",
-                    "/usr/lib/jvm/default-java/bin/javac"
-                ]
-                
-                found = False
-                for path in potential_paths:
-                    if os.path.exists(path):
-                        javac_cmd = path
-                        found = True
-                        break
-                
-                if not found:
-                    execution_time = time.time() - start_time
-                    error_msg = (
-                        f"Java execution failed: javac not found in PATH or standard locations.\n"
-                        f"System Error: {str(e)}\n"
-                        "Please contact the organizer."
-                    )
-                    return False, '', error_msg, execution_time
-            
-            # Create temporary directory for Java files
-            temp_dir = tempfile.mkdtemp(dir=config.TEMP_DIR)
-            java_file = os.path.join(temp_dir, 'Solution.java')
-            
-            # Generate test harness based on input parameters
-            test_harness = self._generate_test_harness(test_input)
-            
-            # Write complete Java program with proper newlines
-            with open(java_file, 'w', encoding='utf-8') as f:
-                f.write('import java.util.*;\n')
-                f.write('import java.lang.reflect.*;\n\n')
-                f.write(code + '\n\n')
-                f.write(test_harness)
-            
-            # Compile Java code (Limit compiler memory to 128m)
-            # Debug logging
-            print(f"Compiling with: {javac_cmd}", flush=True)
+            # Lease an empty scratch directory for Java files (tmpfs when available)
+            workspace = get_workspace_pool().acquire()
+            temp_dir = workspace.path
             
-            compile_result = subprocess.run(
-                [javac_cmd, '-J-Xmx128m', 'Solution.java'],
-                capture_output=True,
-                text=True,
-                timeout=self.timeout,
-                cwd=temp_dir
-            )
-            
-            if compile_result.returncode != 0:
-                execution_time = time.time() - start_time
-                print(f"Compilation Failed: {compile_result.stderr}", flush=True)
-                self._cleanup(temp_dir)
-                return False, '', f'Compilation Error:\n{compile_result.stderr}', execution_time
+            if prepared is None:
+                toolchain, failure = await self._compile_into(temp_dir, code, start_time, admissions)
+                if failure is not None:
+                    return failure
+            else:
+                toolchain = await asyncio.get_running_loop().run_in_executor(None, get_java_toolchain)
+                for name, data in prepared.items():
+                    with open(os.path.join(temp_dir, name), 'wb') as f:
+                        f.write(data)
             
-            # Derive java_cmd from javac_cmd if possible, otherwise use PATH
-            java_cmd = 'java'
-            if os.path.isabs(javac_cmd):
-                bin_dir = os.path.dirname(javac_cmd)
-                potential_java = os.path.join(bin_dir, 'java.exe' if os.name == 'nt' else 'java')
-                if os.path.exists(potential_java):
-                    java_cmd = potential_java
+            inputs = self._encode_inputs(test_inputs)
+            print(f"Running with: {toolchain.java}", flush=True)
             
-            print(f"Running with: {java_cmd}", flush=True)
-
-            # Execute Java code (Limit runtime memory to 64m)
-            run_result = subprocess.run(
-                [java_cmd, '-Xmx64m', 'Main'],
-                capture_output=True,
-                text=True,
-                timeout=self.timeout,
-                cwd=temp_dir
+            # Execute all tests in one JVM, heap capped at the memory limit
+            limits = self.limits
+            admissions.append(await admit('java', 'run', limits['memory_mb']))
+            process = await start_process(
+                [toolchain.java, f"-Xmx{limits['memory_mb']}m"] + toolchain.run_flags
+                + ['Main', str(limits['cpu_time']), str(limits['memory_mb'] * 1024 * 1024),
+                   str(limits['output_kb'] * 1024)],
+                temp_dir,
+                harness.record_size_limit(limits),
+                capture_stderr=True
             )
+            tasks.append(asyncio.ensure_future(feed_stdin(process.stdin, [inputs])))
+            stderr_task = asyncio.ensure_future(read_bounded(process.stderr, harness.MAX_ERROR_CHARS))
+            tasks.append(stderr_task)
             
-            execution_time = time.time() - start_time
+            results = await collect_records(process, len(test_inputs), self.timeout)
             
-            # Clean up
-            self._cleanup(temp_dir)
+            # If the JVM died before reporting, surface what it printed
+            if results[-1][2] == 'Process exited without producing a result':
+                await process.wait()
+                try:
+                    jvm_error = (await asyncio.wait_for(stderr_task, 1)).decode('utf-8', 'replace').strip()
+                except asyncio.TimeoutError:
+                    jvm_error = ''
+                if jvm_error:
+                    results[-1] = ExecutionResult(False, '', jvm_error, results[-1][3])
             
-            if run_result.returncode == 0:
-                return True, run_result.stdout.strip(), '', execution_time
-            else:
-                return False, '', run_result.stderr.strip(), execution_time
+            return results
                 
-        except subprocess.TimeoutExpired:
+        except asyncio.TimeoutError:
             execution_time = time.time() - start_time
-            self._cleanup(temp_dir)
-            return False, '', 'Time Limit Exceeded', execution_time
+            return [ExecutionResult(False, '', 'Time Limit Exceeded', execution_time)]
             
         except Exception as e:
             execution_time = time.time() - start_time
-            self._cleanup(temp_dir)
-            return False, '', str(e), execution_time
+            return [ExecutionResult(False, '', str(e), execution_time)]
+        
+        finally:
+            for task in tasks:
+                task.cancel()
+            if process is not None:
+                await reap_process(process)
+            for admission in admissions:
+                admission.release()
+            if workspace is not None:
+                workspace.release()
     
-    def _generate_test_harness(self, test_input):
-        """Generate Java test harness based on input parameters"""
-        harness = 'class Main {\n'
-        harness += '    public static void main(String[] args) {\n'
-        harness += '        try {\n'
-        harness += '            Solution sol = new Solution();\n'
+    async def _compile_into(self, temp_dir, code, start_time, admissions):
+        """
+        Put the compiled solution and harness into temp_dir, from the compile
+        cache or by running javac. The javac admission is appended to `admissions`.
+        Returns: (toolchain, None), or (None, [ExecutionResult]) when compiling failed
+        """
+        try:
+            # The first lookup probes javac and java in subprocesses, so not on the event loop
+            toolchain = await asyncio.get_running_loop().run_in_executor(None, get_java_toolchain)
+        except ToolchainError as e:
+            execution_time = time.time() - start_time
+            error_msg = (
+                f"Java execution failed: javac not found in PATH or standard locations.\n"
+                f"System Error: {str(e)}\n"
+                "Please contact the organizer."
+            )
+            return None, [ExecutionResult(False, '', error_msg, execution_time)]
         
-        # Prepare arguments
-        params = list(test_input.keys())
-        harness += f'            Object[] methodArgs = new Object[{len(params)}];\n'
+        source = self._build_source(code)
+        cache = get_compile_cache()
+        cache_key = None
+        entry = None
+        if cache is not None:
+            cache_key = cache.key('java', source, f'{toolchain.version}-{JAVA_HARNESS_VERSION}')
+            entry = cache.get(cache_key)
         
-        for i, param in enumerate(params):
-            val = self._python_to_java(test_input[param], param_name=param)
-            harness += f'            methodArgs[{i}] = {val};\n'
-            
-        # Find and invoke method using reflection
-        harness += '            Method method = null;\n'
-        harness += '            for (Method m : sol.getClass().getDeclaredMethods()) {\n'
-        harness += '                if (m.getName().equals("solution")) {\n'
-        harness += '                    method = m;\n'
-        harness += '                    break;\n'
-        harness += '                }\n'
-        harness += '            }\n'
-        harness += '            \n'
-        harness += '            if (method == null) {\n'
-        harness += '                System.err.println("Method \'solution\' not found");\n'
-        harness += '                return;\n'
-        harness += '            }\n'
-        harness += '            \n'
-        harness += '            Object result = method.invoke(sol, methodArgs);\n'
-        harness += '            \n'
-        harness += '            // Handle void return type (assume in-place modification of first arg)\n'
-        harness += '            if (method.getReturnType().equals(Void.TYPE)) {\n'
-        harness += '                if (methodArgs.length > 0) {\n'
-        harness += '                    printResult(methodArgs[0]);\n'
-        harness += '                } else {\n'
-        harness += '                    System.out.println("null");\n'
-        harness += '                }\n'
-        harness += '            } else {\n'
-        harness += '                printResult(result);\n'
-        harness += '            }\n'
-        harness += '        \n'
-        harness += '        } catch (IllegalArgumentException e) {\n'
-        harness += '            System.err.println("Runtime Error: Argument Mismatch. Check input types.");\n'
-        harness += '            e.printStackTrace(System.err);\n'
-        harness += '            System.exit(1);\n'
-        harness += '        } catch (Exception e) {\n'
-        harness += '            System.err.println("Runtime Error: " + e.getMessage());\n'
-        harness += '            e.printStackTrace(System.err);\n'
-        harness += '            System.exit(1);\n'
-        harness += '        }\n'
-        harness += '    }\n\n'
+        if entry is not None and entry.error is not None:
+            return None, [ExecutionResult(False, '', f'Compilation Error:\n{entry.error}', time.time() - start_time)]
+        
+        # Reuse cached .class files for a repeat submission
+        if entry is not None:
+            try:
+                entry.copy_to(temp_dir)
+                return toolchain, None
+            except OSError:
+                pass  # Evicted meanwhile, compile again
+        
+        java_file = os.path.join(temp_dir, 'Solution.java')
+        
+        # Write complete Java program with the harness that runs every test case
+        with open(java_file, 'w', encoding='utf-8') as f:
+            f.write(source)
+        
+        # Compile Java code once per submission (Limit compiler memory to 128m)
+        # Debug logging
+        print(f"Compiling with: {toolchain.javac}", flush=True)
         
-        # Add helper method to print results
-        harness += '    static void printResult(Object result) {\n'
-        harness += '        if (result == null) {\n'
-        harness += '            System.out.println("null");\n'
-        harness += '        } else if (result instanceof int[]) {\n'
-        harness += '            System.out.print("[");\n'
-        harness += '            int[] arr = (int[]) result;\n'
-        harness += '            for (int i = 0; i < arr.length; i++) {\n'
-        harness += '                System.out.print(arr[i]);\n'
-        harness += '                if (i < arr.length - 1) System.out.print(", ");\n'
-        harness += '            }\n'
-        harness += '            System.out.println("]");\n'
-        harness += '        } else if (result instanceof char[]) {\n'
-        harness += '            System.out.print("[");\n'
-        harness += '            char[] arr = (char[]) result;\n'
-        harness += '            for (int i = 0; i < arr.length; i++) {\n'
-        harness += '                System.out.print("\\"" + arr[i] + "\\"");\n'
-        harness += '                if (i < arr.length - 1) System.out.print(", ");\n'
-        harness += '            }\n'
-        harness += '            System.out.println("]");\n'
-        harness += '        } else if (result instanceof Boolean) {\n'
-        harness += '            System.out.println(((Boolean) result).toString().toLowerCase());\n'
-        harness += '        } else {\n'
-        harness += '            System.out.println(result);\n'
-        harness += '        }\n'
-        harness += '    }\n'
-        harness += '}\n'
+        admissions.append(await admit('java', 'compile'))
+        compiler = None
+        try:
+            compile_start = time.time()
+            compiler = await asyncio.create_subprocess_exec(
+                toolchain.javac, '-J-Xmx128m', 'Solution.java',
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=temp_dir
+            )
+            _, compile_stderr = await asyncio.wait_for(compiler.communicate(), self.timeout)
+            compile_stderr = compile_stderr.decode('utf-8', 'replace')
+        finally:
+            if compiler is not None:
+                await reap_process(compiler)
+            admissions[-1].release()  # javac has exited
+        metrics.COMPILE.observe(time.time() - compile_start, 'java')
+        
+        if compiler.returncode != 0:
+            execution_time = time.time() - start_time
+            print(f"Compilation Failed: {compile_stderr}", flush=True)
+            if cache is not None:
+                cache.put(cache_key, error=compile_stderr)
+            return None, [ExecutionResult(False, '', f'Compilation Error:\n{compile_stderr}', execution_time)]
         
-        return harness
+        if cache is not None:
+            cache.put(cache_key, files=self._read_classes(temp_dir))
+        return toolchain, None
+    
+    def _read_classes(self, class_dir):
+        """Compiled .class files in class_dir, as name -> bytes"""
+        classes = {}
+        for name in os.listdir(class_dir):
+            if name.endswith('.class'):
+                with open(os.path.join(class_dir, name), 'rb') as f:
+                    classes[name] = f.read()
+        return classes
+    
+    def _build_source(self, code):
+        """Complete Solution.java contents: imports, user code and test harness"""
+        source = 'import java.util.*;\n'
+        source += 'import java.io.*;\n'
+        source += 'import java.lang.reflect.*;\n\n'
+        source += code + '\n\n'
+        source += JAVA_HARNESS
+        return source
+    
+    def _encode_inputs(self, test_inputs):
+        """
+        Binary input stream read by the harness's readTests: big-endian test
+        count, then per test its argument count and tagged values.
+        """
+        parts = [struct.pack('>i', len(test_inputs))]
+        for test_input in test_inputs:
+            parts.append(struct.pack('>i', len(test_input)))
+            for param, value in test_input.items():
+                parts.append(self._encode_value(value, param_name=param))
+        return b''.join(parts)
     
-    def _python_to_java(self, value, param_name=None):
-        """Convert Python value to Java code string"""
+    def _encode_value(self, value, param_name=None):
+        """Encode one Python value as a tagged Java value"""
         if isinstance(value, bool):
-            return 'true' if value else 'false'
+            return struct.pack('>c?', b'Z', value)
         elif isinstance(value, int):
-            return str(value)
+            if -2**31 <= value < 2**31:
+                return struct.pack('>ci', b'I', value)
+            return struct.pack('>cq', b'J', value)
+        elif isinstance(value, float):
+            return struct.pack('>cd', b'D', value)
         elif isinstance(value, str):
-            return f'"{value}"'
+            data = value.encode('utf-8')
+            return struct.pack('>ci', b'S', len(data)) + data
         elif isinstance(value, list):
             if len(value) == 0:
                 # Handle empty list type inference based on param name
                 if param_name == 'lists':
-                    return 'new int[0][0]'
+                    return struct.pack('>ci', b'M', 0)
                 elif param_name == 's':
-                    return 'new char[0]'
+                    return struct.pack('>ci', b'C', 0)
                 else:
-                    return 'new int[0]'
+                    return struct.pack('>ci', b'A', 0)
             elif isinstance(value[0], list):
-                # 2D int array: [[1,2], [3,4]] -> new int[][] {{1,2}, {3,4}}
-                inners = []
-                for sub in value:
-                    if not sub:
-                        inners.append('{}')
-                    else:
-                        content = ', '.join(str(x) for x in sub)
-                        inners.append(f'{{{content}}}')
-                return f'new int[][] {{{", ".join(inners)}}}'
+                # 2D int array: row count, then each row as an int array
+                rows = [struct.pack(f'>i{len(row)}i', len(row), *row) for row in value]
+                return struct.pack('>ci', b'M', len(value)) + b''.join(rows)
             elif isinstance(value[0], str):
-                # char array
-                chars = ', '.join([f"'{c}'" for c in value])
-                return f'new char[] {{{chars}}}'
+                # char array (UTF-16 code units, as DataInputStream.readChar expects)
+                data = ''.join(value).encode('utf-16-be')
+                return struct.pack('>ci', b'C', len(data) // 2) + data
             else:
                 # int array
-                nums = ', '.join([str(v) for v in value])
-                return f'new int[] {{{nums}}}'
-        return str(value)
+                return struct.pack(f'>ci{len(value)}i', b'A', len(value), *value)
+        raise ValueError(f"Unsupported input type for Java: {type(value).__name__}")
     
-    def _cleanup(self, temp_dir):
-        """Clean up temporary directory"""
-        if temp_dir and os.path.exists(temp_dir):
-            import shutil
+
+class JavaPoolExecutor(JavaExecutor):
+    """Execute Java code on a pool of warm JVM workers"""
+    
+    async def prepare_async(self, code):
+        """Workers compile in memory, so only the per-submission JVM fallback compiles ahead"""
+        pool = await asyncio.get_running_loop().run_in_executor(None, java_pool.get_pool)
+        if pool is not None:
+            return None, None
+        return await super().prepare_async(code)
+    
+    async def execute_batch_async(self, code, test_inputs, prepared=None):
+        """
+        Compile in memory and run every input on a warm worker.
+        Falls back to a per-submission JVM if the pool is unavailable.
+        The pool is thread-based, so jobs wait on it from the default executor.
+        Returns: list of ExecutionResult, one per test run
+        """
+        if not test_inputs:
+            return []
+        
+        loop = asyncio.get_running_loop()
+        pool = await loop.run_in_executor(None, java_pool.get_pool)
+        if pool is not None and prepared is None:
+            # Workers compile in memory, so only compile errors are worth caching
+            source = self._build_source(code)
+            cache = get_compile_cache()
+            cache_key = None
+            if cache is not None:
+                cache_key = cache.key('java-pool', source, f'{pool.toolchain.version}-{JAVA_HARNESS_VERSION}')
+                entry = cache.get(cache_key)
+                if entry is not None and entry.error is not None:
+                    return [ExecutionResult(False, '', entry.error, 0.0)]
+            
             try:
-                shutil.rmtree(temp_dir)
-            except:
-                pass
+                async with await admit('java', 'pool'):
+                    records = await loop.run_in_executor(
+                        None, pool.run, source, self._encode_inputs(test_inputs), len(test_inputs), self.timeout,
+                        self.limits
+                    )
+                results = [ExecutionResult.from_record(record) for record in records]
+                if cache is not None and results and not results[0][0] and results[0][2].startswith('Compilation Error:'):
+                    cache.put(cache_key, error=results[0][2])
+                return results
+            except java_pool.JavaPoolError as e:
+                print(f"Java worker pool failed, falling back to a fresh JVM: {e}", flush=True)
+        
+        return await super().execute_batch_async(code, test_inputs, prepared)
 
 
-def get_executor(language):
-    """Factory method to get appropriate executor"""
+def get_executor(language, cpu_time_limit=None, memory_limit_mb=None, output_limit_kb=None):
+    """
+    Factory method to get appropriate executor.
+    Limits default to config.CPU_TIME_LIMIT, MEMORY_LIMIT_MB and OUTPUT_LIMIT_KB.
+    """
+    limits = {'cpu_time_limit': cpu_time_limit, 'memory_limit_mb': memory_limit_mb, 'output_limit_kb': output_limit_kb}
     if language.lower() == 'python':
-        return PythonExecutor()
+        return PythonExecutor(**limits)
     elif language.lower() == 'java':
-        return JavaExecutor()
+        if config.JAVA_USE_WORKER_POOL:
+            return JavaPoolExecutor(**limits)
+        return JavaExecutor(**limits)
     else:
         raise ValueError(f"Unsupported language: {language}")
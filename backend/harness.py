@@ -0,0 +1,345 @@
+"""
+Python test harness shared by the execution modes.
+
+Loads the user's `solution` once and runs it against a list of test inputs,
+emitting one JSON record per test case. Used in-process by the zygote and as
+a standalone script (`python harness.py`) by the subprocess fallback.
+Standard library only.
+
+Inputs never become part of any generated source. They arrive as frames of
+a 4-byte big-endian length followed by a JSON document: the job header
+({"code", "count", "limits"}), then one frame per test input. Each input is
+decoded only when its test is about to run, so large hidden tests cost one
+json.loads each and tests after the first failure are never decoded.
+
+Always runs inside a disposable process, so it may set resource limits:
+each test is accounted its user+sys CPU time and the peak RSS the solution
+grew the process by during that test (on Linux the high-water mark is reset
+before each test; elsewhere it is the peak of the batch so far), and is stopped with "Time Limit Exceeded" or
+"Memory Limit Exceeded" when it goes past the job's `limits`. Anything the
+solution prints is captured up to `output_kb`; the first write past the cap
+stops the test with "Output Limit Exceeded". The returned value is not part
+of that budget: it is serialized separately and only has to fit in
+MAX_RESULT_CHARS, so records stay bounded too (see record_size_limit).
+"""
+import builtins
+import io
+import json
+import marshal
+import os
+import signal
+import struct
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    # Windows: no rusage or rlimits, only wall-clock timing
+    resource = None
+
+TIME_LIMIT_EXCEEDED = 'Time Limit Exceeded'
+MEMORY_LIMIT_EXCEEDED = 'Memory Limit Exceeded'
+OUTPUT_LIMIT_EXCEEDED = 'Output Limit Exceeded'
+
+MAX_ERROR_CHARS = 4096
+# Longest serialized return value; the Java harness uses the same bound
+MAX_RESULT_CHARS = 8 * 1024 * 1024
+
+FRAME_HEADER = struct.Struct('>I')
+
+
+class CpuLimitExceeded(BaseException):
+    """Raised from the SIGXCPU handler (BaseException so user code can't swallow it)"""
+    pass
+
+
+class OutputLimitExceeded(BaseException):
+    """Raised by BoundedOutput on the first write past its limit"""
+    pass
+
+
+class BoundedOutput(io.StringIO):
+    """StringIO that refuses to grow past `limit` characters"""
+
+    def __init__(self, limit=None):
+        super().__init__()
+        self.limit = limit
+        self.exceeded = False
+
+    def write(self, s):
+        if self.limit is not None and self.tell() + len(s) > self.limit:
+            # Sticky, in case user code swallows the exception
+            self.exceeded = True
+            raise OutputLimitExceeded()
+        return super().write(s)
+
+
+def _on_cpu_limit(signum, frame):
+    raise CpuLimitExceeded()
+
+
+def _usage():
+    """Returns: (user+sys CPU seconds, peak RSS bytes) of this process so far"""
+    if resource is None:
+        return time.process_time(), 0
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = usage.ru_maxrss if sys.platform == 'darwin' else usage.ru_maxrss * 1024
+    return usage.ru_utime + usage.ru_stime, peak
+
+
+def _status_bytes(field):
+    """Returns: a /proc/self/status memory field (e.g. VmHWM) in bytes, or None"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _reset_peak_rss():
+    """
+    Reset this process's peak RSS (VmHWM) to its current RSS, so the next
+    reading covers one test only (Linux: 5 in /proc/self/clear_refs).
+    Returns: the current RSS in bytes, or None if the peak cannot be reset
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        return None
+    return _status_bytes('VmRSS')
+
+
+def _cap_address_space(memory_bytes):
+    """Make allocations past the limit fail with MemoryError (Linux only)"""
+    try:
+        with open('/proc/self/statm') as f:
+            current = int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        cap = current + memory_bytes
+        if hard == resource.RLIM_INFINITY or cap < hard:
+            resource.setrlimit(resource.RLIMIT_AS, (cap, hard))
+    except (OSError, ValueError):
+        pass
+
+
+def _set_cpu_alarm(cpu_used, cpu_limit):
+    """Deliver SIGXCPU once this test has used `cpu_limit` more CPU seconds"""
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = int(cpu_used + cpu_limit) + 1
+    if hard != resource.RLIM_INFINITY and soft > hard:
+        soft = hard
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _clear_cpu_alarm():
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+
+
+def encode_frame(obj):
+    """Length-prefixed JSON frame"""
+    payload = json.dumps(obj).encode('utf-8')
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+def read_frame(stream):
+    """
+    Read one frame from a binary stream.
+    Returns: the decoded document, or None at end of stream
+    """
+    header = stream.read(FRAME_HEADER.size)
+    if len(header) < FRAME_HEADER.size:
+        return None
+    (size,) = FRAME_HEADER.unpack(header)
+    payload = stream.read(size)
+    if len(payload) < size:
+        return None
+    return json.loads(payload)
+
+
+def read_inputs(stream, count):
+    """Yield up to `count` test inputs, decoding each one as it is reached"""
+    for _ in range(count):
+        test_input = read_frame(stream)
+        if test_input is None:
+            return
+        yield test_input
+
+
+def output_limit_chars(limits):
+    """Returns: the per-test output cap in characters, or None if unlimited"""
+    output_kb = (limits or {}).get('output_kb')
+    return output_kb * 1024 if output_kb else None
+
+
+def record_size_limit(limits):
+    """
+    Upper bound on one encoded result record: captured output and error,
+    each at worst 12 bytes per character once JSON-escaped, the serialized
+    return value at worst 6 bytes per character, plus the other fields.
+    Returns None if output is unlimited.
+    """
+    output_chars = output_limit_chars(limits)
+    if output_chars is None:
+        return None
+    return 12 * (output_chars + MAX_ERROR_CHARS) + 6 * MAX_RESULT_CHARS + 1024
+
+
+def failure_record(error, execution_time=0.0):
+    """Result record for a test that produced no record of its own"""
+    return {'success': False, 'output': '', 'error': error, 'time': execution_time}
+
+
+def load_solution(code, bytecode=None):
+    """
+    Execute user code in a clean namespace and return its `solution`.
+    `bytecode` is the marshalled code object, when already compiled.
+    """
+    namespace = {'__name__': '__main__', '__builtins__': builtins}
+    code_obj = marshal.loads(bytecode) if bytecode else compile(code, '<solution>', 'exec')
+    exec(code_obj, namespace)
+    if 'solution' not in namespace:
+        raise NameError("name 'solution' is not defined")
+    return namespace['solution']
+
+
+def run_case(solution, test_input, limits=None, baseline_rss=0):
+    """
+    Run a single test case, capturing anything the user prints.
+    Returns: record dict with success, output, error, time, cpu_time and memory
+    """
+    limits = limits or {}
+    cpu_limit = limits.get('cpu_time')
+    memory_limit = limits.get('memory_mb')
+    output_limit = output_limit_chars(limits)
+
+    stdout = BoundedOutput(output_limit)
+    stderr = BoundedOutput(output_limit)
+    success, output, error = True, '', ''
+    rss_start = _reset_peak_rss()
+    cpu_start, _ = _usage()
+    if resource is not None and cpu_limit:
+        _set_cpu_alarm(cpu_start, cpu_limit)
+
+    sys.stdout, sys.stderr = stdout, stderr
+    start_time = time.perf_counter()
+    try:
+        result = solution(**test_input)
+        # The return value does not count against the output cap
+        result_text = json.dumps(result)
+        if len(result_text) > MAX_RESULT_CHARS:
+            raise OutputLimitExceeded()
+        output = (stdout.getvalue() + result_text).strip()
+    except CpuLimitExceeded:
+        success, error = False, TIME_LIMIT_EXCEEDED
+    except OutputLimitExceeded:
+        success, error = False, OUTPUT_LIMIT_EXCEEDED
+    except MemoryError:
+        success, error = False, MEMORY_LIMIT_EXCEEDED
+    except SystemExit as e:
+        if e.code in (None, 0):
+            output = stdout.getvalue().strip()
+        else:
+            success, error = False, (stderr.getvalue() + str(e.code)).strip()
+    except BaseException as e:
+        success, error = False, (stderr.getvalue() + str(e)).strip()
+    finally:
+        execution_time = time.perf_counter() - start_time
+        sys.stdout, sys.stderr = sys.__stdout__, sys.__stderr__
+        if resource is not None and cpu_limit:
+            _clear_cpu_alarm()
+
+    cpu_end, peak_rss = _usage()
+    cpu_time = cpu_end - cpu_start
+    test_peak = _status_bytes('VmHWM') if rss_start is not None else None
+    if test_peak is not None:
+        memory = max(0, test_peak - rss_start)
+    else:
+        # No per-test reset: growth of the batch's peak over the baseline
+        memory = max(0, peak_rss - baseline_rss)
+
+    if success and cpu_limit and cpu_time > cpu_limit:
+        success, output, error = False, '', TIME_LIMIT_EXCEEDED
+    if success and memory_limit and memory > memory_limit * 1024 * 1024:
+        success, output, error = False, '', MEMORY_LIMIT_EXCEEDED
+    if stdout.exceeded or stderr.exceeded:
+        success, output, error = False, '', OUTPUT_LIMIT_EXCEEDED
+
+    return {
+        'success': success,
+        'output': output,
+        'error': error[:MAX_ERROR_CHARS],
+        'time': execution_time,
+        'cpu_time': cpu_time,
+        'memory': memory
+    }
+
+
+def run_cases(code, test_inputs, emit, bytecode=None, limits=None):
+    """
+    Load the solution once and run every input, calling emit(record) after
+    each test. Stops after the first failing test. `test_inputs` may be a
+    lazy iterable such as read_inputs().
+    """
+    limits = limits or {}
+    if resource is not None:
+        if limits.get('cpu_time'):
+            signal.signal(signal.SIGXCPU, _on_cpu_limit)
+        if limits.get('memory_mb'):
+            _cap_address_space(limits['memory_mb'] * 1024 * 1024)
+
+    # Module-level prints must not end up in the record stream
+    module_output = BoundedOutput(output_limit_chars(limits))
+    sys.stdout = sys.stderr = module_output
+    try:
+        solution = load_solution(code, bytecode)
+        if module_output.exceeded:
+            raise OutputLimitExceeded()
+    except BaseException as e:
+        if isinstance(e, MemoryError):
+            error = MEMORY_LIMIT_EXCEEDED
+        elif isinstance(e, OutputLimitExceeded):
+            error = OUTPUT_LIMIT_EXCEEDED
+        else:
+            error = str(e)[:MAX_ERROR_CHARS]
+        emit(failure_record(error))
+        return
+    finally:
+        sys.stdout, sys.stderr = sys.__stdout__, sys.__stderr__
+
+    _, baseline_rss = _usage()
+    for test_input in test_inputs:
+        record = run_case(solution, test_input, limits, baseline_rss)
+        emit(record)
+        if not record['success']:
+            return
+
+
+def main():
+    stdin = sys.stdin.buffer
+    job = read_frame(stdin)
+    if job is None:
+        return
+
+    # Records get a private copy of stdout; fd 1 itself goes to /dev/null so
+    # os.write(1, ...) from user code cannot corrupt or flood the record stream
+    out = os.fdopen(os.dup(1), 'w', encoding='utf-8')
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+
+    def emit(record):
+        out.write(json.dumps(record) + '\n')
+        out.flush()
+
+    run_cases(job['code'], read_inputs(stdin, job['count']), emit, limits=job.get('limits'))
+
+
+if __name__ == '__main__':
+    main()
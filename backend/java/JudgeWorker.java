@@ -0,0 +1,212 @@
+import javax.tools.*;
+import java.io.*;
+import java.net.URI;
+import java.nio.charset.StandardCharsets;
+import java.util.*;
+
+/**
+ * Long-lived judge worker used by backend/java_pool.py.
+ *
+ * Reads one job per line from stdin:
+ * "JOB <job id> <cpu seconds> <memory MB> <output KB> <base64 test inputs> <escaped Solution.java source>",
+ * where backslashes, CR and LF are escaped as \\, \r and \n. Each job is
+ * compiled in memory with the javax.tools compiler, loaded in a throwaway
+ * class loader and its Main harness is run, which prints one JSON record per
+ * test case; the limits are passed on as Main's arguments (CPU seconds, heap
+ * bytes and output bytes) and the decoded test inputs become its System.in. A compile failure prints a single record with "compile": true.
+ * Every job ends with {"done": "<job id>", "heap": <used heap bytes>, "threads": <threads left over>}.
+ * Threads started by the job that are still alive THREAD_GRACE_MS after it
+ * returned are counted, so the pool can retire the worker before they
+ * write into a later job's records.
+ */
+public class JudgeWorker {
+
+    static final long THREAD_GRACE_MS = 100;
+
+    public static void main(String[] args) throws Exception {
+        JavaCompiler compiler = ToolProvider.getSystemJavaCompiler();
+        if (compiler == null) {
+            System.err.println("No system Java compiler available (running on a JRE?)");
+            System.exit(2);
+        }
+        StandardJavaFileManager standardFiles = compiler.getStandardFileManager(null, null, StandardCharsets.UTF_8);
+
+        BufferedReader in = new BufferedReader(new InputStreamReader(System.in, StandardCharsets.UTF_8));
+        PrintStream out = new PrintStream(new FileOutputStream(FileDescriptor.out), true, "UTF-8");
+        PrintStream err = System.err;
+        InputStream stdin = System.in;
+        System.setOut(out);
+
+        String line;
+        while ((line = in.readLine()) != null) {
+            if (!line.startsWith("JOB ")) {
+                continue;
+            }
+            String[] job = line.split(" ", 7);
+            Set<Thread> before = new HashSet<Thread>(Thread.getAllStackTraces().keySet());
+            try {
+                String[] limits = {
+                    job[2],
+                    String.valueOf(Long.parseLong(job[3]) * 1024 * 1024),
+                    String.valueOf(Long.parseLong(job[4]) * 1024)
+                };
+                System.setIn(new ByteArrayInputStream(Base64.getDecoder().decode(job[5])));
+                runJob(compiler, standardFiles, unescape(job[6]), limits, out);
+            } catch (Throwable e) {
+                out.println("{\"success\": false, \"output\": \"\", \"error\": " + quote("Runtime Error: " + e) + ", \"time\": 0}");
+            } finally {
+                System.setIn(stdin);
+                System.setOut(out);
+                System.setErr(err);
+            }
+
+            int leftover = leftoverThreads(before);
+            Runtime rt = Runtime.getRuntime();
+            out.println("{\"done\": " + quote(job[1]) + ", \"heap\": " + (rt.totalMemory() - rt.freeMemory())
+                + ", \"threads\": " + leftover + "}");
+            out.flush();
+        }
+    }
+
+    static int leftoverThreads(Set<Thread> before) {
+        long deadline = System.currentTimeMillis() + THREAD_GRACE_MS;
+        int leftover = 0;
+        for (Thread thread : Thread.getAllStackTraces().keySet()) {
+            if (before.contains(thread)) {
+                continue;
+            }
+            long wait = deadline - System.currentTimeMillis();
+            if (wait > 0) {
+                try {
+                    thread.join(wait);
+                } catch (InterruptedException e) {
+                    // Count it below
+                }
+            }
+            if (thread.isAlive()) {
+                leftover++;
+            }
+        }
+        return leftover;
+    }
+
+    static void runJob(JavaCompiler compiler, StandardJavaFileManager standardFiles, String source, String[] limits, PrintStream out) throws Exception {
+        DiagnosticCollector<JavaFileObject> diagnostics = new DiagnosticCollector<JavaFileObject>();
+        MemoryFileManager files = new MemoryFileManager(standardFiles);
+        List<JavaFileObject> units = Collections.<JavaFileObject>singletonList(new SourceFile("Solution", source));
+
+        boolean compiled = compiler.getTask(new StringWriter(), files, diagnostics, Arrays.asList("-nowarn"), null, units).call();
+        if (!compiled) {
+            StringBuilder sb = new StringBuilder();
+            for (Diagnostic<? extends JavaFileObject> d : diagnostics.getDiagnostics()) {
+                if (d.getKind() == Diagnostic.Kind.ERROR) {
+                    sb.append("Solution.java:").append(d.getLineNumber()).append(": error: ")
+                      .append(d.getMessage(null)).append('\n');
+                }
+            }
+            out.println("{\"success\": false, \"compile\": true, \"output\": \"\", \"error\": "
+                + quote("Compilation Error:\n" + sb) + ", \"time\": 0}");
+            return;
+        }
+
+        // Fresh loader per job so user classes and their static state are discarded afterwards
+        ClassLoader loader = new MemoryClassLoader(files.classes, JudgeWorker.class.getClassLoader().getParent());
+        Class<?> main = loader.loadClass("Main");
+        main.getMethod("main", String[].class).invoke(null, (Object) limits);
+    }
+
+    static String unescape(String s) {
+        StringBuilder sb = new StringBuilder(s.length());
+        for (int i = 0; i < s.length(); i++) {
+            char c = s.charAt(i);
+            if (c == '\\' && i + 1 < s.length()) {
+                char next = s.charAt(++i);
+                if (next == 'n') sb.append('\n');
+                else if (next == 'r') sb.append('\r');
+                else sb.append(next);
+            } else {
+                sb.append(c);
+            }
+        }
+        return sb.toString();
+    }
+
+    static String quote(String s) {
+        StringBuilder sb = new StringBuilder("\"");
+        for (int i = 0; i < s.length(); i++) {
+            char c = s.charAt(i);
+            if (c == '"') sb.append("\\\"");
+            else if (c == '\\') sb.append("\\\\");
+            else if (c == '\n') sb.append("\\n");
+            else if (c < 0x20 || c > 0x7e) sb.append(String.format("\\u%04x", (int) c));
+            else sb.append(c);
+        }
+        return sb.append('"').toString();
+    }
+
+    static class SourceFile extends SimpleJavaFileObject {
+        final String code;
+
+        SourceFile(String name, String code) {
+            super(URI.create("string:///" + name + Kind.SOURCE.extension), Kind.SOURCE);
+            this.code = code;
+        }
+
+        @Override
+        public CharSequence getCharContent(boolean ignoreEncodingErrors) {
+            return code;
+        }
+    }
+
+    static class ClassFile extends SimpleJavaFileObject {
+        final ByteArrayOutputStream bytes = new ByteArrayOutputStream();
+
+        ClassFile(String name) {
+            super(URI.create("mem:///" + name.replace('.', '/') + Kind.CLASS.extension), Kind.CLASS);
+        }
+
+        @Override
+        public OutputStream openOutputStream() {
+            return bytes;
+        }
+    }
+
+    static class MemoryFileManager extends ForwardingJavaFileManager<StandardJavaFileManager> {
+        final Map<String, ClassFile> classes = new HashMap<String, ClassFile>();
+
+        MemoryFileManager(StandardJavaFileManager files) {
+            super(files);
+        }
+
+        @Override
+        public JavaFileObject getJavaFileForOutput(Location location, String className, JavaFileObject.Kind kind, FileObject sibling) {
+            ClassFile file = new ClassFile(className);
+            classes.put(className, file);
+            return file;
+        }
+
+        @Override
+        public void close() {
+            // The wrapped standard file manager is shared between jobs
+        }
+    }
+
+    static class MemoryClassLoader extends ClassLoader {
+        final Map<String, ClassFile> classes;
+
+        MemoryClassLoader(Map<String, ClassFile> classes, ClassLoader parent) {
+            super(parent);
+            this.classes = classes;
+        }
+
+        @Override
+        protected Class<?> findClass(String name) throws ClassNotFoundException {
+            ClassFile file = classes.get(name);
+            if (file == null) {
+                return super.findClass(name);
+            }
+            byte[] b = file.bytes.toByteArray();
+            return defineClass(name, b, 0, b.length);
+        }
+    }
+}
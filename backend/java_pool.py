@@ -0,0 +1,253 @@
+"""
+Pool of warm JVM workers for Java submissions.
+
+Each worker is a long-lived `java JudgeWorker` process (backend/java/JudgeWorker.java)
+that compiles submissions in memory with the javax.tools API, loads them in a
+throwaway class loader and runs the test harness, streaming one JSON record per
+test case back over its stdout pipe. This removes javac and JVM startup from
+every submission.
+
+Workers are recycled after a configurable number of jobs or once their heap
+usage passes a threshold, and are killed (and replaced) when a test times out
+or a job leaves threads running. Each job carries a random id that its end
+marker must echo, so a stray "done" record printed by user code is ignored.
+"""
+import base64
+import json
+import os
+import queue
+import secrets
+import subprocess
+import threading
+import time
+import config
+from backend.toolchain import get_java_toolchain, ToolchainError
+from backend.harness import failure_record, record_size_limit, OUTPUT_LIMIT_EXCEEDED
+
+WORKER_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'java', 'JudgeWorker.java')
+WORKER_STARTUP_TIMEOUT = 30  # seconds for javac to build the worker class
+READ_CHUNK = 64 * 1024  # characters read from a worker's stdout at a time
+
+
+class JavaPoolError(Exception):
+    """Raised when the pool cannot run a job (nothing was executed)"""
+    pass
+
+
+class JavaWorker:
+    """One long-lived JVM running JudgeWorker"""
+
+    def __init__(self, toolchain, classpath, heap_mb):
+        self.process = subprocess.Popen(
+            [toolchain.java, f'-Xmx{heap_mb}m', '-cp', classpath, 'JudgeWorker'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding='utf-8',
+            cwd=config.TEMP_DIR
+        )
+        self.jobs = 0
+        self.heap_used = 0
+        self.leftover_threads = 0
+        # Longest record line accepted for the current job (default limits until the first one)
+        self.max_record = record_size_limit({'output_kb': config.OUTPUT_LIMIT_KB}) or -1
+
+        # Read records on a helper thread so each test can have its own deadline
+        self.records = queue.Queue()
+        threading.Thread(target=self._read_records, daemon=True).start()
+
+    def _read_records(self):
+        while True:
+            line, overflow = self._read_line()
+            if overflow:
+                # Runaway output the harness could not catch; the stream is unusable now
+                self.records.put(failure_record(OUTPUT_LIMIT_EXCEEDED))
+                self.process.kill()
+                break
+            if not line:
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Stray output written straight to the fd
+            if isinstance(record, dict):
+                self.records.put(record)
+        self.records.put(None)
+
+    def _read_line(self):
+        """
+        Read one line in chunks, checking the length against the limit of the
+        job running when the data arrived.
+        Returns: (line, True if it was longer than that limit)
+        """
+        parts = []
+        size = 0
+        while True:
+            part = self.process.stdout.readline(READ_CHUNK)
+            parts.append(part)
+            size += len(part)
+            limit = self.max_record
+            if limit > 0 and size > limit:
+                return '', True
+            if not part or part.endswith('\n'):
+                return ''.join(parts), False
+
+    def is_alive(self):
+        return self.process.poll() is None
+
+    def stop(self):
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+
+    def run(self, source, inputs, count, timeout, limits):
+        """
+        Run one job; `inputs` is the harness's binary test input stream.
+        The worker is killed if a test times out or the JVM dies.
+        Returns: list of result records, stopping at the first failure
+        """
+        escaped = source.replace('\\', '\\\\').replace('\r', '\\r').replace('\n', '\\n')
+        self.max_record = record_size_limit(limits) or -1
+        job_id = secrets.token_hex(8)
+        try:
+            encoded_inputs = base64.b64encode(inputs).decode('ascii')
+            self.process.stdin.write(
+                f"JOB {job_id} {limits['cpu_time']} {limits['memory_mb']} {limits['output_kb']} {encoded_inputs} "
+                f"{escaped}\n"
+            )
+            self.process.stdin.flush()
+        except OSError as e:
+            self.stop()
+            raise JavaPoolError(f"Worker unavailable: {e}")
+        self.jobs += 1
+
+        results = []
+        while True:
+            started = time.time()
+            try:
+                record = self.records.get(timeout=timeout)
+            except queue.Empty:
+                self.stop()
+                results.append(failure_record('Time Limit Exceeded', time.time() - started))
+                return results
+
+            if record is None:
+                self.stop()
+                if not results or results[-1]['success']:
+                    results.append(failure_record('Process exited without producing a result', time.time() - started))
+                return results
+
+            if 'done' in record:
+                if record['done'] != job_id:
+                    continue  # Not our end marker: printed by user code
+                self.heap_used = record['heap']
+                self.leftover_threads = record.get('threads', 0)
+                if not results:
+                    results.append(failure_record('Process exited without producing a result', time.time() - started))
+                return results
+
+            if len(results) < count:
+                results.append(record)
+
+
+class JavaWorkerPool:
+    """Hands out warm workers, spawning up to `size` of them on demand"""
+
+    def __init__(self, toolchain, classpath, size=config.JAVA_POOL_SIZE,
+                 max_jobs=config.JAVA_POOL_MAX_JOBS, max_heap_mb=config.JAVA_POOL_RECYCLE_HEAP_MB,
+                 heap_mb=config.JAVA_POOL_HEAP_MB):
+        self.toolchain = toolchain
+        self.classpath = classpath
+        self.size = size
+        self.max_jobs = max_jobs
+        self.max_heap_bytes = max_heap_mb * 1024 * 1024
+        self.heap_mb = heap_mb
+
+        self.idle = queue.Queue()
+        self.slots = threading.Semaphore(size)
+
+    def run(self, source, inputs, count, timeout, limits):
+        """
+        Run a job on a warm worker.
+        Returns: list of result records
+        """
+        with self.slots:
+            worker = self._acquire()
+            try:
+                return worker.run(source, inputs, count, timeout, limits)
+            finally:
+                self._release(worker)
+
+    def _acquire(self):
+        while True:
+            try:
+                worker = self.idle.get_nowait()
+            except queue.Empty:
+                try:
+                    return JavaWorker(self.toolchain, self.classpath, self.heap_mb)
+                except OSError as e:
+                    raise JavaPoolError(f"Failed to start worker: {e}")
+            if worker.is_alive():
+                return worker
+
+    def _release(self, worker):
+        if not worker.is_alive():
+            return
+        if (worker.jobs >= self.max_jobs or worker.heap_used >= self.max_heap_bytes
+                or worker.leftover_threads):
+            worker.stop()
+            return
+        self.idle.put(worker)
+
+    def shutdown(self):
+        while True:
+            try:
+                self.idle.get_nowait().stop()
+            except queue.Empty:
+                return
+
+
+def build_worker(javac_cmd):
+    """
+    Compile JudgeWorker.java into config.TEMP_DIR/java_worker.
+    Returns: the classpath directory
+    """
+    classpath = os.path.join(config.TEMP_DIR, 'java_worker')
+    os.makedirs(classpath, exist_ok=True)
+    result = subprocess.run(
+        [javac_cmd, '-J-Xmx128m', '-d', classpath, WORKER_SOURCE],
+        capture_output=True,
+        text=True,
+        timeout=WORKER_STARTUP_TIMEOUT
+    )
+    if result.returncode != 0:
+        raise JavaPoolError(f"Failed to compile JudgeWorker:\n{result.stderr}")
+    return classpath
+
+
+_pool = None
+_pool_failed = False
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Get the shared worker pool for this process, building the worker on first use.
+    Returns None if the pool cannot be started (e.g. no JDK).
+    """
+    global _pool, _pool_failed
+    with _pool_lock:
+        if _pool is not None or _pool_failed:
+            return _pool
+
+        try:
+            toolchain = get_java_toolchain()
+            classpath = build_worker(toolchain.javac)
+        except (OSError, subprocess.SubprocessError, ToolchainError, JavaPoolError) as e:
+            print(f"Java worker pool unavailable, using per-submission JVMs: {e}", flush=True)
+            _pool_failed = True
+            return None
+
+        _pool = JavaWorkerPool(toolchain, classpath)
+        return _pool
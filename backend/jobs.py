@@ -0,0 +1,97 @@
+"""
+Job functions queued by the web app.
+
+They live at module level so JobQueue can ship them to worker processes
+as (module, name) descriptors (see queue_manager.ProcessRunner); each
+process builds its own ContestService on first use.
+"""
+import json
+from backend.service import ContestService
+from backend.problem_loader import get_test_cases, get_problem_limits
+from backend.executor import get_executor
+from backend.judge import Judge
+from backend.verdict_cache import get_verdict_cache
+
+_service = None
+
+
+def get_service():
+    """Get this process's ContestService"""
+    global _service
+    if _service is None:
+        _service = ContestService()
+    return _service
+
+
+def run_code(data):
+    """Run code against a problem's first test case"""
+    try:
+        problem_id = data['problem_id']
+        code = data['code']
+        language = data['language']
+
+        test_cases = get_test_cases(problem_id)
+        if not test_cases:
+            return {'success': False, 'message': 'No test cases available'}
+
+        # Same code on the same test data was run before
+        cache = get_verdict_cache()
+        cache_key = cache.key('run', problem_id, language, code) if cache is not None else None
+        cached = cache.get(cache_key) if cache is not None else None
+        if cached is not None:
+            return dict(cached, cached=True)
+
+        executor = get_executor(language, *get_problem_limits(problem_id))
+        test_input = test_cases[0]['input']
+        expected = test_cases[0]['expected_output']
+
+        result = executor.execute(code, test_input)
+        success, output, error, exec_time = result
+
+        if success:
+            try:
+                actual = json.loads(output) if output else None
+            except:
+                actual = output.strip()
+
+            judge = Judge()
+            passed = judge._compare_output(actual, expected)
+
+            response = {
+                'success': True,
+                'passed': passed,
+                'input': test_input,
+                'expected': expected,
+                'actual': actual,
+                'time': exec_time,
+                'cpu_time': getattr(result, 'cpu_time', None),
+                'memory': getattr(result, 'memory', None),
+                'error': None
+            }
+            if cache is not None:
+                cache.put(cache_key, response)
+            return response
+        else:
+            return {
+                'success': False,
+                'passed': False,
+                'error': error,
+                'error_type': 'execution'
+            }
+    except Exception as e:
+        return {
+            'success': False,
+            'passed': False,
+            'error': str(e),
+            'error_type': 'system'
+        }
+
+
+def submit_code(participant_id, data):
+    """Judge a submission and record it"""
+    return get_service().submit_code(
+        participant_id,
+        data['problem_id'],
+        data['code'],
+        data['language']
+    )
@@ -1,6 +1,7 @@
+import asyncio
 import json
-from backend.executor import get_executor
-from backend.problem_loader import get_test_cases
+from backend.executor import get_executor, run_sync
+from backend.problem_loader import get_test_cases, get_problem_limits
 import config
 
 class Judge:
@@ -11,13 +12,26 @@ class Judge:
     VERDICT_COMPILATION_ERROR = "Compilation Error"
     VERDICT_RUNTIME_ERROR = "Runtime Error"
     VERDICT_TIME_LIMIT_EXCEEDED = "Time Limit Exceeded"
+    VERDICT_MEMORY_LIMIT_EXCEEDED = "Memory Limit Exceeded"
+    VERDICT_OUTPUT_LIMIT_EXCEEDED = "Output Limit Exceeded"
     
     def __init__(self):
         pass
     
-    def judge_submission(self, problem_id, code, language):
+    def judge_submission(self, problem_id, code, language, stats=None):
         """
-        Judge a code submission against test cases
+        Judge a code submission against test cases (blocking wrapper
+        around judge_submission_async).
+        If a `stats` dict is passed it is filled with the total CPU time
+        (seconds) and peak memory (bytes) of the tests that ran.
+        Returns: (verdict, score, details)
+        """
+        return run_sync(self.judge_submission_async(problem_id, code, language, stats))
+    
+    async def judge_submission_async(self, problem_id, code, language, stats=None):
+        """
+        Judge a code submission against test cases; many submissions can
+        be judged concurrently from one event loop.
         Returns: (verdict, score, details)
         """
         # Get test cases for the problem
@@ -28,7 +42,7 @@ class Judge:
         
         # Get executor for the language
         try:
-            executor = get_executor(language)
+            executor = get_executor(language, *get_problem_limits(problem_id))
         except ValueError as e:
             return self.VERDICT_COMPILATION_ERROR, 0, str(e)
         
@@ -37,17 +51,27 @@ class Judge:
         total = len(test_cases)
         details = []
         
+        # Execute all test cases (stops at the first failure)
+        results = await self._execute_tests(executor, code, [test_case.get('input', {}) for test_case in test_cases])
+        if stats is not None:
+            stats['cpu_time'] = sum(getattr(r, 'cpu_time', None) or 0.0 for r in results)
+            stats['memory'] = max([getattr(r, 'memory', None) or 0 for r in results] or [0])
+        
         for i, test_case in enumerate(test_cases):
-            test_input = test_case.get('input', {})
             expected_output = test_case.get('expected_output')
             
-            # Execute code
-            success, output, error, exec_time = executor.execute(code, test_input)
+            if i >= len(results):
+                return self.VERDICT_RUNTIME_ERROR, 0, f"Error on test case {i+1}: No result produced"
+            success, output, error, exec_time = results[i]
             
             # Check for errors
             if not success:
                 if 'Time Limit Exceeded' in error:
                     return self.VERDICT_TIME_LIMIT_EXCEEDED, 0, f"TLE on test case {i+1}"
+                elif 'Memory Limit Exceeded' in error:
+                    return self.VERDICT_MEMORY_LIMIT_EXCEEDED, 0, f"MLE on test case {i+1}"
+                elif 'Output Limit Exceeded' in error:
+                    return self.VERDICT_OUTPUT_LIMIT_EXCEEDED, 0, f"OLE on test case {i+1}"
                 elif error:
                     return self.VERDICT_RUNTIME_ERROR, 0, f"Error on test case {i+1}: {error[:200]}"
                 else:
@@ -61,7 +85,7 @@ class Judge:
             
             if self._compare_output(actual_output, expected_output):
                 passed += 1
-                details.append(f"Test {i+1}: Passed ({exec_time:.3f}s)")
+                details.append(f"Test {i+1}: Passed ({self._format_usage(results[i], exec_time)})")
             else:
                 details.append(f"Test {i+1}: Failed (Expected: {expected_output}, Got: {actual_output})")
         
@@ -76,6 +100,68 @@ class Judge:
         details_str = '\n'.join(details)
         return verdict, score, details_str
     
+    async def _execute_tests(self, executor, code, inputs):
+        """
+        Run the tests as one batch, or fanned out over up to
+        config.JUDGE_PARALLEL_TESTS concurrent executions of contiguous
+        slices. The code is compiled once and the slices only run it. Slices
+        after a failure are cancelled, and the results are cut at the
+        lowest-numbered failure, so both modes return the same list.
+        Returns: list of ExecutionResult in test order
+        """
+        shards = min(config.JUDGE_PARALLEL_TESTS, len(inputs))
+        if shards <= 1:
+            return await executor.execute_batch_async(code, inputs)
+        
+        prepared, failure = await executor.prepare_async(code)
+        if failure is not None:
+            return failure
+        
+        # Each slice still stops at its own first failure
+        starts = [len(inputs) * k // shards for k in range(shards)] + [len(inputs)]
+        tasks = {}
+        for k in range(shards):
+            task = asyncio.ensure_future(executor.execute_batch_async(code, inputs[starts[k]:starts[k + 1]], prepared))
+            tasks[task] = starts[k]
+        
+        slice_results = {}
+        first_failure = len(inputs)
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    start = tasks[task]
+                    slice_results[start] = task.result()
+                    if slice_results[start] and not slice_results[start][-1][0]:
+                        first_failure = min(first_failure, start + len(slice_results[start]) - 1)
+                
+                # Slices starting after the earliest failure cannot change the verdict
+                cancelled = [task for task in pending if tasks[task] > first_failure]
+                for task in cancelled:
+                    task.cancel()
+                    pending.discard(task)
+                if cancelled:
+                    await asyncio.gather(*cancelled, return_exceptions=True)
+        finally:
+            for task in pending:
+                task.cancel()
+        
+        results = []
+        for start in starts[:-1]:
+            if start > first_failure:
+                break
+            results.extend(slice_results[start])
+        return results[:first_failure + 1]
+    
+    def _format_usage(self, result, exec_time):
+        """"0.012s CPU, 9.4 MB" when measured, else the wall-clock time"""
+        cpu_time = getattr(result, 'cpu_time', None)
+        if cpu_time is None:
+            return f"{exec_time:.3f}s"
+        memory = getattr(result, 'memory', None) or 0
+        return f"{cpu_time:.3f}s CPU, {memory / (1024 * 1024):.1f} MB"
+    
     def _compare_output(self, actual, expected):
         """Compare actual and expected output"""
         # Handle None
@@ -0,0 +1,211 @@
+"""
+In-process metrics, served at /metrics in the Prometheus text format.
+
+Histograms use fixed log-linear buckets, HDR-style: every power of two from
+1 ms to 512 s is split into BUCKETS_PER_OCTAVE buckets, so a latency is
+placed within ~19% of its value with one bisect and one increment under a
+per-metric lock. Gauges are read from callbacks when the page is rendered.
+
+Metrics live in the process that records them. Jobs run in worker
+processes (QUEUE_BACKEND=process) hand their counts back with the result
+(see drain() / merge()); each gunicorn worker and standalone judge reports
+only its own jobs.
+"""
+import bisect
+import threading
+
+BUCKETS_PER_OCTAVE = 4
+INF_LABEL = 'le="+Inf"'
+BUCKET_BOUNDS = [0.001 * 2 ** (i / BUCKETS_PER_OCTAVE) for i in range(19 * BUCKETS_PER_OCTAVE + 1)]
+
+
+def _format_labels(names, values, extra=''):
+    pairs = [
+        '%s="%s"' % (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return '{%s}' % ','.join(pairs) if pairs else ''
+
+
+def _format_value(value):
+    return '%.6g' % value if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values = {}  # label values -> count
+        self.lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        key = tuple('' if label is None else str(label) for label in labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        with self.lock:
+            values = sorted(self.values.items())
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        for key, value in values:
+            lines.append(f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}')
+        return lines
+
+    def drain(self):
+        with self.lock:
+            values, self.values = self.values, {}
+        return values
+
+    def merge(self, values):
+        for key, value in values.items():
+            self.inc(*key, amount=value)
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames=(), bounds=BUCKET_BOUNDS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.bounds = bounds
+        self.values = {}  # label values -> [bucket counts (last one is +Inf), sum]
+        self.lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        key = tuple('' if label is None else str(label) for label in labels)
+        index = bisect.bisect_left(self.bounds, value)
+        with self.lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = [[0] * (len(self.bounds) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def render(self):
+        with self.lock:
+            values = sorted((key, list(counts), total) for key, (counts, total) in self.values.items())
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.bounds, counts):
+                cumulative += count
+                le = 'le="%s"' % _format_value(bound)
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, INF_LABEL)} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}')
+        return lines
+
+    def drain(self):
+        with self.lock:
+            values, self.values = self.values, {}
+        return values
+
+    def merge(self, values):
+        with self.lock:
+            for key, (counts, total) in values.items():
+                entry = self.values.get(key)
+                if entry is None:
+                    entry = self.values[key] = [[0] * (len(self.bounds) + 1), 0.0]
+                for i, count in enumerate(counts):
+                    entry[0][i] += count
+                entry[1] += total
+
+
+class Gauge:
+    """Values read from `read()`, a callable returning {label values: value}"""
+
+    def __init__(self, name, help, labelnames, read):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.read = read
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} gauge']
+        for key, value in sorted(self.read().items()):
+            lines.append(f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def counter(self, name, help, labelnames=()):
+        return self._add(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=()):
+        return self._add(Histogram(name, help, labelnames))
+
+    def gauge(self, name, help, labelnames, read):
+        """Register (or replace) a gauge read from a callback"""
+        gauge = Gauge(name, help, labelnames, read)
+        with self.lock:
+            self.metrics[name] = gauge
+        return gauge
+
+    def render(self):
+        """Returns: every metric in the Prometheus text exposition format"""
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                print(f"Metrics error in {metric.name}: {e}", flush=True)
+        return '\n'.join(lines) + '\n'
+
+    def drain(self):
+        """Returns: counter and histogram values recorded since the last drain, which are reset"""
+        with self.lock:
+            metrics = list(self.metrics.values())
+        return {metric.name: metric.drain() for metric in metrics if not isinstance(metric, Gauge)}
+
+    def merge(self, drained):
+        """Add values drained from another process"""
+        for name, values in drained.items():
+            metric = self.metrics.get(name)
+            if metric is not None and values:
+                metric.merge(values)
+
+    def _add(self, metric):
+        with self.lock:
+            if metric.name in self.metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self.metrics[metric.name] = metric
+        return metric
+
+
+REGISTRY = Registry()
+
+JOBS = REGISTRY.counter(
+    'judge_jobs_total', 'Queued jobs by outcome (completed, failed, coalesced, superseded)', ('task_type', 'outcome')
+)
+QUEUE_WAIT = REGISTRY.histogram(
+    'judge_queue_wait_seconds', 'Time from enqueue to start of a job', ('task_type', 'language')
+)
+EXECUTION = REGISTRY.histogram(
+    'judge_execution_seconds', 'Time a job spends executing', ('task_type', 'language', 'problem')
+)
+TOTAL = REGISTRY.histogram(
+    'judge_total_seconds', 'Time from enqueue to end of a job', ('task_type', 'language', 'problem')
+)
+COMPILE = REGISTRY.histogram(
+    'judge_compile_seconds', 'Time compiling solutions (compile cache misses only)', ('language',)
+)
+
+
+def observe_job(task_type, profile, submitted_at, started_at, finished_at, outcome):
+    """Record one finished job of a job queue"""
+    problem_id, language = profile if profile else (None, None)
+    language = (language or '').lower()
+    JOBS.inc(task_type, outcome)
+    QUEUE_WAIT.observe(max(0.0, started_at - submitted_at), task_type, language)
+    EXECUTION.observe(finished_at - started_at, task_type, language, problem_id)
+    TOTAL.observe(max(0.0, finished_at - submitted_at), task_type, language, problem_id)
@@ -1,7 +1,11 @@
+import hashlib
 import json
 import os
 import config
 
+# problem_id -> (mtime, size, version) of the problem file
+_versions = {}
+
 def load_problem(problem_id):
     """Load a single problem from JSON file"""
     problem_file = os.path.join(config.PROBLEMS_DIR, f'problem_{problem_id}.json')
@@ -59,3 +63,38 @@ def get_test_cases(problem_id):
         return []
     
     return problem.get('test_cases', [])
+
+def get_problem_limits(problem_id):
+    """
+    Per-test limits for a problem: the optional "limits" object in its JSON
+    ({"cpu_time": seconds, "memory_mb": MB, "output_kb": KB}), falling back
+    to the config defaults.
+    Returns: (cpu_time_limit, memory_limit_mb, output_limit_kb)
+    """
+    problem = load_problem(problem_id) or {}
+    limits = problem.get('limits', {})
+    return (
+        limits.get('cpu_time', config.CPU_TIME_LIMIT),
+        limits.get('memory_mb', config.MEMORY_LIMIT_MB),
+        limits.get('output_kb', config.OUTPUT_LIMIT_KB)
+    )
+
+def get_problem_version(problem_id):
+    """
+    Version of a problem's test data: a hash of its JSON file, recomputed
+    only when the file changes. Returns None if the problem does not exist.
+    """
+    problem_file = os.path.join(config.PROBLEMS_DIR, f'problem_{problem_id}.json')
+    try:
+        stat = os.stat(problem_file)
+    except OSError:
+        return None
+    
+    cached = _versions.get(problem_id)
+    if cached and cached[:2] == (stat.st_mtime, stat.st_size):
+        return cached[2]
+    
+    with open(problem_file, 'rb') as f:
+        version = hashlib.sha256(f.read()).hexdigest()[:16]
+    _versions[problem_id] = (stat.st_mtime, stat.st_size, version)
+    return version
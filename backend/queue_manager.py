@@ -1,93 +1,488 @@
-import queue
 import threading
 import uuid
 import time
 import json
+import itertools
+import heapq
+import importlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
+import config
+from backend.result_store import ResultStore
+from backend.status_store import SharedStatusStore
+from backend import metrics
+from backend import verdict_cache
+
+
+class DurationEstimator:
+    """
+    Running estimate of how long a job takes, from completed jobs.
+    Keeps an exponentially weighted mean per (task type, problem, language),
+    falling back to (task type, language), then task type, then a default.
+    """
+    
+    def __init__(self, alpha=0.3, default=1.0):
+        self.alpha = alpha
+        self.default = default
+        self.means = {}
+        self.lock = threading.Lock()
+    
+    def _keys(self, task_type, profile):
+        problem_id, language = profile if profile else (None, None)
+        language = (language or '').lower()
+        return [(task_type, problem_id, language), (task_type, language), (task_type,)]
+    
+    def estimate(self, task_type, profile=None):
+        """Returns: expected duration in seconds"""
+        with self.lock:
+            for key in self._keys(task_type, profile):
+                if key in self.means:
+                    return self.means[key]
+        return self.default
+    
+    def record(self, task_type, profile, duration):
+        with self.lock:
+            for key in self._keys(task_type, profile):
+                mean = self.means.get(key)
+                self.means[key] = duration if mean is None else mean + self.alpha * (duration - mean)
+
+
+class Lane:
+    """
+    Pending jobs of one task type. Participants take turns in rounds, one
+    job each per round; within a round the participant whose next job has
+    the best priority (the shortest expected under 'sjf', the oldest under
+    'fifo') goes first.
+    """
+    
+    def __init__(self, weight):
+        self.weight = weight
+        self.current = 0  # Smooth weighted round-robin credit
+        self.turns = []  # Owners still due a turn this round
+        self.waiting = []  # Owners with pending jobs who had their turn this round
+        self.backlogs = {}  # owner -> heap of (priority, sequence, job)
+        self.size = 0
+    
+    def push(self, owner, entry):
+        backlog = self.backlogs.get(owner)
+        if backlog is None:
+            backlog = self.backlogs[owner] = []
+            self.turns.append(owner)
+        heapq.heappush(backlog, entry)
+        self.size += 1
+    
+    def pop(self):
+        if not self.turns:
+            self.turns, self.waiting = self.waiting, []
+        owner = min(self.turns, key=lambda owner: self.backlogs[owner][0])
+        self.turns.remove(owner)
+        backlog = self.backlogs[owner]
+        entry = heapq.heappop(backlog)
+        if backlog:
+            self.waiting.append(owner)
+        else:
+            del self.backlogs[owner]
+        self.size -= 1
+        return entry
+    
+    def remove(self, owner, task_id):
+        """Drop a pending job. Returns: True if it was still waiting here"""
+        backlog = self.backlogs.get(owner, [])
+        for i, (_, _, job) in enumerate(backlog):
+            if job['id'] == task_id:
+                backlog.pop(i)
+                heapq.heapify(backlog)
+                if not backlog:
+                    del self.backlogs[owner]
+                    (self.turns if owner in self.turns else self.waiting).remove(owner)
+                self.size -= 1
+                return True
+        return False
+    
+    def copy(self):
+        lane = Lane(self.weight)
+        lane.current = self.current
+        lane.turns = list(self.turns)
+        lane.waiting = list(self.waiting)
+        lane.backlogs = {owner: list(backlog) for owner, backlog in self.backlogs.items()}
+        lane.size = self.size
+        return lane
+
+
+def _next_entry(lanes):
+    """Pop the next entry, picking the lane by smooth weighted round-robin"""
+    ready = [lane for lane in lanes.values() if lane.size]
+    total = sum(lane.weight for lane in ready)
+    for lane in ready:
+        lane.current += lane.weight
+    chosen = max(ready, key=lambda lane: lane.current)
+    chosen.current -= total
+    return chosen.pop()
+
+
+class FairQueue:
+    """
+    Blocking queue of jobs in one lane per task type. Lanes share workers in
+    proportion to their weights (config.QUEUE_LANE_WEIGHTS, default 1), and
+    within a lane participants take turns, so one participant's backlog only
+    delays their own jobs.
+    """
+    
+    def __init__(self, weights=None):
+        self.weights = weights or {}
+        self.lanes = {}
+        self.size = 0
+        self.condition = threading.Condition()
+        self.order = None  # Cached task_id -> position, rebuilt after changes
+    
+    def put(self, task_type, owner, entry):
+        with self.condition:
+            lane = self.lanes.get(task_type)
+            if lane is None:
+                lane = self.lanes[task_type] = Lane(max(1, self.weights.get(task_type, 1)))
+            lane.push(owner, entry)
+            self.size += 1
+            self.order = None
+            self.condition.notify()
+    
+    def get(self):
+        with self.condition:
+            while not self.size:
+                self.condition.wait()
+            self.size -= 1
+            self.order = None
+            return _next_entry(self.lanes)
+    
+    def remove(self, task_type, owner, task_id):
+        """Withdraw a job that has not started. Returns: True if it was removed"""
+        with self.condition:
+            lane = self.lanes.get(task_type)
+            if lane is None or not lane.remove(owner, task_id):
+                return False
+            self.size -= 1
+            self.order = None
+            return True
+    
+    def position(self, task_id):
+        """Returns: 1-based position of a pending job (1 = next to start), or None"""
+        with self.condition:
+            if self.order is None:
+                # Replay the scheduler on a copy to see the order jobs will start in
+                lanes = {task_type: lane.copy() for task_type, lane in self.lanes.items()}
+                self.order = {}
+                for position in range(1, self.size + 1):
+                    _, _, job = _next_entry(lanes)
+                    self.order[job['id']] = position
+            return self.order.get(task_id)
+
+
+def job_descriptor(func):
+    """
+    Picklable reference to a job function.
+    Returns: (module, qualified name)
+    """
+    module = getattr(func, '__module__', None)
+    name = getattr(func, '__qualname__', '')
+    if module is None or module == '__main__' or '<' in name:
+        raise ValueError(f"{name or func!r} must be a module-level function to run in a worker process")
+    return module, name
+
+
+def resolve_descriptor(descriptor):
+    """Returns: the job function a job_descriptor() refers to"""
+    module, name = descriptor
+    func = importlib.import_module(module)
+    for part in name.split('.'):
+        func = getattr(func, part)
+    return func
+
+
+def _run_descriptor(descriptor, args, kwargs):
+    """
+    Worker process side: import the job function and call it.
+    Returns: (result, metrics recorded meanwhile, new verdict cache entries), the last two for the parent to merge
+    """
+    result = resolve_descriptor(descriptor)(*args, **kwargs)
+    cache = verdict_cache.get_verdict_cache()
+    return result, metrics.REGISTRY.drain(), cache.drain() if cache is not None else []
+
+
+def _init_worker_process(share):
+    # Every worker process admits executions against its own slice of the budget
+    config.ADMISSION_CPU_CORES = config.ADMISSION_CPU_CORES / share
+    config.ADMISSION_MEMORY_MB = config.ADMISSION_MEMORY_MB // share
+    # The parent keeps the verdicts this process finds and writes the cache file
+    verdict_cache.use_in_worker_process()
+
+
+class ThreadRunner:
+    """Runs job functions on the queue's worker threads"""
+    
+    def prepare(self, func):
+        return func
+    
+    def run(self, target, args, kwargs):
+        return target(*args, **kwargs)
+
+
+class ProcessRunner:
+    """
+    Runs job functions in a pool of worker processes, one per queue worker
+    thread, so judging does not compete with request handling for the GIL.
+    Processes are replaced after max_jobs jobs, and the pool is rebuilt if
+    a process dies.
+    """
+    
+    def __init__(self, processes, max_jobs):
+        self.processes = processes
+        self.max_jobs = max_jobs
+        self.pool = None
+        self.lock = threading.Lock()
+    
+    def prepare(self, func):
+        return job_descriptor(func)
+    
+    def run(self, target, args, kwargs):
+        pool = self._get_pool()
+        try:
+            result, recorded, verdicts = pool.submit(_run_descriptor, target, args, kwargs).result()
+        except BrokenProcessPool:
+            with self.lock:
+                if self.pool is pool:
+                    self.pool = None
+            pool.shutdown(wait=False)
+            raise RuntimeError("Worker process exited while running the job")
+        metrics.REGISTRY.merge(recorded)
+        cache = verdict_cache.get_verdict_cache()
+        if cache is not None and verdicts:
+            cache.merge(verdicts)
+        return result
+    
+    def _get_pool(self):
+        with self.lock:
+            if self.pool is None:
+                # Spawned (not forked) processes: recycling needs it, and the parent has threads
+                self.pool = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    max_tasks_per_child=self.max_jobs,
+                    initializer=_init_worker_process,
+                    initargs=(self.processes,)
+                )
+            return self.pool
+
 
 class JobQueue:
-    def __init__(self, max_warnings=3, max_concurrent=2):
-        self.queue = queue.Queue()
-        self.results = {}
+    def __init__(self, max_warnings=3, max_concurrent=2, scheduling=None, aging=None, lane_weights=None,
+                 result_ttl=None, max_results=None, backend=None, status_store=None):
+        # Each participant's jobs within a lane are ordered by (priority, arrival).
+        # With 'fifo' every priority is 0. With 'sjf' the priority is expected
+        # duration + aging * submit time: shorter jobs go first, but a job's priority
+        # never rises while it waits, so each second waited is worth `aging` seconds
+        # of expected duration and nothing starves.
+        self.queue = FairQueue(config.QUEUE_LANE_WEIGHTS if lane_weights is None else lane_weights)
+        self.sequence = itertools.count()
+        self.scheduling = scheduling or config.QUEUE_SCHEDULING
+        self.aging = config.QUEUE_AGING if aging is None else aging
+        self.estimator = DurationEstimator()
+        # Statuses are kept until at least result_ttl seconds after the job finished
+        self.results = ResultStore(
+            config.QUEUE_RESULT_TTL if result_ttl is None else result_ttl,
+            config.QUEUE_RESULT_MAX if max_results is None else max_results,
+            keep=self._retain
+        )
         self.max_concurrent = max_concurrent
         
+        # Statuses other web workers can read (see backend/status_store.py)
+        self.shared = status_store
+        if self.shared is None and config.QUEUE_SHARED_STATUS:
+            self.shared = SharedStatusStore(config.QUEUE_STATUS_DB_PATH, self.results.ttl)
+        
+        # 'thread' runs job functions on the worker threads, 'process' in worker processes
+        backend = backend or config.QUEUE_BACKEND
+        if backend == 'process':
+            self.runner = ProcessRunner(max_concurrent, config.QUEUE_PROCESS_MAX_JOBS)
+        else:
+            self.runner = ThreadRunner()
+        
+        # Duplicate requests share one execution: a coalesced or superseded task id
+        # is stored with the status dict of the task that runs for it ('task_id')
+        self.in_flight = {}  # (task_type, owner, dedupe_key) -> task_id, until it finishes
+        self.replaceable = {}  # (task_type, owner, supersede_key) -> job, until it starts
+        self.running = {}  # task_type -> number of jobs being executed
+        self.lock = threading.Lock()
+        
+        # Bumped on every status change, so waiters (e.g. event streams) wake up
+        self.version = 0
+        self.changed = threading.Condition()
+        
         # Start worker threads
         self.workers = []
         for _ in range(max_concurrent):
             t = threading.Thread(target=self._worker_loop, daemon=True)
             t.start()
             self.workers.append(t)
-            
-        # Start cleanup thread
-        self.cleanup_thread = threading.Thread(target=self._cleanup_loop, daemon=True)
-        self.cleanup_thread.start()
 
-    def add_job(self, task_type, func, *args, **kwargs):
+    def add_job(self, task_type, func, *args, owner=None, profile=None, dedupe_key=None, supersede_key=None,
+                **kwargs):
         """
         Add a job to the queue.
-        task_type: 'run' or 'submit'
+        task_type: 'run' or 'submit', the lane the job waits in
         func: The function to execute
+        owner: who queued the job (e.g. participant id), for fairness within the lane
+        profile: (problem_id, language), used to estimate how long the job takes
+        dedupe_key: e.g. a payload hash; an unfinished job of the same type and owner
+            with the same key is reused instead of queueing another one
+        supersede_key: e.g. a problem id; a job of the same type and owner with the
+            same key that has not started yet is dropped in favour of this one
         """
+        target = self.runner.prepare(func)
         task_id = str(uuid.uuid4())
-        self.results[task_id] = {
+        submitted_at = time.time()
+        status = {
+            'task_id': task_id,
             'status': 'pending',
-            'submitted_at': time.time()
+            'submitted_at': submitted_at
         }
         
         job = {
             'id': task_id,
             'type': task_type,
-            'func': func,
+            'owner': owner,
+            'profile': profile,
+            'status': status,
+            'dedupe': (task_type, owner, dedupe_key) if owner is not None and dedupe_key is not None else None,
+            'supersede': (task_type, owner, supersede_key) if owner is not None and supersede_key is not None else None,
+            'target': target,
             'args': args,
             'kwargs': kwargs
         }
         
-        self.queue.put(job)
+        with self.lock:
+            existing = self.results.get(self.in_flight.get(job['dedupe']))
+            superseded = None
+            if existing is None:
+                if job['supersede'] is not None:
+                    older = self.replaceable.get(job['supersede'])
+                    if older is not None and self.queue.remove(task_type, owner, older['id']):
+                        # Take over the older task's status, so whoever waits on it gets this result
+                        if self.in_flight.get(older['dedupe']) == older['id']:
+                            del self.in_flight[older['dedupe']]
+                        status = job['status'] = older['status']
+                        status.update(task_id=task_id, submitted_at=submitted_at)
+                        superseded = older['id']
+                    self.replaceable[job['supersede']] = job
+                
+                self.results.set(task_id, status)
+                if job['dedupe'] is not None:
+                    self.in_flight[job['dedupe']] = task_id
+            else:
+                self.results.set(task_id, existing)
+        
+        if existing is not None:
+            metrics.JOBS.inc(task_type, 'coalesced')
+            self._share('link', task_id, existing['task_id'])
+            return task_id
+        self._share('set', task_id, status)
+        if superseded is not None:
+            metrics.JOBS.inc(task_type, 'superseded')
+            self._share('link', superseded, task_id)
+        
+        priority = 0
+        if self.scheduling == 'sjf':
+            priority = self.estimator.estimate(task_type, profile) + self.aging * submitted_at
+        self.queue.put(task_type, owner, (priority, next(self.sequence), job))
+        self._notify()
         return task_id
 
     def get_status(self, task_id):
-        return self.results.get(task_id, None)
+        status = self.results.get(task_id, None)
+        if status is None:
+            # Queued through another web worker
+            return self.shared.get(task_id) if self.shared is not None else None
+        if status['status'] != 'pending':
+            return status
+        return dict(status, position=self.queue.position(status['task_id']))
+    
+    def depth(self):
+        """Returns: {(task type, 'pending' or 'processing'): number of jobs}"""
+        with self.queue.condition:
+            counts = {(task_type, 'pending'): lane.size for task_type, lane in self.queue.lanes.items()}
+        with self.lock:
+            counts.update(((task_type, 'processing'), count) for task_type, count in self.running.items())
+        return counts
+    
+    def wait_for_change(self, version=None, timeout=None):
+        """
+        Block until a status changes after `version` (a value this method returned
+        earlier), or until timeout. Changes made by other web workers do not wake it.
+        Returns: the current version
+        """
+        with self.changed:
+            if version is not None and self.version == version:
+                self.changed.wait(timeout)
+            return self.version
+    
+    def _notify(self):
+        with self.changed:
+            self.version += 1
+            self.changed.notify_all()
+    
+    def _share(self, method, *args):
+        """Publish to the shared status store; a failure there must not fail the job"""
+        if self.shared is None:
+            return
+        try:
+            getattr(self.shared, method)(*args)
+        except Exception as e:
+            print(f"Shared status store error: {e}", flush=True)
+
+    def _retain(self, status):
+        """Unfinished jobs and recent results outlive their first expiry"""
+        finished_at = status.get('finished_at')
+        return finished_at is None or time.time() - finished_at < self.results.ttl
 
     def _worker_loop(self):
         while True:
             try:
-                job = self.queue.get()
-                task_id = job['id']
+                _, _, job = self.queue.get()
+                status = job['status']
+                with self.lock:
+                    if self.replaceable.get(job['supersede']) is job:
+                        del self.replaceable[job['supersede']]
+                    self.running[job['type']] = self.running.get(job['type'], 0) + 1
                 
                 # Update status to processing
-                self.results[task_id]['status'] = 'processing'
+                status['status'] = 'processing'
+                self._share('set', status['task_id'], status)
+                self._notify()
                 
+                started = time.time()
                 try:
                     # Execute the function
                     # result is expected to be a dict (response data)
-                    result_data = job['func'](*job['args'], **job['kwargs'])
+                    result_data = self.runner.run(job['target'], job['args'], job['kwargs'])
                     
                     # If the result is a Flask Response object (e.g. jsonify), we need to extract data
                     # But our service methods usually return dicts. We should ensure we pass service methods, not route handlers.
                     
-                    self.results[task_id]['result'] = result_data
-                    self.results[task_id]['status'] = 'completed'
+                    status['result'] = result_data
+                    status['status'] = 'completed'
                     
                 except Exception as e:
-                    self.results[task_id]['status'] = 'failed'
-                    self.results[task_id]['error'] = str(e)
+                    status['status'] = 'failed'
+                    status['error'] = str(e)
                 finally:
-                    self.queue.task_done()
+                    status['finished_at'] = time.time()
+                    self._share('set', status['task_id'], status)
+                    self._notify()
+                    self.estimator.record(job['type'], job['profile'], status['finished_at'] - started)
+                    metrics.observe_job(job['type'], job['profile'], status['submitted_at'], started,
+                                        status['finished_at'], status['status'])
+                    with self.lock:
+                        if self.in_flight.get(job['dedupe']) == job['id']:
+                            del self.in_flight[job['dedupe']]
+                        self.running[job['type']] -= 1
                     
             except Exception as e:
                 print(f"Worker Error: {e}")
-
-    def _cleanup_loop(self):
-        """Remove old results to prevent memory leaks"""
-        while True:
-            time.sleep(60) # Run every minute
-            now = time.time()
-            to_remove = []
-            
-            for task_id, data in self.results.items():
-                # Keep results for 5 minutes
-                if now - data['submitted_at'] > 300:
-                    to_remove.append(task_id)
-            
-            for task_id in to_remove:
-                del self.results[task_id]
@@ -0,0 +1,77 @@
+"""
+Thread-safe key/value store whose entries expire after a TTL.
+
+Expiry times sit in a min-heap next to the dict, so lookups are O(1) and
+each insert pays O(log n) for itself plus the expired entries it clears;
+there is no periodic scan. Entries the `keep` predicate still needs (e.g.
+jobs that have not finished) get a fresh TTL instead of expiring, and
+`max_entries` is a hard cap: past it the entries closest to expiry go
+first, kept or not, so memory stays bounded however much traffic arrives.
+"""
+import heapq
+import itertools
+import threading
+import time
+
+
+class ResultStore:
+    def __init__(self, ttl, max_entries, keep=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.keep = keep
+        self.entries = {}  # key -> (sequence, expires_at, value)
+        self.expiry = []  # heap of (expires_at, sequence, key); stale items are skipped
+        self.sequence = itertools.count()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            entry = self.entries.get(key)
+        return default if entry is None else entry[2]
+
+    def set(self, key, value):
+        """Store value under key with a fresh TTL"""
+        now = time.time()
+        with self.lock:
+            self._expire(now)
+            self._push(key, value, now + self.ttl)
+            while len(self.entries) > self.max_entries:
+                self._pop_oldest()
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.entries
+
+    def __len__(self):
+        with self.lock:
+            return len(self.entries)
+
+    def _push(self, key, value, expires_at):
+        sequence = next(self.sequence)
+        self.entries[key] = (sequence, expires_at, value)
+        heapq.heappush(self.expiry, (expires_at, sequence, key))
+
+    def _pop_oldest(self):
+        """Remove the entry closest to expiry. Returns: (key, expires_at, value), or None"""
+        while self.expiry:
+            expires_at, sequence, key = heapq.heappop(self.expiry)
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == sequence:
+                del self.entries[key]
+                return key, expires_at, entry[2]
+        return None
+
+    def _expire(self, now):
+        renewed = []
+        while self.expiry and self.expiry[0][0] <= now:
+            popped = self._pop_oldest()
+            if popped is None:
+                break
+            key, expires_at, value = popped
+            if expires_at > now:
+                # Only stale heap items were due; put the live entry back
+                renewed.append((key, value, expires_at))
+            elif self.keep is not None and self.keep(value):
+                renewed.append((key, value, now + self.ttl))
+        for key, value, expires_at in renewed:
+            self._push(key, value, expires_at)
@@ -5,6 +5,7 @@ from backend.models import (
 )
 from backend.problem_loader import load_all_problems, get_problem_with_starter_code
 from backend.judge import Judge
+from backend.verdict_cache import get_verdict_cache, CACHEABLE_VERDICTS
 import config
 from firebase_config import get_db, firestore
 
@@ -157,9 +158,21 @@ class ContestService:
                 session.close()
                 return {'success': False, 'message': 'Contest is not active', 'verdict': None, 'score': 0}
             
-            verdict, score, details = self.judge.judge_submission(problem_id, code, language)
+            # Identical code for the same problem and test data was judged before
+            cache = get_verdict_cache()
+            cache_key = cache.key('submit', problem_id, language, code) if cache is not None else None
+            cached = cache.get(cache_key) if cache is not None else None
+            if cached is not None:
+                verdict, score, details, stats = cached['verdict'], cached['score'], cached['details'], cached['stats']
+            else:
+                stats = {}
+                verdict, score, details = self.judge.judge_submission(problem_id, code, language, stats)
+                if cache is not None and verdict in CACHEABLE_VERDICTS:
+                    cache.put(cache_key, {'verdict': verdict, 'score': score, 'details': details, 'stats': stats})
             
-            submission = Submission(participant_id=participant_id, problem_id=problem_id, code=code, language=language, verdict=verdict, score=score)
+            # execution_time holds the CPU seconds used across the tests that ran (None if nothing ran)
+            cpu_time = stats.get('cpu_time') if cached is None else None
+            submission = Submission(participant_id=participant_id, problem_id=problem_id, code=code, language=language, verdict=verdict, score=score, execution_time=cpu_time)
             session.add(submission)
             
             # Update total score immediately
@@ -170,7 +183,7 @@ class ContestService:
             submission_id = submission.id
             session.close()
             
-            return {'success': True, 'submission_id': submission_id, 'verdict': verdict, 'score': score, 'details': details}
+            return {'success': True, 'submission_id': submission_id, 'verdict': verdict, 'score': score, 'details': details, 'cached': cached is not None}
         except Exception as e:
             session.rollback()
             session.close()
@@ -188,6 +201,28 @@ class ContestService:
         session.close()
         return result
     
+    def get_problem_stats(self):
+        """Per-problem CPU usage of judged submissions, to spot expensive problems"""
+        session = get_session()
+        submissions = session.query(Submission).filter(Submission.execution_time.isnot(None)).all()
+        
+        stats = {}
+        for sub in submissions:
+            entry = stats.setdefault(sub.problem_id, {'problem_id': sub.problem_id, 'submissions': 0, 'total_cpu_time': 0.0, 'max_cpu_time': 0.0, 'verdicts': {}})
+            entry['submissions'] += 1
+            entry['total_cpu_time'] += sub.execution_time
+            entry['max_cpu_time'] = max(entry['max_cpu_time'], sub.execution_time)
+            entry['verdicts'][sub.verdict] = entry['verdicts'].get(sub.verdict, 0) + 1
+        
+        session.close()
+        
+        result = []
+        for entry in stats.values():
+            entry['avg_cpu_time'] = entry.pop('total_cpu_time') / entry['submissions']
+            result.append(entry)
+        result.sort(key=lambda x: x['avg_cpu_time'], reverse=True)
+        return result
+    
     def get_results(self, participant_id):
         """Get final results for a participant"""
         session = get_session()
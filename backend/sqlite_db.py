@@ -0,0 +1,47 @@
+"""
+Small helpers for the local SQLite files used by the job queue
+(see durable_queue.py and status_store.py). Every call opens its own
+connection, so they are safe from any thread or process.
+"""
+import os
+import sqlite3
+
+
+def init_db(path, schema):
+    """Create the database file in WAL mode and apply the schema"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    db = sqlite3.connect(path, timeout=30, isolation_level=None)
+    try:
+        db.execute('PRAGMA journal_mode=WAL')
+        db.executescript(schema)
+    finally:
+        db.close()
+
+
+def open_db(path):
+    db = sqlite3.connect(path, timeout=30, isolation_level=None)
+    db.execute('PRAGMA synchronous=NORMAL')
+    return db
+
+
+class Connection:
+    """
+    Context manager over a new connection, closed on exit. With write=True
+    it holds a write transaction (BEGIN IMMEDIATE), committed on success.
+    """
+
+    def __init__(self, path, write=False):
+        self.db = open_db(path)
+        self.write = write
+
+    def __enter__(self):
+        if self.write:
+            self.db.execute('BEGIN IMMEDIATE')
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if self.write:
+                self.db.execute('ROLLBACK' if exc_type else 'COMMIT')
+        finally:
+            self.db.close()
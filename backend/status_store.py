@@ -0,0 +1,86 @@
+"""
+Task statuses shared by every web worker on a host.
+
+JobQueue keeps its jobs in process memory, so with several gunicorn
+workers a status poll can reach a worker that never saw the task. When
+config.QUEUE_SHARED_STATUS is on, each JobQueue also publishes every
+status change here, a small SQLite table (WAL mode) at
+config.QUEUE_STATUS_DB_PATH, and answers polls for unknown task ids from
+it. Coalesced and superseded task ids are stored as links to the task
+that runs for them.
+
+Finished statuses are dropped QUEUE_RESULT_TTL seconds after they were
+written; unfinished ones whose worker died stop being updated and are
+dropped after STALE_AFTER seconds.
+"""
+import json
+import time
+from backend.sqlite_db import Connection, init_db
+
+EXPIRE_INTERVAL = 30  # seconds between sweeps of old statuses
+STALE_AFTER = 3600  # seconds before an unfinished status nobody updates is dropped
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS statuses (
+    id TEXT PRIMARY KEY,
+    alias_of TEXT,
+    status TEXT,
+    finished INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS statuses_alias ON statuses (alias_of);
+CREATE INDEX IF NOT EXISTS statuses_updated ON statuses (updated_at);
+"""
+
+
+class SharedStatusStore:
+    def __init__(self, path, ttl):
+        self.path = path
+        self.ttl = ttl
+        self.last_expiry = time.time()
+        init_db(path, SCHEMA)
+
+    def get(self, task_id):
+        """Returns: the status dict, following links, or None"""
+        with self._connect() as db:
+            row = db.execute("SELECT alias_of, status FROM statuses WHERE id = ?", (task_id,)).fetchone()
+            if row is not None and row[0] is not None:
+                row = db.execute("SELECT alias_of, status FROM statuses WHERE id = ?", (row[0],)).fetchone()
+        if row is None or row[1] is None:
+            return None
+        return json.loads(row[1])
+
+    def set(self, task_id, status):
+        """Publish a status dict (must be JSON-serializable)"""
+        now = time.time()
+        finished = status.get('status') in ('completed', 'failed')
+        with self._transaction() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO statuses (id, alias_of, status, finished, updated_at) VALUES (?, NULL, ?, ?, ?)",
+                (task_id, json.dumps(status, default=str), int(finished), now)
+            )
+            if now - self.last_expiry > EXPIRE_INTERVAL:
+                self.last_expiry = now
+                self._expire(db, now)
+
+    def link(self, task_id, target):
+        """Make task_id (and anything linked to it) report target's status"""
+        with self._transaction() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO statuses (id, alias_of, status, updated_at) VALUES (?, ?, NULL, ?)",
+                (task_id, target, time.time())
+            )
+            db.execute("UPDATE statuses SET alias_of = ? WHERE alias_of = ?", (target, task_id))
+
+    def _expire(self, db, now):
+        db.execute(
+            "DELETE FROM statuses WHERE alias_of IS NULL AND updated_at < ? AND (finished = 1 OR updated_at < ?)",
+            (now - self.ttl, now - STALE_AFTER)
+        )
+        db.execute("DELETE FROM statuses WHERE alias_of IS NOT NULL AND alias_of NOT IN (SELECT id FROM statuses)")
+
+    def _connect(self):
+        return Connection(self.path)
+
+    def _transaction(self):
+        return Connection(self.path, write=True)
@@ -0,0 +1,164 @@
+"""
+Java toolchain discovery, resolved once per process.
+
+Finding javac used to cost a `javac -version` process per test case. The
+resolved toolchain (javac/java paths, version and the optional JVM flags the
+runtime accepts) is now cached here; call refresh_java_toolchain() after
+installing or switching JDKs, and check_java_toolchain() at startup to fail
+fast when Java judging is required.
+"""
+import os
+import re
+import subprocess
+import threading
+
+# Windows & Linux locations tried when javac is not on PATH
+POTENTIAL_JAVAC_PATHS = [
+    r"C:\Program Files\Java\jdk-1.8\bin\javac.exe",
+    "/usr/bin/javac",
+    "/usr/lib/jvm/java-17-openjdk-amd64/bin/javac",
+    "/usr/lib/jvm/default-java/bin/javac"
+]
+
+# Start-up friendly JVM flags, used only if the runtime accepts them
+OPTIONAL_RUN_FLAGS = ['-XX:+UseSerialGC', '-XX:TieredStopAtLevel=1']
+
+PROBE_TIMEOUT = 10  # seconds
+
+
+class ToolchainError(Exception):
+    """Raised when no usable JDK could be found"""
+    pass
+
+
+class JavaToolchain:
+    """A resolved JDK: tool paths, version and supported optional flags"""
+
+    def __init__(self, javac, java, version, run_flags):
+        self.javac = javac
+        self.java = java
+        self.version = version
+        self.run_flags = run_flags
+
+    @property
+    def major_version(self):
+        """8 for "1.8.0_392", 17 for "17.0.9" """
+        parts = self.version.split('.')
+        if parts[0] == '1' and len(parts) > 1:
+            return int(parts[1])
+        return int(parts[0]) if parts[0].isdigit() else 0
+
+    def __repr__(self):
+        return f"JavaToolchain(javac={self.javac!r}, java={self.java!r}, version={self.version!r})"
+
+
+def _probe_javac(javac_cmd):
+    """Run `javac -version`; returns the version string or raises OSError"""
+    result = subprocess.run(
+        [javac_cmd, '-version'],
+        capture_output=True,
+        text=True,
+        timeout=PROBE_TIMEOUT
+    )
+    # JDK 8 prints the version on stderr, later JDKs on stdout
+    match = re.search(r'javac\s+(\S+)', result.stdout + result.stderr)
+    return match.group(1) if match else 'unknown'
+
+
+def _supported_run_flags(java_cmd):
+    """Keep the optional flags this JVM starts with"""
+    supported = []
+    for flag in OPTIONAL_RUN_FLAGS:
+        try:
+            result = subprocess.run(
+                [java_cmd, flag, '-version'],
+                capture_output=True,
+                text=True,
+                timeout=PROBE_TIMEOUT
+            )
+        except (OSError, subprocess.SubprocessError):
+            continue
+        if result.returncode == 0:
+            supported.append(flag)
+    return supported
+
+
+def resolve_java_toolchain():
+    """
+    Locate javac and the matching java launcher.
+    Returns: JavaToolchain
+    Raises ToolchainError if no javac is available.
+    """
+    javac_cmd = 'javac'
+    try:
+        version = _probe_javac(javac_cmd)
+    except (OSError, subprocess.SubprocessError) as e:
+        for path in POTENTIAL_JAVAC_PATHS:
+            if os.path.exists(path):
+                javac_cmd = path
+                break
+        else:
+            raise ToolchainError(str(e))
+        try:
+            version = _probe_javac(javac_cmd)
+        except (OSError, subprocess.SubprocessError) as e:
+            raise ToolchainError(str(e))
+
+    # Derive java_cmd from javac_cmd if possible, otherwise use PATH
+    java_cmd = 'java'
+    if os.path.isabs(javac_cmd):
+        bin_dir = os.path.dirname(javac_cmd)
+        potential_java = os.path.join(bin_dir, 'java.exe' if os.name == 'nt' else 'java')
+        if os.path.exists(potential_java):
+            java_cmd = potential_java
+
+    return JavaToolchain(javac_cmd, java_cmd, version, _supported_run_flags(java_cmd))
+
+
+_toolchain = None
+_toolchain_error = None
+_toolchain_lock = threading.Lock()
+
+
+def get_java_toolchain():
+    """
+    Get the cached toolchain, resolving it on first use.
+    A failed lookup is cached too, until refresh_java_toolchain() is called.
+    Raises ToolchainError if no javac is available.
+    """
+    global _toolchain, _toolchain_error
+    with _toolchain_lock:
+        if _toolchain is None and _toolchain_error is None:
+            try:
+                _toolchain = resolve_java_toolchain()
+            except ToolchainError as e:
+                _toolchain_error = e
+        if _toolchain_error is not None:
+            raise _toolchain_error
+        return _toolchain
+
+
+def refresh_java_toolchain():
+    """Drop the cached toolchain and resolve it again"""
+    global _toolchain, _toolchain_error
+    with _toolchain_lock:
+        _toolchain = None
+        _toolchain_error = None
+    return get_java_toolchain()
+
+
+def check_java_toolchain(required=False):
+    """
+    Startup health check. Logs the resolved toolchain; if `required`,
+    raises ToolchainError when Java is unavailable instead of just warning.
+    """
+    try:
+        toolchain = get_java_toolchain()
+    except ToolchainError as e:
+        if required:
+            raise
+        print(f"WARNING: Java toolchain unavailable, Java submissions will fail: {e}", flush=True)
+        return None
+
+    print(f"Java toolchain: {toolchain.javac} / {toolchain.java} (version {toolchain.version})", flush=True)
+    return toolchain
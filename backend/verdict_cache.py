@@ -0,0 +1,167 @@
+"""
+Memoized judge results for repeated runs and submissions.
+
+Much of the contest traffic is the same code judged again: "run" followed
+by "submit", retries after network errors, shared reference solutions. A
+result is keyed by mode ('run' or 'submit'), problem id, the problem's
+test-data version (see problem_loader.get_problem_version), its limits,
+language and a hash of the code with line endings normalized (any other
+whitespace can matter, e.g. inside string literals). Only deterministic outcomes are stored (see CACHEABLE_VERDICTS);
+time-outs and errors are always judged again.
+
+Entries live in an in-memory LRU of config.VERDICT_CACHE_SIZE entries.
+With config.VERDICT_CACHE_PERSIST the LRU is loaded from and periodically
+written to config.VERDICT_CACHE_FILE (atomically, via rename).
+
+Queue worker processes (QUEUE_BACKEND=process) only read the file: the
+verdicts they find are handed back with each job's result (see drain() /
+merge()), and the parent process keeps them and writes the file.
+"""
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+import config
+from backend.problem_loader import get_problem_version, get_problem_limits
+
+# Bump when judging semantics change so old verdicts are not served
+CACHE_VERSION = '2'
+
+CACHEABLE_VERDICTS = ('Accepted', 'Wrong Answer')
+
+SAVE_INTERVAL = 30  # seconds between writes of the persisted cache
+
+
+def normalize_code(code):
+    """Line endings do not change what code does; trailing spaces can (string literals, line continuations)"""
+    return code.replace('\r\n', '\n').replace('\r', '\n')
+
+
+class VerdictCache:
+    """Thread-safe LRU of judge results, optionally persisted to a JSON file"""
+
+    def __init__(self, max_entries, path=None, read_only=False):
+        self.max_entries = max_entries
+        self.path = path
+        self.read_only = read_only  # Load `path` but never write it; keep new entries for drain()
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.added = []
+        self.dirty = False
+        self.last_save = time.time()
+        if path:
+            self._load()
+
+    def key(self, mode, problem_id, language, code):
+        """Returns: cache key, or None if the problem does not exist"""
+        version = get_problem_version(problem_id)
+        if version is None:
+            return None
+        digest = hashlib.sha256()
+        parts = (CACHE_VERSION, mode, str(problem_id), version, json.dumps(get_problem_limits(problem_id)),
+                 language.lower(), normalize_code(code))
+        for part in parts:
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Returns: the stored value, or None on a miss"""
+        if key is None:
+            return None
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        """Store a JSON-serializable value"""
+        if key is None:
+            return
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            if self.read_only:
+                self.added.append((key, value))
+                return
+            self.dirty = True
+            due = self.path and time.time() - self.last_save >= SAVE_INTERVAL
+        if due:
+            self.save()
+
+    def drain(self):
+        """Returns: (key, value) pairs stored since the last drain (read-only caches only)"""
+        with self.lock:
+            added, self.added = self.added, []
+        return added
+
+    def merge(self, added):
+        """Store entries drained from a worker process's cache"""
+        for key, value in added:
+            self.put(key, value)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.dirty = True
+
+    def save(self):
+        """Write the cache to disk if it changed since the last save"""
+        if not self.path or self.read_only:
+            return
+        with self.lock:
+            if not self.dirty:
+                return
+            snapshot = list(self.entries.items())
+            self.dirty = False
+            self.last_save = time.time()
+
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Could not save verdict cache: {e}", flush=True)
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return
+        for key, value in snapshot[-self.max_entries:]:
+            self.entries[key] = value
+
+
+_cache = None
+_cache_lock = threading.Lock()
+_read_only = False
+
+
+def use_in_worker_process():
+    """Make this process's cache read-only, for a queue worker process whose parent owns the file"""
+    global _read_only
+    _read_only = True
+
+
+def get_verdict_cache():
+    """Get the shared cache, or None if memoization is disabled"""
+    global _cache
+    if not config.VERDICT_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = VerdictCache(config.VERDICT_CACHE_SIZE,
+                                  config.VERDICT_CACHE_FILE if config.VERDICT_CACHE_PERSIST else None,
+                                  read_only=_read_only)
+            if _cache.path and not _cache.read_only:
+                atexit.register(_cache.save)
+        return _cache
@@ -0,0 +1,190 @@
+"""
+Pooled scratch directories for executions.
+
+Each process keeps a pool of pre-created workspaces under
+config.WORKSPACE_DIR/pool-<pid> (on tmpfs when SCRATCH_DIR is /dev/shm).
+acquire() hands out an idle one, release() empties it and puts it back, so
+a Java run costs a few unlinks instead of mkdtemp plus rmtree. When every
+workspace is busy an extra one is created; it joins the pool on release if
+there is room, otherwise it is deleted, so disk usage stays at roughly
+WORKSPACE_POOL_SIZE plus the number of concurrent executions.
+
+A background janitor touches this process's pool directory as a heartbeat
+and reclaims what crashed workers left behind: pool directories of dead
+processes or with a stale heartbeat, and old `tmp*` / `atc-java-*`
+directories from before workspaces were pooled. Only names this app
+created are touched: SCRATCH_DIR may be a shared directory such as /tmp.
+"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+import config
+
+POOL_PREFIX = 'pool-'
+WORKSPACE_PREFIX = 'ws-'
+# Directories the old per-execution mkdtemp calls left in TEMP_DIR, and in SCRATCH_DIR
+# (which may be shared with other programs, so only our own prefix there)
+ORPHAN_PREFIXES = ('tmp', 'atc-java-')
+SCRATCH_ORPHAN_PREFIXES = ('atc-java-',)
+
+
+class Workspace:
+    """A leased scratch directory; release it (or leave the with block) when done"""
+
+    def __init__(self, pool, path):
+        self.pool = pool
+        self.path = path
+
+    def release(self):
+        if self.path is not None:
+            self.pool.release(self)
+            self.path = None
+
+    def __enter__(self):
+        return self.path
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class WorkspacePool:
+    """Reusable scratch directories for one process"""
+
+    def __init__(self, root, size):
+        self.root = root
+        self.size = size
+        self.pid = os.getpid()
+        self.dir = os.path.join(root, f'{POOL_PREFIX}{self.pid}')
+        self.lock = threading.Lock()
+        self.idle = []
+        os.makedirs(self.dir, exist_ok=True)
+        for _ in range(size):
+            self.idle.append(self._create())
+
+    def acquire(self):
+        """Returns: an empty Workspace"""
+        with self.lock:
+            path = self.idle.pop() if self.idle else None
+        if path is None or not os.path.isdir(path):
+            path = self._create()
+        return Workspace(self, path)
+
+    def release(self, workspace):
+        """Empty the workspace and return it to the pool, or delete it"""
+        path = workspace.path
+        if self._reset(path):
+            with self.lock:
+                if len(self.idle) < self.size:
+                    self.idle.append(path)
+                    return
+        shutil.rmtree(path, ignore_errors=True)
+
+    def heartbeat(self):
+        """Mark this pool as owned by a live process"""
+        try:
+            os.utime(self.dir)
+        except OSError:
+            os.makedirs(self.dir, exist_ok=True)
+
+    def _create(self):
+        os.makedirs(self.dir, exist_ok=True)
+        return tempfile.mkdtemp(dir=self.dir, prefix=WORKSPACE_PREFIX)
+
+    def _reset(self, path):
+        """Remove everything inside path. Returns: False if it could not be emptied"""
+        try:
+            for entry in os.scandir(path):
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path)
+                else:
+                    os.unlink(entry.path)
+            return True
+        except OSError:
+            return False
+
+
+def _pid_alive(pid):
+    if os.name == 'nt':
+        return True  # os.kill would terminate it; rely on the heartbeat age instead
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+def sweep(root, orphan_dirs, max_age, own_pid=None):
+    """
+    Delete pool directories under root whose owner is gone or whose
+    heartbeat is older than max_age seconds, and leftover per-execution
+    directories older than max_age; orphan_dirs maps each directory to
+    the name prefixes swept in it.
+    Returns: number of directories removed
+    """
+    now = time.time()
+    removed = 0
+    candidates = []
+
+    for entry in _scan(root):
+        if not entry.name.startswith(POOL_PREFIX):
+            continue
+        try:
+            pid = int(entry.name[len(POOL_PREFIX):])
+        except ValueError:
+            continue
+        if pid == own_pid:
+            continue
+        if not _pid_alive(pid) or now - entry.stat().st_mtime > max_age:
+            candidates.append(entry.path)
+
+    for directory, prefixes in orphan_dirs.items():
+        for entry in _scan(directory):
+            if entry.name.startswith(prefixes) and now - entry.stat().st_mtime > max_age:
+                candidates.append(entry.path)
+
+    for path in candidates:
+        shutil.rmtree(path, ignore_errors=True)
+        if not os.path.exists(path):
+            removed += 1
+    return removed
+
+
+def _scan(directory):
+    """Subdirectories of directory (empty if it does not exist)"""
+    try:
+        return [entry for entry in os.scandir(directory) if entry.is_dir(follow_symlinks=False)]
+    except OSError:
+        return []
+
+
+def _janitor_loop(pool):
+    while True:
+        try:
+            pool.heartbeat()
+            # TEMP_DIR last: it wins when SCRATCH_DIR falls back to it
+            orphan_dirs = {config.SCRATCH_DIR: SCRATCH_ORPHAN_PREFIXES, config.TEMP_DIR: ORPHAN_PREFIXES}
+            removed = sweep(pool.root, orphan_dirs, config.WORKSPACE_ORPHAN_AGE, own_pid=pool.pid)
+            if removed:
+                print(f"Workspace janitor removed {removed} orphaned directories", flush=True)
+        except Exception as e:
+            print(f"Workspace janitor error: {e}", flush=True)
+        time.sleep(config.WORKSPACE_JANITOR_INTERVAL)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_workspace_pool():
+    """Get this process's workspace pool, starting its janitor on first use"""
+    global _pool
+    with _pool_lock:
+        # A forked worker must not share its parent's directories
+        if _pool is None or _pool.pid != os.getpid():
+            _pool = WorkspacePool(config.WORKSPACE_DIR, config.WORKSPACE_POOL_SIZE)
+            threading.Thread(target=_janitor_loop, args=(_pool,), daemon=True).start()
+        return _pool
@@ -0,0 +1,325 @@
+"""
+Pre-forked "zygote" server for Python submissions.
+
+The zygote is a long-lived helper process that has already paid for
+interpreter startup and the harness imports. For every job it forks a
+child which loads the user's code in a clean namespace, runs the test cases
+and streams one result per test back over a unix socket, so a submission
+costs a fork instead of a full `python` process launch.
+
+This module is both the client (used by PythonExecutor; asyncio-based, with
+blocking wrappers) and the server (run as `python zygote.py <socket_path>`). The server side only depends on
+the standard library and the harness so it can start without the rest of
+the app.
+"""
+import asyncio
+import base64
+import json
+import os
+import select
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+try:
+    from backend import harness
+except ImportError:
+    # Running as a script: backend/ itself is on sys.path
+    import harness
+
+STARTUP_TIMEOUT = 5  # seconds to wait for the zygote socket to appear
+
+
+class ZygoteError(Exception):
+    """Raised when the zygote cannot be reached and nothing was executed"""
+    pass
+
+
+class MessageTooLarge(Exception):
+    """Raised when a peer announces a message bigger than the reader allows"""
+    pass
+
+
+def is_supported():
+    """The zygote needs fork() and unix sockets (not available on Windows)"""
+    return hasattr(os, 'fork') and hasattr(socket, 'AF_UNIX')
+
+
+# --- Wire protocol: 4-byte big-endian length followed by a JSON document ---
+# (the same framing as harness.encode_frame). A job is the header message,
+# then one message per test input, which the child decodes as it reaches it.
+
+def _send_msg(sock, obj):
+    sock.sendall(harness.encode_frame(obj))
+
+
+def _recv_exact(sock, size):
+    chunks = []
+    while size > 0:
+        chunk = sock.recv(min(size, 65536))
+        if not chunk:
+            raise EOFError("Connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def _recv_msg(sock, max_size=None):
+    (size,) = struct.unpack('>I', _recv_exact(sock, 4))
+    if max_size is not None and size > max_size:
+        raise MessageTooLarge(f"{size} byte message exceeds {max_size}")
+    return json.loads(_recv_exact(sock, size).decode('utf-8'))
+
+
+def _recv_inputs(sock, count):
+    """Yield up to `count` test inputs as the harness asks for them"""
+    for _ in range(count):
+        try:
+            yield _recv_msg(sock)
+        except EOFError:
+            return
+
+
+async def _read_msg_async(reader, max_size=None):
+    (size,) = struct.unpack('>I', await reader.readexactly(4))
+    if max_size is not None and size > max_size:
+        raise MessageTooLarge(f"{size} byte message exceeds {max_size}")
+    return json.loads((await reader.readexactly(size)).decode('utf-8'))
+
+
+async def _send_inputs_async(writer, test_inputs):
+    """
+    Stream test inputs while records are read. The child stops reading at
+    its first failure, so send errors are expected.
+    """
+    try:
+        for test_input in test_inputs:
+            writer.write(harness.encode_frame(test_input))
+            await writer.drain()
+    except OSError:
+        pass
+
+
+# --- Server side (runs inside the zygote process) ---
+
+def _handle_connection(conn):
+    """Child side of the fork: announce our pid, run one job, stream results"""
+    # Detach from the zygote's stdio so user code cannot write into server logs
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+
+    _send_msg(conn, {'pid': os.getpid()})
+    job = _recv_msg(conn)
+    os.chdir(job.get('cwd') or os.getcwd())
+    bytecode = base64.b64decode(job['bytecode']) if job.get('bytecode') else None
+    inputs = _recv_inputs(conn, job['count'])
+    harness.run_cases(job['code'], inputs, lambda record: _send_msg(conn, record), bytecode, job.get('limits'))
+
+    # Exiting with unread input would reset the connection, and the client
+    # could lose the last record: signal EOF and wait for the client to hang up
+    conn.shutdown(socket.SHUT_WR)
+    conn.settimeout(STARTUP_TIMEOUT)
+    while conn.recv(65536):
+        pass
+
+
+def serve(socket_path):
+    """Accept jobs forever, forking one child per connection"""
+    # Let the kernel reap finished children
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen(128)
+
+    while True:
+        readable, _, _ = select.select([server, sys.stdin], [], [])
+        if sys.stdin in readable and not os.read(sys.stdin.fileno(), 1):
+            # Parent closed our stdin (it exited) - shut down
+            break
+        if server not in readable:
+            continue
+
+        conn, _ = server.accept()
+        pid = os.fork()
+        if pid == 0:
+            server.close()
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            try:
+                _handle_connection(conn)
+            except BaseException:
+                pass
+            finally:
+                os._exit(0)
+        conn.close()
+
+    server.close()
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+
+# --- Client side (runs inside the web/judge process) ---
+
+class PythonZygote:
+    """Handle to a running zygote process"""
+
+    def __init__(self):
+        self.process = None
+        self.socket_dir = None
+        self.socket_path = None
+
+    def start(self):
+        """Launch the zygote and wait until it accepts connections"""
+        self.socket_dir = tempfile.mkdtemp(prefix='atc-zygote-')
+        self.socket_path = os.path.join(self.socket_dir, 'zygote.sock')
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), self.socket_path],
+            stdin=subprocess.PIPE
+        )
+
+        deadline = time.time() + STARTUP_TIMEOUT
+        while time.time() < deadline:
+            if os.path.exists(self.socket_path):
+                return
+            if self.process.poll() is not None:
+                break
+            time.sleep(0.01)
+
+        self.stop()
+        raise ZygoteError("Zygote failed to start")
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def stop(self):
+        if self.process is not None:
+            try:
+                self.process.stdin.close()
+                self.process.wait(timeout=2)
+            except Exception:
+                self.process.kill()
+            self.process = None
+        if self.socket_dir and os.path.exists(self.socket_dir):
+            import shutil
+            shutil.rmtree(self.socket_dir, ignore_errors=True)
+        self.socket_dir = None
+        self.socket_path = None
+
+    def run(self, code, test_input, timeout, cwd=None, bytecode=None, limits=None):
+        """
+        Run one test case in a forked child.
+        Returns: result record (see harness.run_case)
+        """
+        return self.run_batch(code, [test_input], timeout, cwd, bytecode, limits)[0]
+
+    def run_batch(self, code, test_inputs, timeout, cwd=None, bytecode=None, limits=None):
+        """Blocking wrapper around run_batch_async"""
+        return asyncio.run(self.run_batch_async(code, test_inputs, timeout, cwd, bytecode, limits))
+
+    async def run_batch_async(self, code, test_inputs, timeout, cwd=None, bytecode=None, limits=None):
+        """
+        Run all test cases in a single forked child, each with its own
+        time limit. Stops after the first failing test. `bytecode` is the
+        marshalled code object, which saves the child compiling the source;
+        `limits` are the per-test CPU and memory limits enforced by the harness.
+        Returns: list of result records (see harness.run_case)
+        Raises ZygoteError if the job could not be handed to the zygote.
+        """
+        writer = None
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_unix_connection(self.socket_path), STARTUP_TIMEOUT
+            )
+            child_pid = (await asyncio.wait_for(_read_msg_async(reader), STARTUP_TIMEOUT))['pid']
+            writer.write(harness.encode_frame({
+                'code': code,
+                'count': len(test_inputs),
+                'cwd': cwd,
+                'bytecode': base64.b64encode(bytecode).decode('ascii') if bytecode else None,
+                'limits': limits
+            }))
+            await writer.drain()
+        except (OSError, EOFError, ValueError, asyncio.TimeoutError) as e:
+            if writer is not None:
+                writer.close()
+            raise ZygoteError(f"Zygote unavailable: {e}")
+
+        sender = asyncio.ensure_future(_send_inputs_async(writer, test_inputs))
+        try:
+            records = []
+            max_record = harness.record_size_limit(limits)
+            while len(records) < len(test_inputs):
+                started = time.time()
+                try:
+                    record = await asyncio.wait_for(_read_msg_async(reader, max_record), timeout)
+                except asyncio.TimeoutError:
+                    _kill(child_pid)
+                    records.append(harness.failure_record(harness.TIME_LIMIT_EXCEEDED, time.time() - started))
+                    break
+                except MessageTooLarge:
+                    _kill(child_pid)
+                    records.append(harness.failure_record(harness.OUTPUT_LIMIT_EXCEEDED, time.time() - started))
+                    break
+                except (EOFError, ConnectionError):
+                    records.append(harness.failure_record('Process exited without producing a result', time.time() - started))
+                    break
+
+                records.append(record)
+                if not record['success']:
+                    break
+            return records
+        except asyncio.CancelledError:
+            # The caller no longer needs the results (see Judge._execute_tests)
+            _kill(child_pid)
+            raise
+        finally:
+            sender.cancel()
+            writer.close()
+
+
+def _kill(pid):
+    try:
+        os.kill(pid, signal.SIGKILL)
+    except OSError:
+        pass
+
+
+_zygote = None
+_zygote_lock = threading.Lock()
+
+
+def get_zygote():
+    """
+    Get the shared zygote for this process, starting it on first use.
+    Returns None if zygotes are unsupported here or the zygote cannot start.
+    """
+    global _zygote
+    if not is_supported():
+        return None
+
+    with _zygote_lock:
+        if _zygote is not None and _zygote.is_alive():
+            return _zygote
+        if _zygote is not None:
+            _zygote.stop()
+
+        zygote = PythonZygote()
+        try:
+            zygote.start()
+        except (ZygoteError, OSError) as e:
+            print(f"Python zygote unavailable, using subprocess mode: {e}", flush=True)
+            _zygote = None
+            return None
+
+        _zygote = zygote
+        return _zygote
+
+
+if __name__ == '__main__':
+    serve(sys.argv[1])
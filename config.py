@@ -28,10 +28,156 @@ SQLALCHEMY_DATABASE_URI = DATABASE_URL if DATABASE_URL else f'sqlite:///{DB_PATH
 # Problem configuration
 PROBLEMS_DIR = os.path.join(DATA_DIR, 'problems')
 TOTAL_PROBLEMS = 10
+SUPPORTED_LANGUAGES = ('python', 'java')
 
 # Execution configuration
 EXECUTION_TIMEOUT = 10  # seconds (Safe for high concurrency)
+# Default per-test limits; a problem can override them with a "limits" object in its JSON
+CPU_TIME_LIMIT = float(os.environ.get('CPU_TIME_LIMIT', '5'))  # CPU seconds per test case
+MEMORY_LIMIT_MB = int(os.environ.get('MEMORY_LIMIT_MB', '64'))  # peak memory per test case
+OUTPUT_LIMIT_KB = int(os.environ.get('OUTPUT_LIMIT_KB', '64'))  # captured stdout/stderr per test case
+# Judge a submission's test cases in up to this many concurrent executions (1 = one batch)
+JUDGE_PARALLEL_TESTS = int(os.environ.get('JUDGE_PARALLEL_TESTS', '1'))
 TEMP_DIR = os.path.join(DATA_DIR, 'temp')
+# Scratch space for compiled Java files: RAM-backed /dev/shm when available, else TEMP_DIR
+SCRATCH_DIR = os.environ.get('SCRATCH_DIR') or (
+    '/dev/shm/atc-scratch' if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK) else TEMP_DIR
+)
+
+
+def _cgroup_limit(name):
+    """Returns: the cgroup v2 limit file's fields, or None if it is missing or unlimited"""
+    try:
+        with open(os.path.join('/sys/fs/cgroup', name)) as f:
+            fields = f.read().split()
+    except OSError:
+        return None
+    return None if not fields or fields[0] == 'max' else fields
+
+
+def _available_cpus():
+    """CPU cores this container may use: cgroup quota, else CPU affinity, else the host count"""
+    quota = _cgroup_limit('cpu.max')
+    if quota is not None and len(quota) == 2:
+        return max(0.1, int(quota[0]) / int(quota[1]))
+    if hasattr(os, 'sched_getaffinity'):
+        return float(len(os.sched_getaffinity(0)))
+    return float(os.cpu_count() or 1)
+
+
+def _available_memory_mb():
+    """Memory this container may use, or None if it is not limited"""
+    limit = _cgroup_limit('memory.max')
+    return int(limit[0]) // (1024 * 1024) if limit is not None else None
+
+
+# Admission control: each execution phase reserves (CPU cores, memory MB) from these budgets
+# before starting a process. Run phases add the job's memory limit to the listed memory.
+# Warm pool JVMs keep their heap for good, so pool jobs only reserve CPU.
+# The defaults follow the container's cgroup limits; the memory budget leaves
+# ADMISSION_RESERVED_MB for the web process itself (512 MB budget when unlimited).
+ADMISSION_ENABLED = os.environ.get('ADMISSION_ENABLED', '1') == '1'
+ADMISSION_CPU_CORES = float(os.environ.get('ADMISSION_CPU_CORES', str(_available_cpus())))
+ADMISSION_RESERVED_MB = int(os.environ.get('ADMISSION_RESERVED_MB', '256'))
+ADMISSION_MEMORY_MB = int(os.environ.get('ADMISSION_MEMORY_MB') or (
+    max(128, _available_memory_mb() - ADMISSION_RESERVED_MB) if _available_memory_mb() else 512
+))
+ADMISSION_COSTS = {
+    ('python', 'run'): (0.25, 16),  # mostly short runs; a fraction of a core lets many share it
+    ('java', 'compile'): (2, 192),  # javac -J-Xmx128m plus JVM overhead
+    ('java', 'run'): (1, 64),  # JVM overhead on top of -Xmx
+    ('java', 'pool'): (1, 0),
+}
+# Threads taking run/submit jobs off the queue. The default is one more than the Python runs
+# the CPU budget admits at once (at least 4), so admission control, not the thread count,
+# is what bounds concurrent executions.
+QUEUE_WORKERS = int(os.environ.get('QUEUE_WORKERS') or max(
+    4, int(ADMISSION_CPU_CORES / ADMISSION_COSTS[('python', 'run')][0]) + 1
+))
+# Where queued jobs run: 'thread' (in the web process) or 'process' (a pool of
+# QUEUE_WORKERS processes, each replaced after QUEUE_PROCESS_MAX_JOBS jobs; the
+# admission budgets above are split evenly between them)
+QUEUE_BACKEND = os.environ.get('QUEUE_BACKEND', 'thread')
+QUEUE_PROCESS_MAX_JOBS = int(os.environ.get('QUEUE_PROCESS_MAX_JOBS', '100'))
+# Publish in-memory queue statuses to a SQLite file every web worker on the host reads,
+# so status polls work whichever gunicorn worker they reach
+QUEUE_SHARED_STATUS = os.environ.get('QUEUE_SHARED_STATUS', '1') == '1'
+QUEUE_STATUS_DB_PATH = os.environ.get('QUEUE_STATUS_DB_PATH', os.path.join(DATA_DIR, 'queue_status.db'))
+# Where queued jobs are stored: 'memory' (lost on restart) or 'sqlite' (QUEUE_DB_PATH,
+# shared by every web worker and by standalone judges: `python -m backend.durable_queue`).
+# Set QUEUE_RUN_WORKERS=0 to only enqueue from the web process and judge elsewhere.
+QUEUE_STORE = os.environ.get('QUEUE_STORE', 'memory')
+QUEUE_DB_PATH = os.environ.get('QUEUE_DB_PATH', os.path.join(DATA_DIR, 'queue.db'))
+QUEUE_RUN_WORKERS = os.environ.get('QUEUE_RUN_WORKERS', '1') == '1'
+QUEUE_LEASE_SECONDS = int(os.environ.get('QUEUE_LEASE_SECONDS', '60'))  # unrenewed leases expire after this
+QUEUE_MAX_ATTEMPTS = int(os.environ.get('QUEUE_MAX_ATTEMPTS', '3'))  # leases per job before it is failed
+# Run and submit jobs wait in separate lanes that share the queue workers in proportion
+# to these weights ("lane:weight,..."); within a lane, participants take turns.
+QUEUE_LANE_WEIGHTS = {
+    lane: int(weight) for lane, weight in
+    (item.split(':') for item in os.environ.get('QUEUE_LANE_WEIGHTS', 'submit:2,run:1').split(',') if item)
+}
+# A newer "run" of the same problem replaces the participant's older run while that one
+# is still waiting (both requests get the newer result). Identical requests are always
+# coalesced into one job.
+QUEUE_SUPERSEDE_RUNS = os.environ.get('QUEUE_SUPERSEDE_RUNS', '1') == '1'
+# Job statuses are kept QUEUE_RESULT_TTL seconds after the job finishes, and at most
+# QUEUE_RESULT_MAX of them (oldest dropped first)
+QUEUE_RESULT_TTL = int(os.environ.get('QUEUE_RESULT_TTL', '300'))
+QUEUE_RESULT_MAX = int(os.environ.get('QUEUE_RESULT_MAX', '10000'))
+# Order of pending jobs within a lane: 'fifo', or 'sjf' (shortest expected job first,
+# from the durations of past jobs for the same problem and language). Participants
+# still take one turn each per round; the order only decides who goes first in a
+# round and which of a participant's own jobs runs next. Under
+# 'sjf' each second a job has waited counts as QUEUE_AGING seconds less expected work,
+# so long jobs still get their turn.
+QUEUE_SCHEDULING = os.environ.get('QUEUE_SCHEDULING', 'fifo')
+QUEUE_AGING = float(os.environ.get('QUEUE_AGING', '1.0'))
+# /api/queue/events/<task_id> streams a job's status changes (Server-Sent Events).
+# Off by default: every open stream holds a request thread, so only enable it when the
+# server runs threaded or async workers (e.g. gunicorn --worker-class gthread --threads N
+# with N well above the expected number of participants waiting at once); otherwise the
+# contest page polls /api/queue/status.
+# Changes the serving process cannot observe directly (jobs held by another worker or
+# in the sqlite store) are picked up every QUEUE_EVENTS_POLL seconds; a comment is sent
+# after QUEUE_EVENTS_KEEPALIVE idle seconds, and streams close after QUEUE_EVENTS_TIMEOUT,
+# which stays below gunicorn's --timeout (clients then fall back to polling).
+QUEUE_EVENTS_ENABLED = os.environ.get('QUEUE_EVENTS_ENABLED', '0') == '1'
+QUEUE_EVENTS_POLL = float(os.environ.get('QUEUE_EVENTS_POLL', '1.0'))
+QUEUE_EVENTS_KEEPALIVE = 15
+QUEUE_EVENTS_TIMEOUT = int(os.environ.get('QUEUE_EVENTS_TIMEOUT', '60'))
+# Serve queue and judge metrics at /metrics (Prometheus text format, see backend/metrics.py)
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+# Reusable per-execution scratch directories (see backend/workspace.py)
+WORKSPACE_DIR = os.path.join(SCRATCH_DIR, 'workspaces')
+WORKSPACE_POOL_SIZE = int(os.environ.get('WORKSPACE_POOL_SIZE', '4'))
+WORKSPACE_JANITOR_INTERVAL = 60  # seconds between janitor sweeps
+WORKSPACE_ORPHAN_AGE = 600  # seconds before leftover scratch directories are reclaimed
+# Run Python test cases in children forked from a warm "zygote" process (POSIX only).
+# Set PYTHON_USE_ZYGOTE=0 to always launch a fresh interpreter per test case.
+PYTHON_USE_ZYGOTE = os.environ.get('PYTHON_USE_ZYGOTE', '1') == '1'
+# Content-addressed cache of compile results (bytecode, .class files and compile errors),
+# kept in SCRATCH_DIR so hits are served from RAM where /dev/shm is available
+COMPILE_CACHE_ENABLED = os.environ.get('COMPILE_CACHE_ENABLED', '1') == '1'
+COMPILE_CACHE_DIR = os.path.join(SCRATCH_DIR, 'cache', 'compile')
+COMPILE_CACHE_MAX_MB = int(os.environ.get('COMPILE_CACHE_MAX_MB', '64'))
+# Memoized verdicts for identical (problem, test data, language, code) runs and submissions.
+# Set VERDICT_CACHE_PERSIST=1 to keep them across restarts in VERDICT_CACHE_FILE. It is on
+# by default with QUEUE_BACKEND=process, where the file is how recycled worker processes
+# start with the verdicts found before them.
+VERDICT_CACHE_ENABLED = os.environ.get('VERDICT_CACHE_ENABLED', '1') == '1'
+VERDICT_CACHE_SIZE = int(os.environ.get('VERDICT_CACHE_SIZE', '2000'))
+VERDICT_CACHE_PERSIST = os.environ.get('VERDICT_CACHE_PERSIST', '1' if QUEUE_BACKEND == 'process' else '0') == '1'
+VERDICT_CACHE_FILE = os.path.join(DATA_DIR, 'cache', 'verdicts.json')
+# Refuse to start if no JDK is found (otherwise only a warning is logged)
+JAVA_REQUIRED = os.environ.get('JAVA_REQUIRED', '0') == '1'
+# Judge Java on a pool of warm JVM workers (compile in memory, no per-submission JVM startup).
+# Workers are recycled after JAVA_POOL_MAX_JOBS jobs or once heap usage passes JAVA_POOL_RECYCLE_HEAP_MB.
+JAVA_USE_WORKER_POOL = os.environ.get('JAVA_USE_WORKER_POOL', '0') == '1'
+JAVA_POOL_SIZE = int(os.environ.get('JAVA_POOL_SIZE', '2'))
+JAVA_POOL_MAX_JOBS = int(os.environ.get('JAVA_POOL_MAX_JOBS', '200'))
+JAVA_POOL_HEAP_MB = int(os.environ.get('JAVA_POOL_HEAP_MB', '256'))
+JAVA_POOL_RECYCLE_HEAP_MB = int(os.environ.get('JAVA_POOL_RECYCLE_HEAP_MB', '192'))
 
 # Contest configuration
 CONTEST_DURATION = 7200  # 2 hours in seconds
@@ -67,3 +213,4 @@ def get_performance_level(rank, total_participants):
 os.makedirs(DATA_DIR, exist_ok=True)
 os.makedirs(PROBLEMS_DIR, exist_ok=True)
 os.makedirs(TEMP_DIR, exist_ok=True)
+os.makedirs(SCRATCH_DIR, exist_ok=True)
@@ -371,7 +371,43 @@ function hideError() {
     document.getElementById('errorPanel').style.display = 'none';
 }
 
-// Run code
+// Helper to wait for results: status changes are pushed over Server-Sent Events
+// when the server enables them (QUEUE_EVENTS), with polling as the fallback when
+// streaming is off or unavailable, or the stream drops
+function waitForStatus(taskId, statusCallback) {
+    if (typeof QUEUE_EVENTS === 'undefined' || !QUEUE_EVENTS || !window.EventSource) {
+        return pollForStatus(taskId, statusCallback);
+    }
+
+    return new Promise((resolve, reject) => {
+        const source = new EventSource(`/api/queue/events/${taskId}`);
+
+        source.onmessage = (event) => {
+            const data = JSON.parse(event.data);
+
+            if (data.status === 'completed') {
+                source.close();
+                resolve(data.result);
+            } else if (data.status === 'failed') {
+                source.close();
+                reject(new Error(data.error || "Task failed"));
+            } else if (statusCallback) {
+                statusCallback(data.status, data.position);
+            }
+        };
+
+        source.addEventListener('not_found', () => {
+            source.close();
+            reject(new Error("Task not found"));
+        });
+
+        source.onerror = () => {
+            source.close();
+            pollForStatus(taskId, statusCallback).then(resolve, reject);
+        };
+    });
+}
+
 // Helper to poll for results
 async function pollForStatus(taskId, statusCallback) {
     const pollInterval = 1000; // 1 second
@@ -391,8 +427,8 @@ async function pollForStatus(taskId, statusCallback) {
             } else if (data.status === 'failed') {
                 throw new Error(data.error || "Task failed");
             } else {
-                // 'pending' or 'processing'
-                if (statusCallback) statusCallback(data.status);
+                // 'pending' (with its queue position) or 'processing'
+                if (statusCallback) statusCallback(data.status, data.position);
                 await new Promise(resolve => setTimeout(resolve, pollInterval));
             }
         } catch (e) {
@@ -510,7 +546,9 @@ document.getElementById('runBtn').addEventListener('click', async () => {
 
         if (initialResult.queued) {
             // Poll for result
-            const result = await pollForStatus(initialResult.task_id);
+            const result = await waitForStatus(initialResult.task_id, (status, position) => {
+                showResult(position ? `Queued (position ${position})...` : 'Running...', 'info');
+            });
 
             // Handle final result
             if (result.success) {
@@ -685,7 +723,9 @@ document.getElementById('submitBtn').addEventListener('click', async () => {
         }
 
         if (initialResult.queued) {
-            const result = await pollForStatus(initialResult.task_id);
+            const result = await waitForStatus(initialResult.task_id, (status, position) => {
+                showResult(position ? `Queued (position ${position})...` : 'Judging...', 'info');
+            });
 
             if (result.success) {
                 if (result.verdict === 'Accepted') {
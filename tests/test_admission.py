@@ -0,0 +1,100 @@
+import unittest
+import asyncio
+import os
+import sys
+import threading
+from unittest import mock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from backend.admission import AdmissionController
+
+COSTS = {('python', 'run'): (1, 16), ('java', 'compile'): (2, 192)}
+
+
+class TestAdmissionController(unittest.TestCase):
+    def setUp(self):
+        self.controller = AdmissionController(cpu_cores=2, memory_mb=256, costs=COSTS)
+
+    def test_costs_are_weighted_and_clamped(self):
+        self.assertEqual(self.controller.cost('Python', 'run', 64), (1, 80))
+        self.assertEqual(self.controller.cost('java', 'compile'), (2, 192))
+        self.assertEqual(self.controller.cost('java', 'compile', 512), (2, 256))
+
+    def test_grants_in_arrival_order_within_budget(self):
+        async def scenario():
+            order = []
+
+            async def job(name, language, phase):
+                async with await self.controller.admit(language, phase):
+                    order.append(name)
+                    await asyncio.sleep(0.05)
+
+            first = asyncio.ensure_future(job('py1', 'python', 'run'))
+            await asyncio.sleep(0)
+            # The compile needs both cores, so the second Python run queues behind it
+            others = [asyncio.ensure_future(job('javac', 'java', 'compile')),
+                      asyncio.ensure_future(job('py2', 'python', 'run'))]
+            await asyncio.sleep(0.01)
+            self.assertEqual(self.controller.snapshot()['waiting'], 2)
+            await asyncio.gather(first, *others)
+            return order
+
+        self.assertEqual(asyncio.run(scenario()), ['py1', 'javac', 'py2'])
+        self.assertEqual(self.controller.snapshot()['cpu_used'], 0)
+        self.assertEqual(self.controller.snapshot()['memory_used'], 0)
+
+    def test_cancelled_waiter_gives_up_its_place(self):
+        async def scenario():
+            held = await self.controller.admit('java', 'compile')
+            waiter = asyncio.ensure_future(self.controller.admit('java', 'compile'))
+            await asyncio.sleep(0.01)
+            waiter.cancel()
+            await asyncio.sleep(0.01)
+            held.release()
+
+        asyncio.run(scenario())
+        self.assertEqual(self.controller.snapshot(),
+                         {'cpu_cores': 2, 'cpu_used': 0, 'memory_mb': 256, 'memory_used': 0, 'waiting': 0})
+
+    def test_release_wakes_waiters_on_other_threads(self):
+        held = self.controller.admit_blocking('java', 'compile')
+        admitted = threading.Event()
+
+        def worker():
+            with self.controller.admit_blocking('python', 'run'):
+                admitted.set()
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        self.assertFalse(admitted.wait(0.05))
+        held.release()
+        self.assertTrue(admitted.wait(2))
+        thread.join()
+
+
+
+class TestDefaultBudgets(unittest.TestCase):
+    def test_cpu_and_memory_follow_cgroup_limits(self):
+        with mock.patch('builtins.open', mock.mock_open(read_data='50000 100000\n')):
+            self.assertEqual(config._available_cpus(), 0.5)
+        with mock.patch('builtins.open', mock.mock_open(read_data='536870912\n')):
+            self.assertEqual(config._available_memory_mb(), 512)
+        with mock.patch('builtins.open', mock.mock_open(read_data='max\n')):
+            self.assertIsNone(config._available_memory_mb())
+
+    def test_python_runs_share_a_fractional_core(self):
+        # A 0.5-core container (cpu.max 50000 100000) still runs Python jobs side by side
+        controller = AdmissionController(cpu_cores=0.5, memory_mb=256)
+        self.assertEqual(controller.cost('python', 'run', 64), (0.25, 80))
+        self.assertEqual(controller.cost('java', 'compile'), (0.5, 192))
+        first = controller.admit_blocking('python', 'run', 64)
+        second = controller.admit_blocking('python', 'run', 64)
+        self.assertEqual(controller.snapshot()['cpu_used'], 0.5)
+        first.release()
+        second.release()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import os
+import sys
+import time
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.compile_cache import CompileCache, _entry_size
+
+
+class TestCompileCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = CompileCache(tempfile.mkdtemp(), max_bytes=1000)
+
+    def test_key_depends_on_language_source_and_version(self):
+        key = CompileCache.key('python', 'x = 1', 'v1')
+        self.assertEqual(key, CompileCache.key('python', 'x = 1', 'v1'))
+        self.assertNotEqual(key, CompileCache.key('java', 'x = 1', 'v1'))
+        self.assertNotEqual(key, CompileCache.key('python', 'x = 2', 'v1'))
+        self.assertNotEqual(key, CompileCache.key('python', 'x = 1', 'v2'))
+
+    def test_stores_artifacts_and_errors(self):
+        self.assertIsNone(self.cache.get('a'))
+        self.cache.put('a', files={'Main.class': b'\xca\xfe'})
+        self.cache.put('b', error='Solution.java:1: error')
+
+        entry = self.cache.get('a')
+        self.assertIsNone(entry.error)
+        self.assertEqual(entry.read('Main.class'), b'\xca\xfe')
+        self.assertEqual(self.cache.get('b').error, 'Solution.java:1: error')
+
+    def test_evicts_least_recently_used(self):
+        self.cache.put('old', files={'a': b'x' * 400})
+        self.cache.put('used', files={'a': b'x' * 400})
+        past = time.time() - 100
+        os.utime(os.path.join(self.cache.root, 'old'), (past, past))
+        os.utime(os.path.join(self.cache.root, 'used'), (past + 1, past + 1))
+        self.cache.get('used')  # Refreshes 'used'
+
+        self.cache.put('new', files={'a': b'x' * 400})
+
+        self.assertIsNone(self.cache.get('old'))
+        self.assertIsNotNone(self.cache.get('used'))
+        self.assertIsNotNone(self.cache.get('new'))
+        self.assertLessEqual(self.cache.total_bytes, 1000)
+
+    def test_error_only_entries_count_towards_the_cap(self):
+        for i in range(40):
+            self.cache.put(f'error{i}', error='Syntax Error: invalid syntax (Line 1)')
+
+        entries = [name for name in os.listdir(self.cache.root) if not name.startswith('.tmp-')]
+        self.assertLess(len(entries), 40)
+        self.assertEqual(self.cache.total_bytes, sum(_entry_size(os.path.join(self.cache.root, name)) for name in entries))
+        self.assertLessEqual(self.cache.total_bytes, 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
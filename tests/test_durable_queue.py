@@ -0,0 +1,83 @@
+import unittest
+import operator
+import os
+import socket
+import sys
+import sqlite3
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.durable_queue import DurableJobQueue
+
+
+class TestDurableJobQueue(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'queue.db')
+        # Enqueue-only, like a web process whose judges run elsewhere
+        self.producer = DurableJobQueue(max_concurrent=0, path=self.path, lane_weights={})
+
+    def wait_for(self, job_queue, task_id):
+        deadline = time.time() + 10
+        while time.time() < deadline:
+            status = job_queue.get_status(task_id)
+            if status['status'] in ('completed', 'failed'):
+                return status
+            time.sleep(0.05)
+        self.fail(f"job did not finish: {status}")
+
+    def test_jobs_survive_until_a_consumer_starts(self):
+        task_id = self.producer.add_job('submit', operator.add, 2, 3)
+        self.assertEqual(self.producer.get_status(task_id)['status'], 'pending')
+        self.assertEqual(self.producer.get_status(task_id)['position'], 1)
+
+        DurableJobQueue(max_concurrent=2, path=self.path)
+        status = self.wait_for(self.producer, task_id)
+        self.assertEqual(status['status'], 'completed')
+        self.assertEqual(status['result'], 5)
+        self.assertIsNone(self.producer.get_status('missing'))
+
+    def test_duplicates_share_a_job_and_newer_runs_supersede(self):
+        first = self.producer.add_job('submit', operator.add, 1, 1, owner=7, dedupe_key='h1')
+        repeat = self.producer.add_job('submit', operator.add, 1, 1, owner=7, dedupe_key='h1')
+        old_run = self.producer.add_job('run', operator.add, 1, 2, owner=7, supersede_key=3)
+        new_run = self.producer.add_job('run', operator.add, 1, 3, owner=7, supersede_key=3)
+        self.assertEqual(self.producer.get_status(repeat)['task_id'], first)
+        self.assertEqual(self.producer.get_status(old_run)['task_id'], new_run)
+
+        DurableJobQueue(max_concurrent=1, path=self.path)
+        self.assertEqual(self.wait_for(self.producer, repeat)['result'], 2)
+        self.assertEqual(self.wait_for(self.producer, old_run)['result'], 4)
+
+    def test_expired_leases_are_retried_then_failed(self):
+        retried = self.producer.add_job('submit', operator.add, 1, 1)
+        abandoned = self.producer.add_job('submit', operator.add, 2, 2)
+        db = sqlite3.connect(self.path, isolation_level=None)
+        db.execute("UPDATE jobs SET state = 'leased', lease_owner = 'elsewhere:1', lease_expires = ?, attempts = 1",
+                   (time.time() - 1,))
+        db.execute("UPDATE jobs SET attempts = 3 WHERE id = ?", (abandoned,))
+        db.close()
+
+        DurableJobQueue(max_concurrent=1, path=self.path)
+        self.assertEqual(self.wait_for(self.producer, retried)['result'], 2)
+        self.assertEqual(self.wait_for(self.producer, abandoned)['status'], 'failed')
+
+    def test_leases_of_an_earlier_process_with_our_pid_are_reclaimed(self):
+        task_id = self.producer.add_job('submit', operator.add, 2, 2)
+        # What a restarted container's previous worker (same host name and pid) leaves behind
+        db = sqlite3.connect(self.path, isolation_level=None)
+        db.execute("UPDATE jobs SET state = 'leased', lease_owner = ?, lease_expires = ?, attempts = 1",
+                   (f'{socket.gethostname()}:{os.getpid()}:previous', time.time() + 3600))
+        db.close()
+
+        DurableJobQueue(max_concurrent=1, path=self.path)
+        self.assertEqual(self.wait_for(self.producer, task_id)['result'], 4)
+
+    def test_closures_are_rejected(self):
+        with self.assertRaises(ValueError):
+            self.producer.add_job('run', lambda: None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,372 @@
+import unittest
+import asyncio
+import json
+import time
+import sys
+import os
+import struct
+import io
+import queue
+import shutil
+from unittest import mock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from backend import zygote
+from backend import java_pool
+from backend.java_pool import JavaWorker, JavaWorkerPool
+from backend.executor import PythonExecutor, JavaExecutor, JavaPoolExecutor
+from backend.judge import Judge
+
+TWO_SUM = """
+def solution(nums, target):
+    seen = {}
+    for i, num in enumerate(nums):
+        if target - num in seen:
+            return [seen[target - num], i]
+        seen[num] = i
+    return []
+"""
+
+
+class PythonExecutorTests(object):
+    """Behaviour shared by every Python execution mode"""
+    use_zygote = None
+
+    def make_executor(self, timeout=5, **limits):
+        return PythonExecutor(timeout=timeout, use_zygote=self.use_zygote, **limits)
+
+    def test_returns_json_result(self):
+        success, output, error, _ = self.make_executor().execute(TWO_SUM, {"nums": [2, 7, 11, 15], "target": 9})
+        self.assertTrue(success, error)
+        self.assertEqual(json.loads(output), [0, 1])
+
+    def test_runtime_error(self):
+        code = "def solution(x):\n    raise ValueError('boom')\n"
+        success, output, error, _ = self.make_executor().execute(code, {"x": 1})
+        self.assertFalse(success)
+        self.assertIn('boom', error)
+
+    def test_syntax_error(self):
+        success, _, error, _ = self.make_executor().execute("def solution(:\n", {})
+        self.assertFalse(success)
+        self.assertTrue(error.startswith('Syntax Error'))
+
+    def test_time_limit(self):
+        code = "def solution():\n    while True:\n        pass\n"
+        success, _, error, _ = self.make_executor(timeout=1).execute(code, {})
+        self.assertFalse(success)
+        self.assertEqual(error, 'Time Limit Exceeded')
+
+    def test_reports_cpu_time_and_memory(self):
+        result = self.make_executor().execute(TWO_SUM, {"nums": [2, 7, 11, 15], "target": 9})
+        self.assertTrue(result[0], result[2])
+        self.assertGreaterEqual(result.cpu_time, 0.0)
+        self.assertGreaterEqual(result.memory, 0)
+
+    def test_cpu_time_limit(self):
+        code = "def solution():\n    while True:\n        pass\n"
+        result = self.make_executor(timeout=10, cpu_time_limit=1).execute(code, {})
+        self.assertFalse(result[0])
+        self.assertEqual(result[2], 'Time Limit Exceeded')
+        self.assertLess(result[3], 5)
+
+    def test_memory_limit(self):
+        code = "def solution():\n    data = bytearray(256 * 1024 * 1024)\n    return len(data)\n"
+        success, _, error, _ = self.make_executor(memory_limit_mb=32).execute(code, {})
+        self.assertFalse(success)
+        self.assertEqual(error, 'Memory Limit Exceeded')
+
+    @unittest.skipUnless(os.path.exists('/proc/self/clear_refs'), "per-test peak memory needs Linux")
+    def test_memory_is_per_test_not_batch_peak(self):
+        code = "def solution(mb):\n    data = bytearray(mb * 1024 * 1024)\n    return len(data)\n"
+        results = self.make_executor(memory_limit_mb=128).execute_batch(code, [{"mb": 40}, {"mb": 1}, {"mb": 1}])
+        self.assertTrue(all(r[0] for r in results), results)
+        self.assertGreater(results[0].memory, 30 * 1024 * 1024)
+        self.assertLess(results[2].memory, 10 * 1024 * 1024)
+
+    def test_output_limit(self):
+        code = "def solution():\n    while True:\n        print('spam' * 100)\n"
+        result = self.make_executor(timeout=10, output_limit_kb=16).execute(code, {})
+        self.assertFalse(result[0])
+        self.assertEqual(result[2], 'Output Limit Exceeded')
+
+    def test_output_limit_cannot_be_swallowed(self):
+        code = ("def solution():\n"
+                "    try:\n"
+                "        print('x' * 100000)\n"
+                "    except BaseException:\n"
+                "        pass\n"
+                "    return 1\n")
+        success, _, error, _ = self.make_executor(output_limit_kb=16).execute(code, {})
+        self.assertFalse(success)
+        self.assertEqual(error, 'Output Limit Exceeded')
+
+    def test_large_return_value_is_not_output(self):
+        code = "def solution(n):\n    return list(range(n))\n"
+        success, output, error, _ = self.make_executor(output_limit_kb=16).execute(code, {"n": 20000})
+        self.assertTrue(success, error)
+        self.assertEqual(json.loads(output), list(range(20000)))
+
+    def test_batch_returns_one_result_per_test(self):
+        inputs = [{"nums": [2, 7, 11, 15], "target": 9}, {"nums": [3, 2, 4], "target": 6}]
+        results = self.make_executor().execute_batch(TWO_SUM, inputs)
+        self.assertEqual([json.loads(r[1]) for r in results], [[0, 1], [1, 2]])
+        self.assertTrue(all(r[0] for r in results))
+
+    def test_batch_stops_at_first_failure(self):
+        code = "def solution(x):\n    if x == 2:\n        raise ValueError('bad')\n    return x\n"
+        results = self.make_executor().execute_batch(code, [{"x": 1}, {"x": 2}, {"x": 3}])
+        self.assertEqual(len(results), 2)
+        self.assertTrue(results[0][0])
+        self.assertFalse(results[1][0])
+        self.assertIn('bad', results[1][2])
+
+    def test_batch_time_limit_is_per_test(self):
+        code = "import time\ndef solution(x):\n    time.sleep(x)\n    return x\n"
+        results = self.make_executor(timeout=1).execute_batch(code, [{"x": 0.6}, {"x": 0.6}, {"x": 5}])
+        self.assertEqual([r[0] for r in results], [True, True, False])
+        self.assertEqual(results[2][2], 'Time Limit Exceeded')
+
+    def test_batch_streams_large_inputs(self):
+        code = "def solution(nums):\n    if nums[0] < 0:\n        raise ValueError('negative')\n    return sum(nums)\n"
+        big = [1] * 200000
+        results = self.make_executor().execute_batch(code, [{"nums": big}, {"nums": [-1] + big}, {"nums": big}])
+        self.assertEqual(len(results), 2)
+        self.assertEqual(json.loads(results[0][1]), 200000)
+        self.assertIn('negative', results[1][2])
+
+    def test_async_executions_run_concurrently(self):
+        code = "import time\ndef solution(x):\n    time.sleep(0.5)\n    return x\n"
+        executor = self.make_executor()
+
+        async def run_all():
+            return await asyncio.gather(*[executor.execute_async(code, {"x": i}) for i in range(8)])
+
+        started = time.time()
+        # The engine itself must not serialize runs; the admission budget depends on the host
+        with mock.patch.object(config, 'ADMISSION_ENABLED', False):
+            results = asyncio.run(run_all())
+        self.assertLess(time.time() - started, 3)
+        self.assertEqual([json.loads(r[1]) for r in results], list(range(8)))
+
+
+class TestSubprocessMode(PythonExecutorTests, unittest.TestCase):
+    use_zygote = False
+
+
+@unittest.skipUnless(zygote.is_supported(), "zygote requires fork() and unix sockets")
+class TestZygoteMode(PythonExecutorTests, unittest.TestCase):
+    use_zygote = True
+
+    def test_starting_the_zygote_does_not_block_the_event_loop(self):
+        def slow_start():
+            time.sleep(0.5)
+            return None  # Unavailable: falls back to a subprocess
+
+        async def run_and_tick():
+            ticks = []
+
+            async def tick():
+                while len(ticks) < 5:
+                    ticks.append(time.time())
+                    await asyncio.sleep(0.05)
+
+            await asyncio.gather(tick(), self.make_executor().execute_async(TWO_SUM, {"nums": [1, 2], "target": 3}))
+            return ticks
+
+        with mock.patch.object(zygote, 'get_zygote', slow_start):
+            ticks = asyncio.run(run_and_tick())
+        self.assertLess(ticks[-1] - ticks[0], 0.45)
+
+    def test_namespace_is_clean_between_runs(self):
+        executor = self.make_executor()
+        executor.execute("LEAK = 1\ndef solution():\n    return 0\n", {})
+        success, output, error, _ = executor.execute("def solution():\n    return 'LEAK' in globals()\n", {})
+        self.assertTrue(success, error)
+        self.assertEqual(json.loads(output), False)
+
+
+JAVA_TWO_SUM = """
+class Solution {
+    public int[] solution(int[] nums, int target) {
+        Map<Integer, Integer> seen = new HashMap<>();
+        for (int i = 0; i < nums.length; i++) {
+            if (seen.containsKey(target - nums[i])) {
+                return new int[] {seen.get(target - nums[i]), i};
+            }
+            seen.put(nums[i], i);
+        }
+        return new int[0];
+    }
+}
+"""
+
+JAVA_REVERSE = """
+class Solution {
+    public void solution(char[] s) {
+        for (int i = 0, j = s.length - 1; i < j; i++, j--) {
+            char c = s[i];
+            s[i] = s[j];
+            s[j] = c;
+        }
+    }
+}
+"""
+
+
+class JavaExecutorTests(object):
+    """Behaviour shared by both Java execution modes (needs a JDK)"""
+    executor_class = None
+
+    def make_executor(self, timeout=10, **limits):
+        return self.executor_class(timeout=timeout, **limits)
+
+    def test_accepted(self):
+        success, output, error, _ = self.make_executor().execute(JAVA_TWO_SUM, {"nums": [2, 7, 11, 15], "target": 9})
+        self.assertTrue(success, error)
+        self.assertEqual(json.loads(output), [0, 1])
+
+    def test_compile_error(self):
+        success, _, error, _ = self.make_executor().execute("class Solution {\n    int solution( {\n}\n", {})
+        self.assertFalse(success)
+        self.assertTrue(error.startswith('Compilation Error'), error)
+
+    def test_time_limit(self):
+        code = "class Solution {\n    public int solution() {\n        while (true) { }\n    }\n}\n"
+        success, _, error, _ = self.make_executor(timeout=5, cpu_time_limit=1).execute(code, {})
+        self.assertFalse(success)
+        self.assertEqual(error, 'Time Limit Exceeded')
+
+    def test_memory_limit(self):
+        code = "class Solution {\n    public int solution() {\n        return new long[400000000].length;\n    }\n}\n"
+        success, _, error, _ = self.make_executor(memory_limit_mb=64).execute(code, {})
+        self.assertFalse(success)
+        self.assertEqual(error, 'Memory Limit Exceeded')
+
+    def test_output_limit(self):
+        code = ("class Solution {\n    public int solution() {\n"
+                "        for (int i = 0; i < 100000; i++) System.out.println(\"spam spam spam\");\n"
+                "        return 0;\n    }\n}\n")
+        success, _, error, _ = self.make_executor(output_limit_kb=16).execute(code, {})
+        self.assertFalse(success)
+        self.assertEqual(error, 'Output Limit Exceeded')
+
+    def test_void_solution_reports_first_argument(self):
+        success, output, error, _ = self.make_executor().execute(JAVA_REVERSE, {"s": ["h", "e", "y"]})
+        self.assertTrue(success, error)
+        self.assertEqual(json.loads(output), ["y", "e", "h"])
+
+    def test_judges_an_in_place_problem(self):
+        with mock.patch.object(config, 'JAVA_USE_WORKER_POOL', self.executor_class is JavaPoolExecutor):
+            verdict, score, details = Judge().judge_submission(2, JAVA_REVERSE, 'java')
+        self.assertEqual(verdict, Judge.VERDICT_ACCEPTED, details)
+
+
+@unittest.skipUnless(shutil.which('javac'), "needs a JDK")
+class TestJavaJvmMode(JavaExecutorTests, unittest.TestCase):
+    executor_class = JavaExecutor
+
+
+@unittest.skipUnless(shutil.which('javac'), "needs a JDK")
+class TestJavaPoolMode(JavaExecutorTests, unittest.TestCase):
+    executor_class = JavaPoolExecutor
+
+    def make_pool(self, **options):
+        shared = java_pool.get_pool()
+        self.assertIsNotNone(shared)
+        pool = JavaWorkerPool(shared.toolchain, shared.classpath, size=1, **options)
+        self.addCleanup(pool.shutdown)
+        return pool
+
+    def run_job(self, pool, code, test_input):
+        executor = JavaPoolExecutor()
+        source = executor._build_source(code)
+        return pool.run(source, executor._encode_inputs([test_input]), 1, 10, executor.limits)
+
+    def test_workers_are_recycled_after_max_jobs(self):
+        pool = self.make_pool(max_jobs=2)
+        pids = []
+        for _ in range(3):
+            records = self.run_job(pool, JAVA_TWO_SUM, {"nums": [3, 3], "target": 6})
+            self.assertTrue(records[0]['success'], records)
+            pids.append(pool.idle.queue[0].process.pid if pool.idle.qsize() else None)
+        # Kept after the first job, stopped after the second, a new worker for the third
+        self.assertIsNotNone(pids[0])
+        self.assertIsNone(pids[1])
+        self.assertNotEqual(pids[2], pids[0])
+
+    def test_worker_with_leftover_threads_is_retired(self):
+        code = ("class Solution {\n    public int solution() {\n"
+                "        new Thread(() -> { while (true) { } }).start();\n"
+                "        return 1;\n    }\n}\n")
+        pool = self.make_pool()
+        records = self.run_job(pool, code, {})
+        self.assertTrue(records[0]['success'], records)
+        self.assertTrue(pool.idle.empty())
+
+
+class TestJavaInputEncoding(unittest.TestCase):
+    """The binary stream read by the Java harness (no JDK needed)"""
+
+    def test_encodes_tagged_values(self):
+        data = JavaExecutor()._encode_inputs([{"nums": [5, -1], "grid": [[1], [2, 3]], "ok": True}])
+        expected = struct.pack('>ii', 1, 3)
+        expected += struct.pack('>ciii', b'A', 2, 5, -1)
+        expected += struct.pack('>ci', b'M', 2) + struct.pack('>ii', 1, 1) + struct.pack('>iii', 2, 2, 3)
+        expected += struct.pack('>c?', b'Z', True)
+        self.assertEqual(data, expected)
+
+    def test_empty_list_type_follows_param_name(self):
+        executor = JavaExecutor()
+        self.assertEqual(executor._encode_value([], param_name='s'), struct.pack('>ci', b'C', 0))
+        self.assertEqual(executor._encode_value([], param_name='lists'), struct.pack('>ci', b'M', 0))
+
+
+
+class TestJavaPoolRecords(unittest.TestCase):
+    """Record lines read from a pool worker's stdout (no JDK needed)"""
+
+    def make_worker(self, stdout, max_record):
+        worker = JavaWorker.__new__(JavaWorker)
+        worker.process = mock.Mock(stdout=io.StringIO(stdout))
+        worker.max_record = max_record
+        return worker
+
+    def test_reads_whole_lines(self):
+        worker = self.make_worker('x' * 200000 + '\n{}\n', 300000)
+        self.assertEqual(worker._read_line(), ('x' * 200000 + '\n', False))
+        self.assertEqual(worker._read_line(), ('{}\n', False))
+        self.assertEqual(worker._read_line(), ('', False))
+
+    def test_line_past_the_current_limit_overflows(self):
+        worker = self.make_worker('x' * 200000 + '\n', 100000)
+        self.assertEqual(worker._read_line(), ('', True))
+
+    def test_ignores_foreign_end_markers_and_retires_on_leftover_threads(self):
+        worker = JavaWorker.__new__(JavaWorker)
+        worker.process = mock.Mock(stdin=io.StringIO())
+        worker.process.poll.return_value = None
+        worker.jobs = 0
+        worker.records = queue.Queue()
+        # A thread of the job prints a fake end marker before the worker's own
+        for record in ({'success': True, 'output': '1', 'error': '', 'time': 0},
+                       {'done': True, 'heap': 0},
+                       {'success': True, 'output': '2', 'error': '', 'time': 0},
+                       {'done': 'job', 'heap': 0, 'threads': 1}):
+            worker.records.put(record)
+
+        with mock.patch('backend.java_pool.secrets.token_hex', return_value='job'):
+            records = worker.run('', b'', 2, 1, {'cpu_time': 1, 'memory_mb': 64, 'output_kb': 64})
+        self.assertEqual([record['output'] for record in records], ['1', '2'])
+        self.assertTrue(worker.process.stdin.getvalue().startswith('JOB job '))
+
+        pool = JavaWorkerPool(None, None, size=1)
+        pool._release(worker)
+        worker.process.kill.assert_called_once_with()
+        self.assertTrue(pool.idle.empty())
+
+
+if __name__ == '__main__':
+    unittest.main()
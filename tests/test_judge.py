@@ -0,0 +1,115 @@
+import unittest
+import asyncio
+import os
+import sys
+import types
+from unittest import mock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from backend import executor as executor_module
+from backend.executor import ExecutionResult, JavaExecutor
+from backend.judge import Judge
+
+
+class FakeExecutor(object):
+    """Tests are (value, delay) pairs; a negative value fails. A slice takes its first test's delay."""
+
+    def __init__(self):
+        self.cancelled = 0
+
+    async def prepare_async(self, code):
+        return None, None
+
+    async def execute_batch_async(self, code, test_inputs, prepared=None):
+        try:
+            await asyncio.sleep(test_inputs[0]['delay'])
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        results = []
+        for test_input in test_inputs:
+            ok = test_input['x'] >= 0
+            results.append(ExecutionResult(ok, str(test_input['x']) if ok else '', '' if ok else 'boom', 0.0))
+            if not ok:
+                break
+        return results
+
+
+class TestParallelTests(unittest.TestCase):
+    def setUp(self):
+        self.original = config.JUDGE_PARALLEL_TESTS
+        config.JUDGE_PARALLEL_TESTS = 4
+        self.executor = FakeExecutor()
+
+    def tearDown(self):
+        config.JUDGE_PARALLEL_TESTS = self.original
+
+    def run_tests(self, tests):
+        inputs = [{'x': x, 'delay': delay} for x, delay in tests]
+        return asyncio.run(Judge()._execute_tests(self.executor, '', inputs))
+
+    def test_all_pass_in_order(self):
+        results = self.run_tests([(x, 0.01 * (8 - x)) for x in range(8)])
+        self.assertEqual([r[1] for r in results], [str(x) for x in range(8)])
+
+    def test_reports_lowest_failing_test(self):
+        # Slices [0, 1] [2, -3] [4, 5] [6, -7]: the later failure finishes first
+        results = self.run_tests([(0, 0.3), (1, 0), (2, 0.2), (-3, 0), (4, 0.3), (5, 0), (6, 0), (-7, 0)])
+        self.assertEqual(len(results), 4)
+        self.assertEqual(results[-1][2], 'boom')
+        self.assertTrue(all(r[0] for r in results[:-1]))
+
+    def test_cancels_slices_after_a_failure(self):
+        results = self.run_tests([(-1, 0), (1, 0), (2, 5), (3, 0), (4, 5), (5, 0), (6, 5), (7, 0)])
+        self.assertEqual(len(results), 1)
+        self.assertEqual(self.executor.cancelled, 3)
+
+
+
+# Stands in for `java ... Main`: one record per test, passing only if the compiled class was copied in
+FAKE_JVM = (
+    "import json, os\n"
+    "ok = os.path.exists('Main.class')\n"
+    "for _ in range(100):\n"
+    "    print(json.dumps({'success': ok, 'output': 'ran', 'error': '' if ok else 'no class', 'time': 0}))\n"
+)
+
+
+class CountingJavaExecutor(JavaExecutor):
+    """Skips javac: "compiling" writes a Main.class and is counted"""
+
+    compiles = 0
+
+    async def _compile_into(self, temp_dir, code, start_time, admissions):
+        self.compiles += 1
+        with open(os.path.join(temp_dir, 'Main.class'), 'wb') as f:
+            f.write(b'compiled')
+        return executor_module.get_java_toolchain(), None
+
+
+class TestParallelJavaTests(unittest.TestCase):
+    def setUp(self):
+        self.original = config.JUDGE_PARALLEL_TESTS
+        config.JUDGE_PARALLEL_TESTS = 4
+        # The Python interpreter takes the JVM's place (it ignores the -Xmx option)
+        toolchain = types.SimpleNamespace(java=sys.executable, javac='javac', version='fake', run_flags=['-c', FAKE_JVM])
+        patcher = mock.patch.object(executor_module, 'get_java_toolchain', return_value=toolchain)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        config.JUDGE_PARALLEL_TESTS = self.original
+
+    def test_compiles_once_and_runs_every_slice(self):
+        executor = CountingJavaExecutor()
+        results = asyncio.run(Judge()._execute_tests(executor, 'class Solution {}', [{'x': x} for x in range(8)]))
+
+        self.assertEqual(executor.compiles, 1)
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(result[0] for result in results), results)
+
+
+if __name__ == '__main__':
+    unittest.main()
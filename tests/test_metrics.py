@@ -0,0 +1,69 @@
+import unittest
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import metrics
+from backend.metrics import Registry
+from backend.queue_manager import JobQueue
+
+
+class TestHistogram(unittest.TestCase):
+    def test_buckets_are_cumulative_with_bounded_error(self):
+        registry = Registry()
+        latency = registry.histogram('latency_seconds', 'Latency', ('language',))
+        latency.observe(0.0105, 'python')
+        latency.observe(0.5, 'python')
+        latency.observe(5000, 'python')
+
+        lines = registry.render().splitlines()
+        buckets = [line for line in lines if line.startswith('latency_seconds_bucket')]
+        counts = [int(line.rsplit(' ', 1)[1]) for line in buckets]
+        self.assertEqual(counts, sorted(counts))
+        self.assertEqual(buckets[-1], 'latency_seconds_bucket{language="python",le="+Inf"} 3')
+        self.assertIn('latency_seconds_count{language="python"} 3', lines)
+
+        # The first bucket holding the 10.5 ms sample is within one sub-bucket of it
+        first = next(line for line, count in zip(buckets, counts) if count)
+        bound = float(first.split('le="')[1].split('"')[0])
+        self.assertTrue(0.0105 <= bound < 0.0105 * 2 ** (1 / metrics.BUCKETS_PER_OCTAVE))
+
+    def test_drained_values_merge_into_another_registry(self):
+        child, parent = Registry(), Registry()
+        for registry in (child, parent):
+            registry.counter('jobs_total', 'Jobs', ('outcome',))
+            registry.histogram('compile_seconds', 'Compile', ('language',))
+        child.metrics['jobs_total'].inc('completed')
+        child.metrics['compile_seconds'].observe(0.2, 'java')
+
+        parent.merge(child.drain())
+        parent.merge(child.drain())  # Already drained: adds nothing
+
+        rendered = parent.render()
+        self.assertIn('jobs_total{outcome="completed"} 1', rendered)
+        self.assertIn('compile_seconds_count{language="java"} 1', rendered)
+        self.assertNotIn('completed', child.render())
+
+
+class TestQueueMetrics(unittest.TestCase):
+    def test_jobs_record_wait_execution_and_depth(self):
+        job_queue = JobQueue(max_concurrent=1, lane_weights={})
+
+        task_id = job_queue.add_job('metrics-test', time.sleep, 0.2, profile=(7, 'Python'))
+        job_queue.add_job('metrics-test', time.sleep, 0.2, profile=(7, 'Python'))
+        time.sleep(0.1)
+        self.assertEqual(job_queue.depth(), {('metrics-test', 'pending'): 1, ('metrics-test', 'processing'): 1})
+
+        # Metrics are recorded right after the status turns 'completed'
+        deadline = time.time() + 5
+        while ('metrics-test', 'python', '7') not in metrics.TOTAL.values and time.time() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(job_queue.get_status(task_id)['status'], 'completed')
+        self.assertIn('judge_queue_wait_seconds_bucket{task_type="metrics-test",language="python"',
+                      metrics.REGISTRY.render())
+
+
+if __name__ == '__main__':
+    unittest.main()
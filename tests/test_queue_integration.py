@@ -1,7 +1,9 @@
 import unittest
 import time
 import json
-from app import app, job_queue
+from unittest import mock
+import config
+from app import app, job_queue, _job_profile
 
 class TestQueueSystem(unittest.TestCase):
     def setUp(self):
@@ -77,5 +79,54 @@ class TestQueueSystem(unittest.TestCase):
             
         self.assertTrue(completed, f"Task did not complete. Final status: {final_result}")
 
+    def test_runs_without_a_session_are_not_shared(self):
+        """Anonymous callers (e.g. behind one NAT) take turns by address but never get each other's runs"""
+        data = {'problem_id': 1, 'code': 'def solution(nums, target):\n    return [0, 1]\n# anon', 'language': 'python'}
+        with mock.patch.object(job_queue, 'add_job', wraps=job_queue.add_job) as add_job:
+            first = self.client.post('/api/run', json=data).get_json()['task_id']
+            second = self.client.post('/api/run', json=data).get_json()['task_id']
+        
+        self.assertEqual(job_queue.get_status(first)['task_id'], first)
+        self.assertEqual(job_queue.get_status(second)['task_id'], second)
+        kwargs = add_job.call_args.kwargs
+        self.assertEqual(kwargs['owner'], 'ip:127.0.0.1')
+        self.assertIsNone(kwargs['dedupe_key'])
+        self.assertIsNone(kwargs['supersede_key'])
+
+    def test_events_stream_until_completed(self):
+        """Test /api/queue/events streams status changes and ends with the result"""
+        task_id = job_queue.add_job('test', time.sleep, 0.3)
+        
+        # Off by default, so sync workers are never held by a stream
+        self.assertEqual(self.client.get(f'/api/queue/events/{task_id}').status_code, 404)
+        
+        with mock.patch.object(config, 'QUEUE_EVENTS_ENABLED', True):
+            response = self.client.get(f'/api/queue/events/{task_id}')
+            body = response.get_data(as_text=True)
+            unknown = self.client.get('/api/queue/events/unknown')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        
+        events = [json.loads(line[len('data: '):]) for line in body.splitlines() if line.startswith('data: ')]
+        self.assertEqual(events[-1]['status'], 'completed')
+        self.assertEqual(len(events), len({json.dumps(event) for event in events}))
+        
+        self.assertEqual(unknown.status_code, 404)
+
+    def test_job_profiles_only_name_known_problems_and_languages(self):
+        """Client input cannot create unbounded metric series or estimator entries"""
+        self.assertEqual(_job_profile({'problem_id': 3, 'language': 'Java'}), (3, 'java'))
+        self.assertEqual(_job_profile({'problem_id': '3', 'language': 'python'}), (3, 'python'))
+        self.assertEqual(_job_profile({'problem_id': 10 ** 9, 'language': 'rust'}), ('other', 'other'))
+        self.assertEqual(_job_profile({'problem_id': 'x' * 100}), ('other', 'other'))
+
+    def test_metrics_endpoint(self):
+        """Test /metrics serves queue metrics in the Prometheus text format"""
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        body = response.get_data(as_text=True)
+        self.assertIn('# TYPE judge_total_seconds histogram', body)
+        self.assertIn('# TYPE judge_queue_jobs gauge', body)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,225 @@
+import unittest
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.queue_manager import DurationEstimator, JobQueue, job_descriptor
+from backend.status_store import SharedStatusStore
+
+
+class TestDurationEstimator(unittest.TestCase):
+    def test_falls_back_from_problem_to_language_to_task_type(self):
+        estimator = DurationEstimator(alpha=0.5, default=1.0)
+        self.assertEqual(estimator.estimate('submit', (8, 'java')), 1.0)
+
+        estimator.record('submit', (8, 'Java'), 4.0)
+        estimator.record('submit', (8, 'java'), 2.0)
+        self.assertEqual(estimator.estimate('submit', (8, 'java')), 3.0)
+        self.assertEqual(estimator.estimate('submit', (2, 'java')), 3.0)
+        self.assertEqual(estimator.estimate('submit', (2, 'python')), 3.0)
+        self.assertEqual(estimator.estimate('run', (8, 'java')), 1.0)
+
+
+class TestScheduling(unittest.TestCase):
+    def run_in_order(self, job_queue, jobs):
+        """Queue jobs behind a blocker and return the order they ran in"""
+        gate = threading.Event()
+        order = []
+        job_queue.add_job('blocker', gate.wait)
+        time.sleep(0.05)
+        for name, task_type, profile in jobs:
+            job_queue.add_job(task_type, order.append, name, profile=profile)
+        gate.set()
+        deadline = time.time() + 5
+        while len(order) < len(jobs) and time.time() < deadline:
+            time.sleep(0.01)
+        return order
+
+    def test_shortest_expected_job_runs_first(self):
+        job_queue = JobQueue(max_concurrent=1, scheduling='sjf', aging=0.0)
+        job_queue.estimator.record('submit', (8, 'python'), 5.0)
+        job_queue.estimator.record('submit', (2, 'python'), 0.1)
+
+        order = self.run_in_order(job_queue, [('slow', 'submit', (8, 'python')),
+                                              ('quick', 'submit', (2, 'python'))])
+        self.assertEqual(order, ['quick', 'slow'])
+
+    def test_waiting_jobs_age_ahead_of_new_short_ones(self):
+        job_queue = JobQueue(max_concurrent=1, scheduling='sjf', aging=1.0)
+        job_queue.estimator.record('submit', (8, 'python'), 0.2)
+        job_queue.estimator.record('submit', (2, 'python'), 0.1)
+
+        # The slow job was queued 0.3s before the quick one, which outweighs 0.1s more work
+        gate = threading.Event()
+        order = []
+        job_queue.add_job('blocker', gate.wait)
+        time.sleep(0.05)
+        job_queue.add_job('submit', order.append, 'slow', profile=(8, 'python'))
+        time.sleep(0.3)
+        job_queue.add_job('submit', order.append, 'quick', profile=(2, 'python'))
+        gate.set()
+        deadline = time.time() + 5
+        while len(order) < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(order, ['slow', 'quick'])
+
+    def test_participants_take_turns_within_a_lane(self):
+        job_queue = JobQueue(max_concurrent=1, scheduling='fifo')
+        gate = threading.Event()
+        order = []
+        job_queue.add_job('blocker', gate.wait)
+        time.sleep(0.05)
+        for name in ('a1', 'a2', 'a3'):
+            job_queue.add_job('run', order.append, name, owner='alice')
+        last = job_queue.add_job('run', order.append, 'b1', owner='bob')
+
+        self.assertEqual(job_queue.get_status(last)['position'], 2)
+        gate.set()
+        deadline = time.time() + 5
+        while len(order) < 4 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(order, ['a1', 'b1', 'a2', 'a3'])
+
+    def test_sjf_orders_participants_within_a_round(self):
+        job_queue = JobQueue(max_concurrent=1, scheduling='sjf', aging=0.0)
+        job_queue.estimator.record('submit', (8, 'python'), 5.0)
+        job_queue.estimator.record('submit', (2, 'python'), 0.1)
+        gate = threading.Event()
+        order = []
+        job_queue.add_job('blocker', gate.wait)
+        time.sleep(0.05)
+        job_queue.add_job('submit', order.append, 'bob-slow', owner='bob', profile=(8, 'python'))
+        job_queue.add_job('submit', order.append, 'alice-quick1', owner='alice', profile=(2, 'python'))
+        job_queue.add_job('submit', order.append, 'alice-quick2', owner='alice', profile=(2, 'python'))
+        job_queue.add_job('submit', order.append, 'carol-quick', owner='carol', profile=(2, 'python'))
+
+        gate.set()
+        deadline = time.time() + 5
+        while len(order) < 4 and time.time() < deadline:
+            time.sleep(0.01)
+        # Quick jobs go first, but alice's second one waits for the next round
+        self.assertEqual(order, ['alice-quick1', 'carol-quick', 'bob-slow', 'alice-quick2'])
+
+    def test_lanes_share_workers_by_weight(self):
+        job_queue = JobQueue(max_concurrent=1, scheduling='fifo', lane_weights={'submit': 2, 'run': 1})
+        jobs = [(f'run{i}', 'run', None) for i in range(3)] + [(f'submit{i}', 'submit', None) for i in range(3)]
+
+        order = self.run_in_order(job_queue, jobs)
+        self.assertEqual(order, ['submit0', 'run0', 'submit1', 'submit2', 'run1', 'run2'])
+
+    def test_fifo_keeps_arrival_order(self):
+        job_queue = JobQueue(max_concurrent=1, scheduling='fifo')
+        job_queue.estimator.record('submit', (8, 'python'), 5.0)
+
+        order = self.run_in_order(job_queue, [('slow', 'submit', (8, 'python')),
+                                              ('quick', 'submit', (2, 'python'))])
+        self.assertEqual(order, ['slow', 'quick'])
+
+
+
+class TestCoalescing(unittest.TestCase):
+    def setUp(self):
+        self.job_queue = JobQueue(max_concurrent=1)
+        self.gate = threading.Event()
+        self.calls = []
+        self.job_queue.add_job('blocker', self.gate.wait)
+        time.sleep(0.05)
+
+    def job(self, name):
+        self.calls.append(name)
+        return name
+
+    def wait_for(self, *task_ids):
+        deadline = time.time() + 5
+        while time.time() < deadline:
+            statuses = [self.job_queue.get_status(task_id) for task_id in task_ids]
+            if all(status['status'] == 'completed' for status in statuses):
+                return [status['result'] for status in statuses]
+            time.sleep(0.01)
+        self.fail(f"jobs did not finish: {statuses}")
+
+    def test_identical_jobs_share_one_execution(self):
+        first = self.job_queue.add_job('submit', self.job, 'a', owner='alice', dedupe_key='h1')
+        second = self.job_queue.add_job('submit', self.job, 'a', owner='alice', dedupe_key='h1')
+        other_owner = self.job_queue.add_job('submit', self.job, 'b', owner='bob', dedupe_key='h1')
+        self.assertEqual(self.job_queue.get_status(second)['position'], 1)
+
+        self.gate.set()
+        self.assertEqual(self.wait_for(first, second, other_owner), ['a', 'a', 'b'])
+        self.assertEqual(self.calls, ['a', 'b'])
+
+        # Once finished, the same payload runs again
+        third = self.job_queue.add_job('submit', self.job, 'a', owner='alice', dedupe_key='h1')
+        self.assertEqual(self.wait_for(third), ['a'])
+        self.assertEqual(self.calls, ['a', 'b', 'a'])
+
+    def test_newer_run_supersedes_waiting_one(self):
+        older = self.job_queue.add_job('run', self.job, 'old', owner='alice', dedupe_key='h1', supersede_key=2)
+        other_problem = self.job_queue.add_job('run', self.job, 'p3', owner='alice', dedupe_key='h2',
+                                               supersede_key=3)
+        newer = self.job_queue.add_job('run', self.job, 'new', owner='alice', dedupe_key='h3', supersede_key=2)
+
+        self.gate.set()
+        self.assertEqual(self.wait_for(older, other_problem, newer), ['new', 'p3', 'new'])
+        self.assertEqual(sorted(self.calls), ['new', 'p3'])
+
+
+
+class TestSharedStatus(unittest.TestCase):
+    def test_other_workers_see_statuses_and_results(self):
+        path = os.path.join(tempfile.mkdtemp(), 'status.db')
+        worker_a = JobQueue(max_concurrent=1, status_store=SharedStatusStore(path, ttl=60))
+        worker_b = JobQueue(max_concurrent=1, status_store=SharedStatusStore(path, ttl=60))
+        gate = threading.Event()
+        worker_a.add_job('blocker', gate.wait)
+        time.sleep(0.05)
+
+        task_id = worker_a.add_job('submit', dict, verdict='Accepted', owner='alice', dedupe_key='h1')
+        repeat = worker_a.add_job('submit', dict, verdict='Accepted', owner='alice', dedupe_key='h1')
+        self.assertEqual(worker_b.get_status(task_id)['status'], 'pending')
+
+        gate.set()
+        deadline = time.time() + 5
+        while worker_b.get_status(repeat)['status'] != 'completed' and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(worker_b.get_status(repeat)['result'], {'verdict': 'Accepted'})
+        self.assertEqual(worker_b.get_status(repeat)['task_id'], task_id)
+        self.assertIsNone(worker_b.get_status('missing'))
+
+
+class TestProcessBackend(unittest.TestCase):
+    def wait_for(self, job_queue, task_id):
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            status = job_queue.get_status(task_id)
+            if status['status'] in ('completed', 'failed'):
+                return status
+            time.sleep(0.05)
+        self.fail("job did not finish")
+
+    def test_only_module_level_functions_can_be_shipped(self):
+        self.assertEqual(job_descriptor(os.getpid), (os.name, 'getpid'))
+        with self.assertRaises(ValueError):
+            job_descriptor(lambda: None)
+
+    def test_jobs_run_in_recycled_worker_processes(self):
+        job_queue = JobQueue(max_concurrent=1, backend='process')
+        job_queue.runner.max_jobs = 1
+
+        first = self.wait_for(job_queue, job_queue.add_job('submit', os.getpid))
+        second = self.wait_for(job_queue, job_queue.add_job('submit', os.getpid))
+        failed = self.wait_for(job_queue, job_queue.add_job('submit', int, 'x'))
+
+        self.assertEqual(first['status'], 'completed')
+        self.assertNotEqual(first['result'], os.getpid())
+        self.assertNotEqual(second['result'], first['result'])
+        self.assertEqual(failed['status'], 'failed')
+        job_queue.runner.pool.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
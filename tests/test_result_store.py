@@ -0,0 +1,62 @@
+import unittest
+import os
+import sys
+from unittest import mock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import result_store
+from backend.result_store import ResultStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+class TestResultStore(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.object(result_store, 'time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_entries_expire_after_ttl(self):
+        store = ResultStore(ttl=10, max_entries=100)
+        store.set('a', 1)
+        store.set('b', 2)
+        self.clock.now += 5
+        store.set('a', 3)  # Refreshes 'a'
+        self.clock.now += 6
+
+        store.set('c', 4)
+        self.assertIsNone(store.get('b'))
+        self.assertEqual(store.get('a'), 3)
+        self.assertEqual(len(store), 2)
+
+    def test_kept_entries_get_a_fresh_ttl(self):
+        store = ResultStore(ttl=10, max_entries=100, keep=lambda value: value == 'running')
+        store.set('job', 'running')
+        store.set('done', 'finished')
+        self.clock.now += 11
+
+        store.set('other', 'finished')
+        self.assertEqual(store.get('job'), 'running')
+        self.assertNotIn('done', store)
+
+    def test_max_entries_is_a_hard_cap(self):
+        store = ResultStore(ttl=10, max_entries=2, keep=lambda value: True)
+        for i in range(5):
+            store.set(i, i)
+            self.clock.now += 1
+
+        self.assertEqual(len(store), 2)
+        self.assertEqual([store.get(i) for i in range(5)], [None, None, None, 3, 4])
+        self.assertLessEqual(len(store.expiry), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+import os
+import sys
+import stat
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import toolchain
+
+
+def write_script(path, body):
+    with open(path, 'w') as f:
+        f.write('#!/bin/sh\n' + body)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+
+
+@unittest.skipIf(os.name == 'nt', "uses shell scripts as fake JDK tools")
+class TestJavaToolchain(unittest.TestCase):
+    def setUp(self):
+        self.bin_dir = tempfile.mkdtemp()
+        self.calls = os.path.join(self.bin_dir, 'calls')
+        write_script(os.path.join(self.bin_dir, 'javac'), f'echo x >> {self.calls}\necho "javac 17.0.9"\n')
+        write_script(os.path.join(self.bin_dir, 'java'), 'case "$1" in -XX:TieredStopAtLevel=1) exit 1;; esac\nexit 0\n')
+        self.old_path = os.environ['PATH']
+        os.environ['PATH'] = self.bin_dir + os.pathsep + self.old_path
+        toolchain._toolchain = None
+        toolchain._toolchain_error = None
+
+    def tearDown(self):
+        os.environ['PATH'] = self.old_path
+        toolchain._toolchain = None
+        toolchain._toolchain_error = None
+
+    def probe_count(self):
+        if not os.path.exists(self.calls):
+            return 0
+        with open(self.calls) as f:
+            return len(f.readlines())
+
+    def test_resolved_once(self):
+        first = toolchain.get_java_toolchain()
+        second = toolchain.get_java_toolchain()
+        self.assertIs(first, second)
+        self.assertEqual(self.probe_count(), 1)
+        self.assertEqual(first.version, '17.0.9')
+        self.assertEqual(first.major_version, 17)
+        self.assertEqual(first.run_flags, ['-XX:+UseSerialGC'])
+
+    def test_refresh_probes_again(self):
+        toolchain.get_java_toolchain()
+        toolchain.refresh_java_toolchain()
+        self.assertEqual(self.probe_count(), 2)
+
+    def test_missing_jdk_is_cached_and_fails_fast(self):
+        os.environ['PATH'] = tempfile.mkdtemp()
+        original_paths = toolchain.POTENTIAL_JAVAC_PATHS
+        toolchain.POTENTIAL_JAVAC_PATHS = []
+        try:
+            with self.assertRaises(toolchain.ToolchainError):
+                toolchain.check_java_toolchain(required=True)
+            self.assertIsNone(toolchain.check_java_toolchain(required=False))
+        finally:
+            toolchain.POTENTIAL_JAVAC_PATHS = original_paths
+
+
+if __name__ == '__main__':
+    unittest.main()
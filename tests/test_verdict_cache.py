@@ -0,0 +1,70 @@
+import unittest
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.verdict_cache import VerdictCache, normalize_code
+
+
+class TestVerdictCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = VerdictCache(max_entries=2)
+
+    def test_key_ignores_only_line_endings(self):
+        code = 'def solution(x):\n    return x\n'
+        key = self.cache.key('submit', 1, 'python', code)
+        self.assertEqual(key, self.cache.key('submit', 1, 'Python', code.replace('\n', '\r\n')))
+        # Trailing spaces can change behaviour (string literals, backslash continuations)
+        self.assertNotEqual(key, self.cache.key('submit', 1, 'python', code.replace('\n', '  \n')))
+        self.assertNotEqual(key, self.cache.key('run', 1, 'python', code))
+        self.assertNotEqual(key, self.cache.key('submit', 2, 'python', code))
+        self.assertNotEqual(key, self.cache.key('submit', 1, 'python', code.replace('x\n', 'x + 1\n')))
+        self.assertEqual(normalize_code('a  \r\nb\r\n\n'), 'a  \nb\n\n')
+
+    def test_unknown_problem_is_never_cached(self):
+        key = self.cache.key('submit', 999999, 'python', 'x = 1')
+        self.assertIsNone(key)
+        self.cache.put(key, {'verdict': 'Accepted'})
+        self.assertIsNone(self.cache.get(key))
+
+    def test_evicts_least_recently_used(self):
+        self.cache.put('old', 1)
+        self.cache.put('used', 2)
+        self.cache.get('old')  # Refreshes 'old'
+        self.cache.put('new', 3)
+
+        self.assertEqual(self.cache.get('old'), 1)
+        self.assertIsNone(self.cache.get('used'))
+        self.assertEqual(self.cache.get('new'), 3)
+
+    def test_persists_across_instances(self):
+        path = os.path.join(tempfile.mkdtemp(), 'verdicts.json')
+        cache = VerdictCache(max_entries=10, path=path)
+        cache.put('a', {'verdict': 'Accepted', 'score': 100})
+        cache.save()
+
+        reloaded = VerdictCache(max_entries=10, path=path)
+        self.assertEqual(reloaded.get('a'), {'verdict': 'Accepted', 'score': 100})
+
+    def test_worker_process_cache_hands_new_entries_to_the_parent(self):
+        path = os.path.join(tempfile.mkdtemp(), 'verdicts.json')
+        parent = VerdictCache(max_entries=10, path=path)
+        parent.put('a', {'verdict': 'Accepted'})
+        parent.save()
+
+        worker = VerdictCache(max_entries=10, path=path, read_only=True)
+        self.assertEqual(worker.get('a'), {'verdict': 'Accepted'})
+        worker.put('b', {'verdict': 'Wrong Answer'})
+        worker.save()  # Only the parent writes the file
+        self.assertIsNone(VerdictCache(max_entries=10, path=path).get('b'))
+
+        parent.merge(worker.drain())
+        self.assertEqual(worker.drain(), [])
+        parent.save()
+        self.assertEqual(VerdictCache(max_entries=10, path=path).get('b'), {'verdict': 'Wrong Answer'})
+
+
+if __name__ == '__main__':
+    unittest.main()
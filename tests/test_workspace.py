@@ -0,0 +1,66 @@
+import unittest
+import os
+import sys
+import time
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.workspace import WorkspacePool, sweep, ORPHAN_PREFIXES, SCRATCH_ORPHAN_PREFIXES
+
+
+class TestWorkspacePool(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.pool = WorkspacePool(self.root, size=1)
+
+    def test_workspace_is_emptied_and_reused(self):
+        with self.pool.acquire() as path:
+            os.makedirs(os.path.join(path, 'pkg'))
+            with open(os.path.join(path, 'pkg', 'Main.class'), 'wb') as f:
+                f.write(b'\xca\xfe')
+
+        with self.pool.acquire() as reused:
+            self.assertEqual(reused, path)
+            self.assertEqual(os.listdir(reused), [])
+
+    def test_extra_workspaces_are_deleted_when_pool_is_full(self):
+        first = self.pool.acquire()
+        second = self.pool.acquire()
+        extra = second.path
+        first.release()
+        second.release()
+
+        self.assertFalse(os.path.exists(extra))
+        self.assertEqual(len(os.listdir(self.pool.dir)), 1)
+
+    def test_sweep_reclaims_orphans(self):
+        temp = tempfile.mkdtemp()
+        shared_scratch = tempfile.mkdtemp()
+        dead_pool = os.path.join(self.root, 'pool-999999999')
+        old_tmp = os.path.join(temp, 'tmpabc123')
+        fresh_tmp = os.path.join(temp, 'atc-java-new')
+        worker_dir = os.path.join(temp, 'java_worker')
+        old_java = os.path.join(shared_scratch, 'atc-java-old')
+        foreign_tmp = os.path.join(shared_scratch, 'tmpother')  # Another program's, e.g. in /tmp
+        for path in (dead_pool, old_tmp, fresh_tmp, worker_dir, old_java, foreign_tmp):
+            os.makedirs(path)
+        past = time.time() - 1000
+        for path in (old_tmp, worker_dir, old_java, foreign_tmp):
+            os.utime(path, (past, past))
+
+        orphan_dirs = {temp: ORPHAN_PREFIXES, shared_scratch: SCRATCH_ORPHAN_PREFIXES}
+        removed = sweep(self.root, orphan_dirs, max_age=600, own_pid=self.pool.pid)
+
+        self.assertEqual(removed, 3)
+        self.assertFalse(os.path.exists(dead_pool))
+        self.assertFalse(os.path.exists(old_tmp))
+        self.assertFalse(os.path.exists(old_java))
+        self.assertTrue(os.path.exists(fresh_tmp))
+        self.assertTrue(os.path.exists(worker_dir))
+        self.assertTrue(os.path.exists(foreign_tmp))
+        self.assertTrue(os.path.exists(self.pool.dir))
+
+
+if __name__ == '__main__':
+    unittest.main()